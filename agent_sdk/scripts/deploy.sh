@@ -9,7 +9,7 @@ SERVICE_NAME="inceptagentic-skill-mcq"
 IMAGE_NAME="us-central1-docker.pkg.dev/${PROJECT_ID}/ccapi-repo/inceptagentic-skill-mcq:latest"
 
 echo "Building Docker image..."
-gcloud builds submit . \
+gcloud builds submit .. \
   --config cloudbuild.yaml \
   --substitutions=_IMAGE_NAME="${IMAGE_NAME}"
 
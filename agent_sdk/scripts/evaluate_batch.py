@@ -25,6 +25,11 @@ from datetime import datetime
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+for _src in (ROOT / "src", ROOT.parent / "src"):
+    if str(_src) not in sys.path:
+        sys.path.insert(0, str(_src))
+
+from ccapi.router import pass_rates_by_tier
 
 
 def to_inceptbench_format(item: dict) -> dict:
@@ -266,6 +271,7 @@ def main():
                 "overall_score_100": "",
                 "rating": "",
                 "eval_error": "inceptbench_failed",
+                "model_tier": item.get("model_tier", ""),
             })
         else:
             overall = ev.get("overall", {})
@@ -286,6 +292,7 @@ def main():
                 "overall_score_100": score_100 if score_100 is not None else "",
                 "rating": rating,
                 "eval_error": "",
+                "model_tier": item.get("model_tier", ""),
             })
     
     # Save results
@@ -296,7 +303,7 @@ def main():
         writer = csv.DictWriter(
             f, 
             fieldnames=["id", "substandard_id", "difficulty", "question", "gen_error", 
-                       "overall_score", "overall_score_100", "rating", "eval_error"],
+                       "overall_score", "overall_score_100", "rating", "eval_error", "model_tier"],
             extrasaction="ignore"
         )
         writer.writeheader()
@@ -316,6 +323,8 @@ def main():
         "aggregate_score": aggregate,
         "pass_rate_percent": pass_rate,
         "n_failed_evaluation": n_failed_eval,
+        # Only when the items came from the model cascade (CCAPI_FAST_MODEL)
+        "by_model_tier": pass_rates_by_tier(csv_rows) if any(r["model_tier"] for r in csv_rows) else None,
         "timestamp": datetime.now().isoformat(),
     }
     
@@ -330,6 +339,8 @@ def main():
     print(f"Evaluation failures: {n_failed_eval}")
     print(f"Aggregate score: {aggregate}%")
     print(f"Pass rate (>85%): {pass_rate}%")
+    for tier, stats in (summary["by_model_tier"] or {}).items():
+        print(f"  {tier}: {stats['n_evaluated']} evaluated, aggregate {stats['aggregate_score']}%, pass rate {stats['pass_rate_percent']}%")
     print(f"\nFiles saved:")
     print(f"  - {csv_path}")
     print(f"  - {summary_path}")
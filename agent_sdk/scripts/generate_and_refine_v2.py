@@ -43,9 +43,10 @@ from pathlib import Path
 # Project root
 ROOT = Path(__file__).resolve().parents[1]
 
-# Add src to path
-if str(ROOT / "src") not in sys.path:
-    sys.path.insert(0, str(ROOT / "src"))
+# Add src to path, plus the repository's src/ for the shared ccapi modules
+for _src in (ROOT / "src", ROOT.parent / "src"):
+    if str(_src) not in sys.path:
+        sys.path.insert(0, str(_src))
 
 # Load environment variables
 try:
@@ -54,7 +55,8 @@ try:
 except ImportError:
     pass
 
-import anthropic
+from ccapi.anthropic_client import get_async_client, run_with_client
+from ccapi.resilience import call_with_retry
 
 # Check for API key
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
@@ -232,9 +234,11 @@ Return ONLY the self-assessment JSON:
 """
 
     try:
-        client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+        client = get_async_client(ANTHROPIC_API_KEY)
         
-        response = await client.messages.create(
+        response = await call_with_retry(
+            "self_assess",
+            client.messages.create,
             model=ANTHROPIC_MODEL,
             max_tokens=1024,
             messages=[{"role": "user", "content": prompt}],
@@ -330,11 +334,13 @@ Return the improved question JSON only (no self-assessment needed):
 """
 
     try:
-        client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+        client = get_async_client(ANTHROPIC_API_KEY)
         
         system_prompt = correction_skill if correction_skill else generation_skill
         
-        response = await client.messages.create(
+        response = await call_with_retry(
+            "regenerate",
+            client.messages.create,
             model=ANTHROPIC_MODEL,
             max_tokens=4096,
             system=system_prompt if system_prompt else "You are an expert educational content creator.",
@@ -639,12 +645,12 @@ def main():
             print(f"Limited to {len(requests)} requests")
     
     # Run pipeline
-    result = asyncio.run(generate_and_refine_v2(
+    result = asyncio.run(run_with_client(generate_and_refine_v2(
         requests,
         threshold=args.threshold,
         max_retries=args.max_retries,
         verbose=args.verbose,
-    ))
+    )))
     
     # Convert to InceptBench format
     output_data = to_inceptbench_format(result["results"])
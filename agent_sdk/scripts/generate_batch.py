@@ -27,9 +27,10 @@ from pathlib import Path
 # Project root
 ROOT = Path(__file__).resolve().parents[1]
 
-# Add src to path
-if str(ROOT / "src") not in sys.path:
-    sys.path.insert(0, str(ROOT / "src"))
+# Add src to path, plus the repository's src/ for the shared ccapi modules
+for _src in (ROOT / "src", ROOT.parent / "src"):
+    if str(_src) not in sys.path:
+        sys.path.insert(0, str(_src))
 
 # Load environment variables
 try:
@@ -38,6 +39,9 @@ try:
 except ImportError:
     pass
 
+# eval_results.csv whose failed standards skip CCAPI_FAST_MODEL (ccapi/router.py)
+ROUTER_HISTORY = Path(os.getenv("CCAPI_ROUTER_HISTORY") or ROOT / "outputs" / "eval_results.csv")
+
 # Check for API key
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 if not ANTHROPIC_API_KEY:
@@ -56,15 +60,20 @@ def load_benchmark(path: Path) -> list[dict]:
     return requests
 
 
-async def generate_one_agentic_wrapper(request: dict, verbose: bool = False) -> dict:
+async def generate_one_agentic_wrapper(request: dict, verbose: bool = False) -> list[dict]:
     """
     Wrapper to call agentic pipeline.
+
+    Returns one result per generated item (request["quantity"] items come
+    back from a single model call), or a single failure result.
     
     Claude autonomously decides when to call tools:
     - lookup_curriculum: to get assessment boundaries and misconceptions
     - populate_curriculum: to generate missing curriculum data
     """
     from agentic_pipeline import generate_one_agentic
+    from ccapi.router import get_router
+    from ccapi.validation import result_issues
     
     # Paths for curriculum and scripts
     curriculum_path = ROOT / ".claude" / "skills" / "ela-question-generation" / "references" / "curriculum.md"
@@ -73,47 +82,71 @@ async def generate_one_agentic_wrapper(request: dict, verbose: bool = False) ->
     
     scripts_dir = ROOT / ".claude" / "skills" / "ela-question-generation" / "scripts"
     
-    result = await generate_one_agentic(
+    # CCAPI_FAST_MODEL set: try it first, rerun on ANTHROPIC_MODEL if the items fail validation
+    result, tier = await get_router().cascade(
         request,
-        curriculum_path=curriculum_path,
-        scripts_dir=scripts_dir,
-        verbose=verbose,
+        lambda model: generate_one_agentic(
+            request,
+            curriculum_path=curriculum_path,
+            scripts_dir=scripts_dir,
+            model=model,
+            verbose=verbose,
+        ),
+        lambda r: not result_issues(r),
     )
     
-    # Extract the generated item from the result
+    # Extract the generated items from the result
     if result.get("success"):
         generated_content = result.get("generatedContent", {}).get("generated_content", [])
         if generated_content:
-            item = generated_content[0]
-            return {
-                "success": True,
-                "id": item.get("id", ""),
-                "content": item.get("content", {}),
-                "request": request,
-                "tools_used": result.get("tools_used", []),
-            }
+            return [
+                {
+                    "success": True,
+                    "id": item.get("id", ""),
+                    "content": item.get("content", {}),
+                    "request": request,
+                    "tools_used": result.get("tools_used", []),
+                    "model_tier": tier,
+                }
+                for item in generated_content
+            ]
     
-    return {
+    return [{
         "success": False,
         "error": result.get("error", "Unknown error"),
         "request": request,
         "tools_used": result.get("tools_used", []),
-    }
+    }]
 
 
 async def run_batch_generation(
     requests: list[dict],
     verbose: bool = False,
+    concurrency: int = 1,
 ) -> list[dict]:
-    """Run batch generation sequentially (to avoid rate limits)."""
+    """
+    Run batch generation, up to `concurrency` requests at a time.
+
+    Calls are paced by the shared rate limiter (CCAPI_RATE_RPM / CCAPI_RATE_ITPM /
+    CCAPI_RATE_OTPM) and 429s are retried, so with those limits set concurrency
+    no longer has to be 1 to stay under them. Results are reported in input order.
+    """
     results = []
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(request: dict) -> list[dict]:
+        async with sem:
+            return await generate_one_agentic_wrapper(request, verbose)
+
+    tasks = [asyncio.ensure_future(bounded(request)) for request in requests]
     
     for i, request in enumerate(requests):
         item_id = f"{request.get('skills', {}).get('substandard_id', 'unknown')}_{request.get('type', 'mcq')}_{request.get('difficulty', 'easy')}"
         print(f"\n  [{i+1}/{len(requests)}] {item_id}")
         
-        result = await generate_one_agentic_wrapper(request, verbose)
-        results.append(result)
+        request_results = await tasks[i]
+        results.extend(request_results)
+        result = request_results[0]
         
         # Show tool calls (Claude's decisions)
         tools_used = result.get("tools_used", [])
@@ -122,7 +155,7 @@ async def run_batch_generation(
             print(f"      [CLAUDE TOOLS] {' → '.join(tool_names)}")
         
         if result.get("success"):
-            print(f"      → ✓ Generated successfully")
+            print(f"      → ✓ Generated {len(request_results)} item(s)")
         else:
             error = result.get('error', 'Unknown error')
             print(f"      → ✗ {error[:100]}")
@@ -168,6 +201,30 @@ def main():
         action="store_true",
         help="Show detailed Claude tool calls and reasoning",
     )
+    parser.add_argument(
+        "--quantity", "-q",
+        type=int,
+        default=None,
+        help="Questions per request from one model call (overrides the benchmark's quantity field)",
+    )
+    parser.add_argument(
+        "--cache",
+        choices=["use", "refresh", "off"],
+        default=None,
+        help="Generation cache: use (reuse unchanged rows), refresh (regenerate and overwrite), off (default: CCAPI_GEN_CACHE)",
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=None,
+        help="Requests generated at once (default 4 when CCAPI_RATE_RPM / CCAPI_RATE_ITPM / CCAPI_RATE_OTPM pace the run, else 1)",
+    )
+    parser.add_argument(
+        "--circuit-wait",
+        type=float,
+        default=600.0,
+        help="Seconds a call waits for an open circuit (API degraded) before the row fails (0 = fail fast)",
+    )
     args = parser.parse_args()
 
     # If caller provided --grade and didn't override --input, select grade-specific benchmark.
@@ -206,16 +263,38 @@ def main():
         requests = requests[:args.limit]
         print(f"Limited to {len(requests)} requests")
     
+    if args.quantity is not None:
+        for r in requests:
+            r["quantity"] = args.quantity
+    
     if args.verbose:
         print("\nVerbose mode: ON (showing Claude's tool decisions)")
     
     # Generate using agentic approach
     print(f"\nGenerating {len(requests)} questions (Claude orchestrates)...")
     
-    results = asyncio.run(run_batch_generation(requests, args.verbose))
+    from ccapi.anthropic_client import run_with_client
+    from ccapi.gen_cache import configure_generation_cache
+    from ccapi.rate_limit import default_concurrency, get_rate_limiter
+    from ccapi.resilience import RetryPolicy, configure_resilience, resilience_stats
+    from ccapi.router import configure_router
+    from ccapi.usage import USAGE
+    gen_cache = configure_generation_cache(args.cache)
+    if gen_cache is not None:
+        print(f"Generation cache: {gen_cache.mode} ({gen_cache.root})")
+    # A batch run rides out an upstream outage instead of failing every in-flight row
+    configure_resilience(policy=RetryPolicy(circuit_wait=args.circuit_wait))
+    router = configure_router(full_model=model, history=ROUTER_HISTORY)
+    if router.enabled:
+        print(f"Model cascade: {router.fast_model} -> {router.full_model} ({len(router.hard_standards)} hard standards)")
+    concurrency = args.concurrency if args.concurrency is not None else default_concurrency()
+    results = asyncio.run(run_with_client(run_batch_generation(requests, args.verbose, concurrency)))
+    limiter = get_rate_limiter()
+    usage = USAGE.snapshot()
     
-    # Count successes
+    # Count successes (one result per generated item, or per failed request)
     success_count = sum(1 for r in results if r.get("success"))
+    failed_count = len(results) - success_count
     
     # Collect tool usage stats
     all_tools = []
@@ -235,10 +314,15 @@ def main():
         "metadata": {
             "total": len(requests),
             "success": success_count,
-            "failed": len(requests) - success_count,
+            "failed": failed_count,
             "type_filter": args.type,
             "generation_mode": "agentic",
             "tool_calls": tool_counts,
+            "usage": usage,
+            "generation_cache": gen_cache.stats() if gen_cache is not None else None,
+            "resilience": resilience_stats(),
+            "rate_limit": limiter.stats() if limiter is not None else None,
+            "router": router.stats() if router.enabled else None,
             "timestamp": datetime.now().isoformat(),
         },
     }
@@ -248,12 +332,29 @@ def main():
     print(f"\n{'='*60}")
     print("Generation Complete")
     print(f"{'='*60}")
-    print(f"Total: {len(requests)}")
-    print(f"Success: {success_count}")
-    print(f"Failed: {len(requests) - success_count}")
+    print(f"Total: {len(requests)} requests")
+    print(f"Success: {success_count} items")
+    print(f"Failed: {failed_count}")
     print(f"\nClaude's tool usage:")
     for tool, count in tool_counts.items():
         print(f"  - {tool}: {count} calls")
+    print(f"\nPrompt cache: {usage['cache_hits']} hits / {usage['cache_misses']} misses")
+    if gen_cache is not None:
+        stats = output_data["metadata"]["generation_cache"]
+        print(f"Generation cache: {stats['hits']} hits / {stats['misses']} misses ({stats['entries']} entries on disk)")
+    if limiter is not None:
+        stats = output_data["metadata"]["rate_limit"]
+        print(f"Rate limiter: {stats['calls']} calls, {stats['waited_seconds']}s spent waiting for budget")
+    for name, stats in output_data["metadata"]["resilience"].items():
+        if stats["retries"] or stats["opened"]:
+            print(f"API retries ({name}): {stats['retries']} retried, circuit opened {stats['opened']}x, {stats['rejected']} calls held back")
+    if router.enabled:
+        for tier in ("fast", "full"):
+            stats = output_data["metadata"]["router"][tier]
+            print(
+                f"Model {tier} ({router.model(tier)}): {stats['passed']}/{stats['calls']} kept, "
+                f"{stats['escalated']} escalated, p50 {stats['p50_seconds']}s"
+            )
     print(f"\nOutput saved to: {args.output}")
 
 
@@ -11,15 +11,32 @@ Claude has full autonomy over tool usage via the native Anthropic tool_use featu
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
 import re
 import subprocess
 import sys
+import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 
+# Shared modules (src/ccapi at the repository root; the image copies ccapi/ next to this file)
+_SHARED_SRC = Path(__file__).resolve().parents[2] / "src"
+if str(_SHARED_SRC) not in sys.path:
+    sys.path.insert(0, str(_SHARED_SRC))
+
+from ccapi.anthropic_client import get_async_client
+from ccapi.formatters import output_token_budget, parsed_to_items, request_quantity
+from ccapi.gen_cache import cached_generation, generation_key, get_generation_cache, store_generation
+from ccapi.json_extract import IncrementalJSONScanner, extract_json
+from ccapi.resilience import call_with_retry, transient_error_fields
+from ccapi.schemas import emit_tool, question_type, tool_input
+from ccapi.singleflight import SingleFlight
+from ccapi.usage import record_usage
+from curriculum_tools import DEFAULT_CURRICULUM_PATH, TOOL_REGISTRY, lookup_curriculum
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,75 +44,6 @@ def _utc_ts() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
 
 
-def _extract_json(text: str) -> str:
-    """Extract first JSON object from text, optionally inside ```json ... ```."""
-    text = text.strip()
-    if not text:
-        return ""
-    
-    # Try code fence first
-    fence_match = re.search(r"```(?:json)?\s*(\{)", text, re.MULTILINE)
-    if fence_match:
-        start_pos = fence_match.end(1) - 1
-        depth = 0
-        for i in range(start_pos, len(text)):
-            if text[i] == "{":
-                depth += 1
-            elif text[i] == "}":
-                depth -= 1
-                if depth == 0:
-                    candidate = text[start_pos:i+1].strip()
-                    if '"id"' in candidate and '"content"' in candidate:
-                        return candidate
-                    break
-    
-    # Try to find JSON object with "id" and "content"
-    pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*"id"[\s\S]*?"content"[\s\S]*?\}'
-    m = re.search(pattern, text)
-    if m:
-        candidate = m.group(0)
-        if candidate.count("{") == candidate.count("}"):
-            return candidate
-    
-    # Fallback: find first {...}
-    start = text.find("{")
-    if start < 0:
-        return text
-    depth = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
-    return text
-
-
-def _normalize_content(content: dict) -> dict:
-    """Ensure content has image_url=[] and answer_options as [{"key","text"}], etc."""
-    out = dict(content)
-    out["image_url"] = []
-    opts = out.get("answer_options")
-    if isinstance(opts, dict):
-        out["answer_options"] = [{"key": k, "text": v} for k, v in opts.items()]
-    elif isinstance(opts, list) and opts and isinstance(opts[0], dict):
-        out["answer_options"] = [
-            {"key": str(o.get("key", "")), "text": str(o.get("text", ""))} for o in opts
-        ]
-    return out
-
-
-def _parsed_to_item(parsed: dict, request: dict, normalize: bool = True) -> dict:
-    """Build standardized item from parsed LLM JSON and original request."""
-    c = parsed.get("content", {})
-    content = _normalize_content(c) if normalize else dict(c)
-    return {
-        "id": parsed.get("id", ""),
-        "content": content,
-        "request": request,
-    }
-
 def _id_prefix_from_standard_id(substandard_id: str) -> str:
     """
     Convert a CCSS standard id into an item id prefix.
@@ -235,16 +183,178 @@ def execute_tool(tool_name: str, tool_input: dict, scripts_dir: Path) -> str:
     return json.dumps(result, indent=2)
 
 
+# "inprocess" (default): tools run as async functions over the shared
+# curriculum index (curriculum_tools). "subprocess": run the skill scripts in
+# a fresh interpreter per call, for isolation.
+TOOL_EXECUTION_MODE = os.environ.get("TOOL_EXECUTION_MODE", "inprocess").strip().lower()
+
+# Pre-inject the lookup_curriculum tool turn so Claude starts with the
+# curriculum data instead of spending a model round trip asking for it.
+PREFETCH_CURRICULUM = os.environ.get("PREFETCH_CURRICULUM", "true").strip().lower() in {"1", "true", "yes"}
+
+# Stream generation turns and stop reading once the final JSON item closes
+STREAM_GENERATION = os.environ.get("STREAM_GENERATION", "false").strip().lower() in {"1", "true", "yes"}
+
+# "text": parse the final JSON out of Claude's reply; "tool": Claude must call
+# a tool every turn and submits the item through emit_question (schema-checked
+# tool input, no text parsing)
+OUTPUT_MODE = os.environ.get("OUTPUT_MODE", "text").strip().lower()
+
+# Per-item self_assessment the model adds in merged mode (main.py's SELF_ASSESS_MODE=merged)
+SELF_ASSESSMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "overall_score": {"type": "number", "minimum": 0, "maximum": 1},
+        "confident": {"type": "boolean"},
+        "issues": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["overall_score", "confident", "issues"],
+}
+
+
+def _with_self_assessment(emit: dict) -> dict:
+    """emit_tool() result whose item schema also requires a self_assessment (emit_tool builds fresh dicts)."""
+    schema = emit["input_schema"]
+    item = schema["properties"]["items"]["items"] if "items" in schema["properties"] else schema
+    item["properties"]["self_assessment"] = SELF_ASSESSMENT_SCHEMA
+    item["required"].append("self_assessment")
+    return emit
+
+# Concurrent populate_curriculum calls for the same standard share one
+# subprocess/LLM call; failures are remembered briefly before being retried.
+_POPULATE_FLIGHT = SingleFlight(
+    negative_ttl=float(os.environ.get("POPULATE_NEGATIVE_TTL", "60")),
+)
+
+
+async def _run_tool(
+    tool_name: str,
+    tool_input: dict,
+    scripts_dir: Path,
+    curriculum_path: Path,
+    mode: str,
+) -> dict:
+    if mode == "subprocess":
+        if tool_name == "lookup_curriculum":
+            return await asyncio.to_thread(execute_lookup_curriculum, tool_input, scripts_dir)
+        if tool_name == "populate_curriculum":
+            return await asyncio.to_thread(execute_populate_curriculum, tool_input, scripts_dir)
+        return {"error": f"Unknown tool: {tool_name}"}
+
+    executor = TOOL_REGISTRY.get(tool_name)
+    if executor is None:
+        return {"error": f"Unknown tool: {tool_name}"}
+    try:
+        return await executor(tool_input, curriculum_path=curriculum_path)
+    except Exception as e:
+        logger.exception("Tool %s failed", tool_name)
+        return {"success": False, "error": f"{type(e).__name__}: {e}"}
+
+
+async def execute_tool_async(
+    tool_name: str,
+    tool_input: dict,
+    scripts_dir: Path,
+    *,
+    curriculum_path: Path | None = None,
+    mode: str | None = None,
+) -> str:
+    """
+    Execute a tool without blocking the event loop and return the result as JSON string.
+
+    Tools run in-process from TOOL_REGISTRY unless mode (or TOOL_EXECUTION_MODE)
+    is "subprocess". populate_curriculum is deduplicated per substandard_id:
+    callers that arrive while a population is running await it instead of
+    starting another.
+    """
+    mode = (mode or TOOL_EXECUTION_MODE).strip().lower()
+    curriculum_path = curriculum_path or DEFAULT_CURRICULUM_PATH
+
+    if tool_name != "populate_curriculum":
+        result = await _run_tool(tool_name, tool_input, scripts_dir, curriculum_path, mode)
+        return json.dumps(result, indent=2)
+
+    target = scripts_dir if mode == "subprocess" else curriculum_path
+    key = (str(target), tool_input.get("substandard_id", ""))
+    result, shared = await _POPULATE_FLIGHT.do(
+        key,
+        lambda: _run_tool(tool_name, tool_input, scripts_dir, curriculum_path, mode),
+    )
+    if shared:
+        result = {**result, "shared": True}
+    return json.dumps(result, indent=2)
+
+
+# Per-tool timeouts (seconds) for one tool_use block
+TOOL_TIMEOUTS = {
+    "lookup_curriculum": float(os.environ.get("LOOKUP_TOOL_TIMEOUT", "30")),
+    "populate_curriculum": float(os.environ.get("POPULATE_TOOL_TIMEOUT", "90")),
+}
+DEFAULT_TOOL_TIMEOUT = 60.0
+
+
+async def execute_tool_with_timeout(
+    tool_name: str,
+    tool_input: dict,
+    scripts_dir: Path,
+    **kwargs,
+) -> tuple[str, bool]:
+    """
+    Run execute_tool_async under the tool's timeout.
+
+    Returns (result_json, is_error). A timeout becomes an error tool_result
+    instead of failing the whole generation; a shared populate keeps running
+    for its other waiters.
+    """
+    timeout = TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+    try:
+        result = await asyncio.wait_for(
+            execute_tool_async(tool_name, tool_input, scripts_dir, **kwargs),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Tool %s timed out after %ss", tool_name, timeout)
+        return json.dumps({"success": False, "error": f"{tool_name} timed out after {timeout}s"}), True
+    return result, False
+
+
 # ============================================================================
 # Agentic Generation Function
 # ============================================================================
 
+async def _stream_turn(client, **kwargs) -> tuple[object, str]:
+    """
+    Stream one model turn.
+
+    Returns (message, json_text). If the turn is plain text and an item
+    object ({"id", "content"} or an items wrapper) closes mid-stream, reading stops there (the rest of the
+    response is cancelled) and json_text is that object; the message is the
+    partial snapshot. Turns that call tools are read to completion.
+    """
+    scanner = IncrementalJSONScanner(require=("id", "content"))
+    calls_tool = False
+    async with client.messages.stream(**kwargs) as stream:
+        async for event in stream:
+            etype = getattr(event, "type", None)
+            if etype == "content_block_start" and getattr(event.content_block, "type", None) == "tool_use":
+                calls_tool = True
+            elif etype == "text" and not calls_tool and scanner.feed(event.text):
+                return stream.current_message_snapshot, scanner.result
+        return await stream.get_final_message(), ""
+
+
 async def generate_one_agentic(
     request: dict,
     *,
     curriculum_path: Path | None = None,
     scripts_dir: Path | None = None,
     model: str | None = None,
+    tool_mode: str | None = None,
+    prefetch_curriculum: bool | None = None,
+    stream: bool | None = None,
+    output_mode: str | None = None,
+    candidate: int = 0,
+    self_assess: bool = False,
     verbose: bool = False,
 ) -> dict:
     """
@@ -260,8 +370,19 @@ async def generate_one_agentic(
     Args:
         request: MCQ generation request
         curriculum_path: Path to curriculum.md
-        scripts_dir: Path to scripts directory
+        scripts_dir: Path to scripts directory (subprocess tool mode)
         model: Optional model override
+        tool_mode: "inprocess" or "subprocess" (default: TOOL_EXECUTION_MODE)
+        prefetch_curriculum: Run lookup_curriculum up front and inject it as an
+            already-answered tool turn (default: PREFETCH_CURRICULUM)
+        stream: Stream each turn and return as soon as the final JSON item
+            closes, cancelling the rest of the response (default: STREAM_GENERATION)
+        output_mode: "text" or "tool" (item submitted as emit_question tool
+            input; default: OUTPUT_MODE)
+        candidate: index of this call among parallel best-of-k candidates;
+            only used to give each candidate its own generation cache entry
+        self_assess: also ask for each item's "self_assessment" in the same
+            response (main.py's SELF_ASSESS_MODE=merged); it is kept on the item
         verbose: Enable verbose logging
     
     Returns:
@@ -291,7 +412,7 @@ async def generate_one_agentic(
     
     # Default paths
     if curriculum_path is None:
-        curriculum_path = Path(__file__).parent.parent / "data" / "curriculum.md"
+        curriculum_path = DEFAULT_CURRICULUM_PATH
     
     if scripts_dir is None:
         scripts_dir = Path(__file__).parent.parent / ".claude" / "skills" / "ela-question-generation" / "scripts"
@@ -306,6 +427,7 @@ async def generate_one_agentic(
     difficulty = request.get("difficulty", "easy")
     grade = request.get("grade", "3")
     qtype = request.get("type", "mcq")
+    quantity = request_quantity(request)
     id_prefix = _id_prefix_from_standard_id(substandard_id)
     
     q = (qtype or "").strip().lower()
@@ -371,15 +493,64 @@ async def generate_one_agentic(
   }}
 }}"""
 
+    if self_assess:
+        # The item and its self-assessment in one response instead of a second round trip
+        qtype_requirements += """   - Adds a "self_assessment" of the finished question, scored 0.0-1.0 on InceptBench criteria:
+     factual accuracy, clarity, distractor quality, curriculum alignment, difficulty alignment
+     and educational accuracy (grade-appropriate, no answer giveaways). Give overall_score,
+     confident (false if unsure) and the concrete issues found. Be honest and critical.
+"""
+        schema_example = schema_example[: schema_example.rindex("}")].rstrip() + """,
+  "self_assessment": {"overall_score": 0.85, "confident": true, "issues": []}
+}"""
+
+    output_mode = output_mode or OUTPUT_MODE
+    emit = emit_tool(question_type(request), quantity) if output_mode == "tool" else None
+    if emit is not None and self_assess:
+        emit = _with_self_assessment(emit)
+
+    if emit is not None:
+        count = f"all {quantity} DISTINCT questions (unique ids _001 through _{quantity:03d})" if quantity > 1 else "the question"
+        output_instruction = f"""When {count} {'are' if quantity > 1 else 'is'} ready, submit by calling the {emit['name']} tool.
+Do not write the JSON as text. Each item follows this schema:
+{schema_example}"""
+    elif quantity > 1:
+        output_instruction = f"""Generate {quantity} DISTINCT questions for this request in this single response:
+   - Each uses a different passage/stem and tests the standard from a different angle
+   - Number the ids _001 through _{quantity:03d}; every id must be unique
+
+Return ONLY a valid JSON object of the form {{"items": [ ... ]}} with exactly {quantity} entries, each matching this schema:
+{schema_example}
+
+No markdown code fences in your final answer, just the JSON object."""
+    else:
+        output_instruction = f"""Return ONLY a valid JSON object matching this schema:
+{schema_example}
+
+No markdown code fences in your final answer, just the JSON object."""
+
+    if prefetch_curriculum is None:
+        prefetch_curriculum = PREFETCH_CURRICULUM
+    if stream is None:
+        stream = STREAM_GENERATION
+    
+    if prefetch_curriculum:
+        lookup_step = f"""1. FIRST: lookup_curriculum has already been called for substandard_id: "{substandard_id}"
+   - Its result is the first tool result in this conversation - use it"""
+        start_instruction = "If the curriculum data is complete, generate the question NOW."
+    else:
+        lookup_step = f"""1. FIRST: You MUST call lookup_curriculum tool with substandard_id: "{substandard_id}"
+   - This is REQUIRED - do not skip this step
+   - Wait for the tool result before proceeding"""
+        start_instruction = "Start by calling lookup_curriculum NOW."
+
     # Build the initial prompt
     user_prompt = f"""Generate a Grade {grade} ELA {qtype.upper()} question for this request:
 
 {json.dumps(request, indent=2)}
 
 MANDATORY WORKFLOW (YOU MUST FOLLOW THIS SEQUENCE):
-1. FIRST: You MUST call lookup_curriculum tool with substandard_id: "{substandard_id}"
-   - This is REQUIRED - do not skip this step
-   - Wait for the tool result before proceeding
+{lookup_step}
 
 2. IF MISSING DATA: If the lookup returns has_boundaries=False or has_misconceptions=False:
    - You MUST call populate_curriculum tool with:
@@ -396,34 +567,116 @@ MANDATORY WORKFLOW (YOU MUST FOLLOW THIS SEQUENCE):
 {qtype_requirements}
 
 CRITICAL: Do not generate the question until you have curriculum context from the tools.
-Start by calling lookup_curriculum NOW.
-
-Return ONLY a valid JSON object matching this schema:
-{schema_example}
-
-No markdown code fences in your final answer, just the JSON object."""
+{start_instruction}
+
+{output_instruction}"""
+
+    # Generation cache (CCAPI_GEN_CACHE): keyed on the prompt plus this standard's
+    # curriculum record, so populating the curriculum invalidates the entry
+    cache_key = ""
+    if get_generation_cache() is not None:
+        curriculum = await lookup_curriculum({"substandard_id": substandard_id}, curriculum_path=curriculum_path)
+        cache_key = generation_key(
+            request,
+            user_prompt,
+            model=model,
+            generation_mode="agentic",
+            tools=TOOLS,
+            output_mode=output_mode,
+            curriculum=curriculum,
+            **({"candidate": candidate} if candidate else {}),
+        )
+        cached = cached_generation(cache_key)
+        if cached is not None:
+            return cached
 
     try:
-        client = anthropic.AsyncAnthropic(api_key=api_key)
+        client = get_async_client(api_key)
         messages = [{"role": "user", "content": user_prompt}]
         tools_used = []
         max_iterations = 10  # Prevent infinite loops
         
+        if prefetch_curriculum:
+            # Synthetic assistant tool_use + its result, as if Claude had asked
+            lookup_input = {"substandard_id": substandard_id}
+            lookup_result = await execute_tool_async(
+                "lookup_curriculum",
+                lookup_input,
+                scripts_dir,
+                curriculum_path=curriculum_path,
+                mode=tool_mode,
+            )
+            tool_use_id = f"toolu_prefetch_{uuid.uuid4().hex[:24]}"
+            messages.append({
+                "role": "assistant",
+                "content": [{
+                    "type": "tool_use",
+                    "id": tool_use_id,
+                    "name": "lookup_curriculum",
+                    "input": lookup_input,
+                }],
+            })
+            messages.append({
+                "role": "user",
+                "content": [{
+                    "type": "tool_result",
+                    "tool_use_id": tool_use_id,
+                    "content": lookup_result,
+                }],
+            })
+            tools_used.append({"name": "lookup_curriculum", "input": lookup_input, "prefetched": True})
+            if verbose:
+                logger.info(f"Prefetched lookup_curriculum: {lookup_result[:200]}...")
+        
         for iteration in range(max_iterations):
             if verbose:
                 logger.info(f"Iteration {iteration + 1}: Calling Claude...")
             
             # Call Claude with tools
-            response = await client.messages.create(
+            request_kwargs = dict(
                 model=model,
-                max_tokens=4096,
+                max_tokens=output_token_budget(quantity),
                 tools=TOOLS,
                 messages=messages,
             )
+            if emit is not None:
+                # Every turn must be a tool call, so the item can only arrive via emit
+                request_kwargs["tools"] = TOOLS + [emit]
+                request_kwargs["tool_choice"] = {"type": "any"}
+            if stream:
+                response, streamed_json = await call_with_retry("agentic", _stream_turn, client, **request_kwargs)
+            else:
+                response = await call_with_retry("agentic", client.messages.create, **request_kwargs)
+                streamed_json = ""
+            record_usage(response)
             
             if verbose:
-                logger.info(f"Stop reason: {response.stop_reason}")
+                logger.info(f"Stop reason: {response.stop_reason}{' (stream closed after JSON)' if streamed_json else ''}")
             
+            submitted = tool_input(response.content, emit["name"]) if emit is not None else None
+            if submitted is not None:
+                tools_used.append({"name": emit["name"]})
+                result_items = parsed_to_items(submitted, request, limit=quantity)
+                if not result_items:
+                    return {
+                        "error": f"No questions with content in {emit['name']} input",
+                        "success": False,
+                        "timestamp": _utc_ts(),
+                        "generatedContent": {"generated_content": []},
+                        "generation_mode": "agentic",
+                        "tools_used": tools_used,
+                    }
+                if len(result_items) < quantity:
+                    logger.warning(f"Requested {quantity} questions, model returned {len(result_items)}")
+                return store_generation(cache_key, {
+                    "error": None,
+                    "success": True,
+                    "timestamp": _utc_ts(),
+                    "generatedContent": {"generated_content": result_items},
+                    "generation_mode": "agentic",
+                    "tools_used": tools_used,
+                })
+
             # Check if Claude wants to use a tool
             if response.stop_reason == "tool_use":
                 # Find tool use blocks
@@ -432,34 +685,42 @@ No markdown code fences in your final answer, just the JSON object."""
                 # Add assistant response to messages
                 messages.append({"role": "assistant", "content": response.content})
                 
-                # Execute each tool and add results
-                tool_results = []
+                # Execute all tools of this turn concurrently; results keep block order
                 for tool_block in tool_use_blocks:
-                    tool_name = tool_block.name
-                    tool_input = tool_block.input
-                    
                     if verbose:
-                        logger.info(f"Claude called tool: {tool_name} with input: {tool_input}")
-                    
-                    tools_used.append({"name": tool_name, "input": tool_input})
-                    
-                    # Execute the tool
-                    result = execute_tool(tool_name, tool_input, scripts_dir)
-                    
+                        logger.info(f"Claude called tool: {tool_block.name} with input: {tool_block.input}")
+                    tools_used.append({"name": tool_block.name, "input": tool_block.input})
+                
+                results = await asyncio.gather(*(
+                    execute_tool_with_timeout(
+                        tool_block.name,
+                        tool_block.input,
+                        scripts_dir,
+                        curriculum_path=curriculum_path,
+                        mode=tool_mode,
+                    )
+                    for tool_block in tool_use_blocks
+                ))
+                
+                tool_results = []
+                for tool_block, (result, is_error) in zip(tool_use_blocks, results):
                     if verbose:
                         logger.info(f"Tool result: {result[:200]}...")
                     
-                    tool_results.append({
+                    tool_result = {
                         "type": "tool_result",
                         "tool_use_id": tool_block.id,
                         "content": result,
-                    })
+                    }
+                    if is_error:
+                        tool_result["is_error"] = True
+                    tool_results.append(tool_result)
                 
                 # Add tool results to messages
                 messages.append({"role": "user", "content": tool_results})
                 
-            elif response.stop_reason == "end_turn":
-                # Claude finished - extract the final response
+            elif response.stop_reason == "end_turn" or streamed_json:
+                # Claude finished (or its JSON item is complete) - extract the final response
                 result_text = ""
                 for block in response.content:
                     if hasattr(block, "text"):
@@ -470,19 +731,31 @@ No markdown code fences in your final answer, just the JSON object."""
                 
                 # Parse JSON from the response
                 if result_text:
-                    js = _extract_json(result_text)
+                    js = streamed_json or extract_json(result_text, require=("id", "content"))
                     try:
                         parsed = json.loads(js)
-                        result_item = _parsed_to_item(parsed, request)
+                        result_items = parsed_to_items(parsed, request, limit=quantity)
+                        if not result_items:
+                            return {
+                                "error": "No questions with content in final response",
+                                "success": False,
+                                "timestamp": _utc_ts(),
+                                "generatedContent": {"generated_content": []},
+                                "generation_mode": "agentic",
+                                "tools_used": tools_used,
+                                "raw_response": result_text[:500],
+                            }
+                        if len(result_items) < quantity:
+                            logger.warning(f"Requested {quantity} questions, model returned {len(result_items)}")
                         
-                        return {
+                        return store_generation(cache_key, {
                             "error": None,
                             "success": True,
                             "timestamp": _utc_ts(),
-                            "generatedContent": {"generated_content": [result_item]},
+                            "generatedContent": {"generated_content": result_items},
                             "generation_mode": "agentic",
                             "tools_used": tools_used,
-                        }
+                        })
                     except json.JSONDecodeError as e:
                         return {
                             "error": f"Failed to parse JSON: {e}",
@@ -532,4 +805,5 @@ No markdown code fences in your final answer, just the JSON object."""
             "timestamp": _utc_ts(),
             "generatedContent": {"generated_content": []},
             "generation_mode": "agentic",
+            **transient_error_fields(e),
         }
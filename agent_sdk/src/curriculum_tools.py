@@ -0,0 +1,126 @@
+"""
+In-process curriculum tools for the agentic pipeline.
+
+lookup_curriculum and populate_curriculum run as async functions over the
+shared, memory-mapped curriculum index (curriculum_store) instead of
+spawning a Python subprocess per tool_use block. A lookup is a dict hit plus
+a few field copies; populate runs ccapi's populate path
+(ccapi.populate_curriculum): one LLM call with the populate-curriculum skill
+and a block-local, locked, atomic write to curriculum.md.
+
+The subprocess scripts in .claude/skills/.../scripts remain available via
+TOOL_EXECUTION_MODE=subprocess (see agentic_pipeline.execute_tool_async).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+# Shared modules (src/ccapi at the repository root; the image copies ccapi/ next to this file)
+_SHARED_SRC = Path(__file__).resolve().parents[2] / "src"
+if str(_SHARED_SRC) not in sys.path:
+    sys.path.insert(0, str(_SHARED_SRC))
+
+from ccapi.curriculum_store import get_mapped_curriculum
+from ccapi.populate_curriculum import generate_curriculum_content, update_curriculum_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CURRICULUM_PATH = Path(__file__).parent.parent / "data" / "curriculum.md"
+
+
+def _record(standard_id: str, curriculum_path: Path) -> dict[str, Any] | None:
+    return get_mapped_curriculum(curriculum_path).records().get(standard_id)
+
+
+async def lookup_curriculum(args: dict, *, curriculum_path: Path = DEFAULT_CURRICULUM_PATH) -> dict:
+    """Look up assessment boundaries and misconceptions for a standard."""
+    standard_id = (args.get("substandard_id") or "").strip()
+    try:
+        record = _record(standard_id, curriculum_path)
+    except OSError as e:
+        return {"success": False, "found": False, "error": f"Curriculum not readable: {e}"}
+
+    if record is None:
+        return {
+            "success": False,
+            "found": False,
+            "substandard_id": standard_id,
+            "error": f"Standard {standard_id} not found in curriculum",
+        }
+
+    boundaries = record.get("assessment_boundaries")
+    misconceptions = list(record.get("common_misconceptions") or [])
+    return {
+        "success": True,
+        "found": True,
+        "substandard_id": standard_id,
+        "standard_description": record.get("standard_description") or "",
+        "learning_objectives": list(record.get("learning_objectives") or []),
+        "assessment_boundaries": boundaries,
+        "common_misconceptions": misconceptions,
+        "has_boundaries": bool(boundaries),
+        "has_misconceptions": bool(misconceptions),
+    }
+
+
+async def populate_curriculum(
+    args: dict,
+    *,
+    curriculum_path: Path = DEFAULT_CURRICULUM_PATH,
+    model: str | None = None,
+) -> dict:
+    """Generate missing boundaries/misconceptions for a standard and save them to curriculum.md."""
+    standard_id = (args.get("substandard_id") or "").strip()
+    try:
+        record = _record(standard_id, curriculum_path)
+    except OSError as e:
+        return {"success": False, "error": f"Curriculum not readable: {e}"}
+    if record is None:
+        return {"success": False, "error": f"Standard {standard_id} not found in curriculum"}
+
+    if record.get("assessment_boundaries") and record.get("common_misconceptions"):
+        return {
+            "success": True,
+            "substandard_id": standard_id,
+            "assessment_boundaries": record.get("assessment_boundaries"),
+            "common_misconceptions": list(record.get("common_misconceptions") or []),
+            "updated": False,
+        }
+
+    description = (args.get("standard_description") or record.get("standard_description") or "").strip()
+    # ccapi's populate path: same skill prompt, and the same block format as every other writer
+    generated = await generate_curriculum_content(
+        standard_id,
+        description,
+        model=model or os.environ.get("ANTHROPIC_MODEL") or None,
+    )
+    if generated.get("error"):
+        return {"success": False, "error": generated["error"]}
+
+    updated = await asyncio.to_thread(
+        update_curriculum_file,
+        curriculum_path,
+        standard_id,
+        generated.get("assessment_boundaries"),
+        generated.get("common_misconceptions"),
+    )
+    return {
+        "success": True,
+        "substandard_id": standard_id,
+        "assessment_boundaries": generated.get("assessment_boundaries"),
+        "common_misconceptions": generated.get("common_misconceptions"),
+        "updated": updated,
+    }
+
+
+# Tool name -> async executor taking (tool_input, *, curriculum_path)
+TOOL_REGISTRY: dict[str, Callable[..., Awaitable[dict]]] = {
+    "lookup_curriculum": lookup_curriculum,
+    "populate_curriculum": populate_curriculum,
+}
@@ -21,13 +21,18 @@ import argparse
 import asyncio
 import json
 import logging
+import math
 import os
+import random
 import re
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Awaitable, Callable
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict, Field
 
 # Load .env if exists (optional dependency in local envs)
@@ -40,13 +45,22 @@ if (ROOT / ".env").exists():
     except ImportError:
         pass
 
-# Add src to path
+# Add src to path, plus the repository's src/ for the shared ccapi modules
 import sys
-if str(ROOT / "src") not in sys.path:
-    sys.path.insert(0, str(ROOT / "src"))
+for _src in (ROOT / "src", ROOT.parent / "src"):
+    if str(_src) not in sys.path:
+        sys.path.insert(0, str(_src))
 
-import anthropic
 from agentic_pipeline import generate_one_agentic
+from ccapi.anthropic_client import aclose_async_client, get_async_client
+from ccapi.formatters import MAX_QUANTITY
+from ccapi.rate_limit import get_rate_limiter
+from ccapi.resilience import call_with_retry, resilience_stats
+from ccapi.router import configure_router, get_router
+from ccapi.schemas import question_type
+from ccapi.usage import USAGE, cached_system, record_usage
+from ccapi.validation import result_issues, structural_issues
+from ranking import rank_results
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -61,6 +75,21 @@ ANTHROPIC_API_KEY = (os.getenv("ANTHROPIC_API_KEY") or "").strip()
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929")
 SELF_ASSESS_THRESHOLD = float(os.getenv("SELF_ASSESS_THRESHOLD", "0.85"))
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "1"))
+# Share of items passing local validation that still get the LLM self-assessment (1 = all, 0 = none)
+SELF_ASSESS_SAMPLE_RATE = float(os.getenv("SELF_ASSESS_SAMPLE_RATE", "1.0"))
+# separate: self-assess each item in its own call; merged: generation returns the item and its self-assessment together
+SELF_ASSESS_MODE = os.getenv("SELF_ASSESS_MODE", "separate").strip().lower()
+# Candidates generated concurrently per request, best one kept by local ranking (1 = off)
+BEST_OF_K = max(1, int(os.getenv("BEST_OF_K", "1")))
+
+# eval_results.csv whose failed standards skip CCAPI_FAST_MODEL (ccapi/router.py)
+ROUTER_HISTORY = Path(os.getenv("CCAPI_ROUTER_HISTORY") or ROOT / "outputs" / "eval_results.csv")
+
+# Local validator outcomes since startup (health endpoint)
+VALIDATION_STATS: Counter[str] = Counter()
+
+# The cascade escalates to ANTHROPIC_MODEL (ccapi's own default is CCAPI_LLM_MODEL)
+configure_router(full_model=ANTHROPIC_MODEL, history=ROUTER_HISTORY)
 
 app = FastAPI(title="InceptAgentic Skill MCQ Generator API")
 
@@ -158,6 +187,31 @@ def _normalize_content_for_type(content: dict, qtype: str) -> dict:
         out["answer_options"] = _normalize_answer_options(out.get("answer_options"))
     return out
 
+
+def _normalize_result(result: dict, qtype: str) -> dict:
+    """Type-normalize every item in a pipeline result, so validation sees what the API returns."""
+    items = (result.get("generatedContent") or {}).get("generated_content")
+    if not result.get("success") or not isinstance(items, list):
+        return result
+    normalized = [
+        {**item, "content": _normalize_content_for_type(item.get("content") or {}, qtype)}
+        if isinstance(item, dict) and isinstance(item.get("content"), dict) else item
+        for item in items
+    ]
+    return {**result, "generatedContent": {**result["generatedContent"], "generated_content": normalized}}
+
+@app.on_event("startup")
+async def _open_anthropic_client() -> None:
+    """Open the shared, pooled Anthropic client so requests reuse warm connections."""
+    if ANTHROPIC_API_KEY:
+        get_async_client(ANTHROPIC_API_KEY)
+
+
+@app.on_event("shutdown")
+async def _close_anthropic_client() -> None:
+    await aclose_async_client()
+
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -186,6 +240,8 @@ class GenerateRequest(BaseModel):
     instruction: str | None = None
     # Optional metadata some callers include (should not cause 422)
     substandard_metadata: dict | None = None
+    # Number of distinct questions to generate in one model call
+    quantity: int = Field(1, ge=1, le=MAX_QUANTITY)
 
 
 class GeneratedContent(BaseModel):
@@ -256,8 +312,8 @@ Be honest and critical. If unsure, set confident=false.
 """
 
 
-async def self_assess_question(question: dict, request: dict) -> dict:
-    """Self-assess a generated question using Claude."""
+async def self_assess_question(question: dict, request: dict, model: str = ANTHROPIC_MODEL) -> dict:
+    """Self-assess a generated question using Claude (the router's fast model when the cascade is on)."""
     if not ANTHROPIC_API_KEY:
         return {"overall_score": 0.85, "confident": True, "issues": []}
     
@@ -273,13 +329,16 @@ REQUEST:
 """
 
     try:
-        client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+        client = get_async_client(ANTHROPIC_API_KEY)
         
-        response = await client.messages.create(
-            model=ANTHROPIC_MODEL,
+        response = await call_with_retry(
+            "self_assess",
+            client.messages.create,
+            model=model,
             max_tokens=1024,
             messages=[{"role": "user", "content": prompt}],
         )
+        record_usage(response)
         
         result_text = ""
         for block in response.content:
@@ -318,11 +377,15 @@ async def regenerate_question(request: dict, original: dict, self_assessment: di
     
     issues = self_assessment.get("issues", [])
     score = self_assessment.get("overall_score", 0)
+    if self_assessment.get("source") == "validator":
+        verdict = "Your previous question failed automatic validation. Fix every issue listed."
+    else:
+        verdict = f"Your previous question scored {score * 100:.0f}% on self-assessment."
     
     question_type = request.get("type", "mcq")
     item_id = original.get("id", "unknown")
     
-    prompt = f"""Your previous question scored {score * 100:.0f}% on self-assessment.
+    prompt = f"""{verdict}
 
 ORIGINAL QUESTION:
 {json.dumps(original, indent=2)}
@@ -345,19 +408,23 @@ Return ONLY the question JSON:
 """
 
     try:
-        client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+        client = get_async_client(ANTHROPIC_API_KEY)
         
         # Load self-correction skill if available
         system_prompt = ""
         if SELF_CORRECTION_SKILL_PATH.exists():
             system_prompt = SELF_CORRECTION_SKILL_PATH.read_text(encoding="utf-8")
         
-        response = await client.messages.create(
+        response = await call_with_retry(
+            "regenerate",
+            client.messages.create,
             model=ANTHROPIC_MODEL,
             max_tokens=4096,
-            system=system_prompt if system_prompt else "You are an expert educational content creator.",
+            # Static skill prefix is cached; the per-question prompt follows it
+            system=cached_system(system_prompt) if system_prompt else "You are an expert educational content creator.",
             messages=[{"role": "user", "content": prompt}],
         )
+        record_usage(response)
         
         result_text = ""
         for block in response.content:
@@ -397,10 +464,38 @@ async def generate_with_self_correction(
     threshold: float = SELF_ASSESS_THRESHOLD,
     max_retries: int = MAX_RETRIES,
     verbose: bool = False,
+    stream: bool | None = None,
+    on_generated: Callable[[list[dict]], Awaitable[None]] | None = None,
+    best_of: int = BEST_OF_K,
+    self_assess_mode: str = SELF_ASSESS_MODE,
 ) -> dict:
     """
     Generate question with agentic pipeline + self-assessment + regeneration.
     
+    stream: stream generation turns (see generate_one_agentic).
+    on_generated: awaited with the generated items before self-assessment,
+        so streaming clients can show them right away.
+    
+    With CCAPI_FAST_MODEL set, generation goes through ModelRouter.cascade
+    (ccapi/router.py): the fast model first, redone on ANTHROPIC_MODEL when
+    the fast items fail local validation, and standards on the router's hard
+    list straight to ANTHROPIC_MODEL. Items are self-assessed by the model of
+    the tier that produced them; items scoring below threshold are
+    regenerated on ANTHROPIC_MODEL as before.
+    
+    best_of: with k > 1, k candidates are generated concurrently and ranked
+        locally (ranking.rank_results: structural issues, then a
+        heuristic score); only the winner is self-assessed. Latency is the
+        slowest of the k calls instead of a serial generate/regenerate chain,
+        at k times the generation tokens.
+    
+    self_assess_mode: "separate" sends each item back to the model with
+        SELF_ASSESSMENT_PROMPT; "merged" asks the generation call for the
+        item and its self_assessment in one response, saving that round
+        trip. Threshold and regeneration work the same on either; an item
+        that comes back without a usable embedded assessment falls back to
+        the separate call.
+    
     Returns:
         dict with generated_content in InceptBench format
     """
@@ -408,19 +503,24 @@ async def generate_with_self_correction(
     if verbose:
         logger.info(f"Generating for {request.get('skills', {}).get('substandard_id', 'unknown')}")
     
-    result = await generate_one_agentic(
+    merged = self_assess_mode == "merged"
+    router = get_router()
+    # Same escalation rule as ccapi: a failed or malformed fast result is redone on the full model
+    result, tier = await router.cascade(
         request,
-        curriculum_path=CURRICULUM_PATH,
-        scripts_dir=SCRIPTS_DIR,
-        verbose=verbose,
+        lambda model: _generate_agentic(request, model, stream, verbose, best_of, merged),
+        lambda r: not result_issues(r),
     )
     
     if not result.get("success"):
-        return {
+        failed = {
             "success": False,
             "error": result.get("error", "Generation failed"),
             "generated_content": [],
         }
+        if result.get("retry_after") is not None:
+            failed["retry_after"] = result["retry_after"]
+        return failed
     
     # Extract generated item
     items = result.get("generatedContent", {}).get("generated_content", [])
@@ -431,60 +531,225 @@ async def generate_with_self_correction(
             "generated_content": [],
         }
     
-    item = items[0]
-    question = {"id": item.get("id", ""), "content": item.get("content", {})}
     tools_used = result.get("tools_used", [])
     
+    if on_generated is not None:
+        await on_generated(items)
+    
     if verbose:
         tool_names = [t.get("name") for t in tools_used]
-        logger.info(f"Generated (tools: {' → '.join(tool_names) if tool_names else 'none'})")
+        logger.info(f"Generated {len(items)} item(s) (tools: {' → '.join(tool_names) if tool_names else 'none'})")
     
-    # Step 2: Self-assess
-    self_assessment = await self_assess_question(question, request)
-    score = self_assessment.get("overall_score", 0.85)
-    confident = self_assessment.get("confident", True)
+    # Steps 2-3 run per item, concurrently when the request asked for several
+    corrected = await asyncio.gather(
+        *(
+            _self_correct_item(
+                item,
+                request,
+                threshold,
+                max_retries,
+                verbose,
+                # Assessed by the model of the tier that produced the item
+                router.model(tier),
+                item.get("self_assessment") if merged else None,
+            )
+            for item in items
+        )
+    )
     
+    # Build response
+    return {
+        "success": True,
+        "generated_content": [
+            {
+                "id": question.get("id", ""),
+                "curriculum": "common_core",
+                "request": request,
+                "content": question.get("content", {}),
+            }
+            for question, _ in corrected
+        ],
+        "self_assessment": corrected[0][1],
+        "self_assessments": [assessment for _, assessment in corrected],
+        "tools_used": tools_used,
+        "model_tier": tier,
+    }
+
+
+async def _generate_agentic(
+    request: dict,
+    model: str,
+    stream: bool | None,
+    verbose: bool,
+    best_of: int = 1,
+    self_assess: bool = False,
+) -> dict:
+    """One agentic generation, or the locally best-ranked of `best_of` concurrent candidates."""
+    candidates = await asyncio.gather(
+        *(
+            generate_one_agentic(
+                request,
+                curriculum_path=CURRICULUM_PATH,
+                scripts_dir=SCRIPTS_DIR,
+                model=model,
+                stream=stream,
+                candidate=n,
+                self_assess=self_assess,
+                verbose=verbose,
+            )
+            for n in range(max(1, best_of))
+        )
+    )
+    qtype = question_type(request)
+    candidates = [_normalize_result(c, qtype) for c in candidates]
+    if len(candidates) == 1:
+        return candidates[0]
+    ranked = rank_results(list(candidates))
     if verbose:
-        logger.info(f"Self-assessment: {score * 100:.1f}% {'(confident)' if confident else '(not confident)'}")
+        valid = sum(1 for c in candidates if not result_issues(c))
+        logger.info(f"Best of {len(candidates)}: {valid} candidate(s) passed validation")
+    return ranked[0]
+
+
+async def _self_correct_item(
+    item: dict,
+    request: dict,
+    threshold: float,
+    max_retries: int,
+    verbose: bool,
+    assess_model: str = ANTHROPIC_MODEL,
+    embedded_assessment: dict | None = None,
+) -> tuple[dict, dict]:
+    """
+    Validate one generated item, self-assess it, and regenerate it once if it
+    fails validation or scores below threshold.
+    
+    A structurally broken item skips self-assessment: the validator's issues
+    go straight to regenerate_question. Items that pass are self-assessed
+    with probability SELF_ASSESS_SAMPLE_RATE; the rest are returned as they
+    are with overall_score None. embedded_assessment (SELF_ASSESS_MODE=merged)
+    came with the item from the generation call and is used instead of a
+    self-assessment call whenever it has a numeric overall_score.
+    """
+    question = {"id": item.get("id", ""), "content": item.get("content", {})}
+    
+    # Step 2: Local validation, then (sampled) self-assessment
+    issues = structural_issues(question["content"], question_type(request))
+    VALIDATION_STATS["checked"] += 1
+    if issues:
+        VALIDATION_STATS["failed"] += 1
+        self_assessment = {"overall_score": 0.0, "confident": True, "issues": issues, "source": "validator"}
+        if verbose:
+            logger.info(f"Validation failed {question['id']}: {issues}")
+    elif _usable_assessment(embedded_assessment):
+        VALIDATION_STATS["self_assess_merged"] += 1
+        self_assessment = {**embedded_assessment, "source": "merged"}
+        if verbose:
+            logger.info(f"Embedded self-assessment {question['id']}: {float(self_assessment['overall_score']) * 100:.1f}%")
+    elif random.random() >= SELF_ASSESS_SAMPLE_RATE:
+        VALIDATION_STATS["self_assess_skipped"] += 1
+        return question, {"overall_score": None, "confident": True, "issues": [], "source": "validator"}
+    else:
+        if embedded_assessment is not None:
+            VALIDATION_STATS["self_assess_merged_fallback"] += 1
+        self_assessment = await self_assess_question(question, request, assess_model)
+        if verbose:
+            score = self_assessment.get("overall_score", 0.85)
+            confident = self_assessment.get("confident", True)
+            logger.info(f"Self-assessment {question['id']}: {score * 100:.1f}% {'(confident)' if confident else '(not confident)'}")
     
-    # Step 3: Regenerate if below threshold
-    if score < threshold and max_retries > 0:
+    # Step 3: Regenerate if invalid or below threshold
+    if not _meets_threshold(self_assessment, threshold) and max_retries > 0:
         if verbose:
             issues = self_assessment.get("issues", [])
             logger.info(f"Below threshold, regenerating... Issues: {issues}")
         
         regenerated = await regenerate_question(request, question, self_assessment)
-        if regenerated:
-            question = regenerated
+        if regenerated and isinstance(regenerated.get("content"), dict):
+            regenerated = {**regenerated, "content": _normalize_content_for_type(regenerated["content"], question_type(request))}
+        # Never trade a well-formed item for a broken one
+        if regenerated and (issues or not structural_issues(regenerated.get("content"), question_type(request))):
+            # Keep the original id so ids stay unique across a multi-item response
+            question = {**regenerated, "id": question["id"] or regenerated.get("id", "")}
             if verbose:
                 logger.info("Regeneration successful")
     
-    # Build response
-    return {
-        "success": True,
-        "generated_content": [{
-            "id": question.get("id", ""),
-            "curriculum": "common_core",
-            "request": request,
-            "content": question.get("content", {}),
-        }],
-        "self_assessment": self_assessment,
-        "tools_used": tools_used,
-    }
+    return question, self_assessment
+
+
+def _usable_assessment(self_assessment: Any) -> bool:
+    """An embedded self_assessment with a 0-1 overall_score (anything else gets the separate call)."""
+    if not isinstance(self_assessment, dict):
+        return False
+    score = self_assessment.get("overall_score")
+    return isinstance(score, (int, float)) and not isinstance(score, bool) and 0.0 <= score <= 1.0
+
+
+def _meets_threshold(self_assessment: dict, threshold: float) -> bool:
+    """overall_score None = passed local validation and was not sampled for self-assessment."""
+    score = self_assessment.get("overall_score", 0.85)
+    return score is None or score >= threshold
 
 
 # ============================================================================
 # FastAPI Endpoints
 # ============================================================================
 
+def _to_internal_request(request: GenerateRequest) -> dict:
+    """Convert an API request to the pipeline's internal request format."""
+    internal_request = {
+        "type": request.type,
+        "grade": request.grade,
+        "skills": {
+            "lesson_title": request.skills.lesson_title or "",
+            "substandard_id": request.skills.substandard_id,
+            "substandard_description": request.skills.substandard_description or "",
+        },
+        "subject": request.subject,
+        "curriculum": request.curriculum,
+        "difficulty": request.difficulty,
+        "locale": request.locale,
+    }
+    if request.instruction is not None:
+        internal_request["instruction"] = request.instruction
+    if request.substandard_metadata is not None:
+        internal_request["substandard_metadata"] = request.substandard_metadata
+    if request.quantity > 1:
+        internal_request["quantity"] = request.quantity
+    return internal_request
+
+
+def _to_generated_content(result: dict, internal_request: dict, qtype: str) -> list[GeneratedContent]:
+    """Pipeline items -> response items with type-normalized content."""
+    return [
+        GeneratedContent(
+            id=item.get("id", ""),
+            request=internal_request,
+            content=_normalize_content_for_type(item.get("content", {}) or {}, qtype),
+        )
+        for item in result.get("generated_content", [])
+    ]
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.get("/")
-async def health_check() -> dict[str, str]:
-    """Health check endpoint."""
+async def health_check() -> dict:
+    """Health check endpoint (includes token usage / prompt-cache counters since startup)."""
+    limiter = get_rate_limiter()
     return {
         "status": "ok",
         "service": "inceptagentic-skill-mcq",
         "threshold": SELF_ASSESS_THRESHOLD,
         "max_retries": MAX_RETRIES,
+        "self_assess_mode": SELF_ASSESS_MODE,
+        "usage": USAGE.snapshot(),
+        "resilience": resilience_stats(),
+        "rate_limit": limiter.stats() if limiter else None,
+        "router": get_router().stats(),
+        "validation": dict(VALIDATION_STATS),
     }
 
 
@@ -498,24 +763,7 @@ async def generate_question(request: GenerateRequest) -> InceptBenchGenerateResp
     """
     logger.info(f"Received request: {request.skills.substandard_id}, difficulty={request.difficulty}, type={request.type}")
 
-    # Convert to internal request format
-    internal_request = {
-        "type": request.type,
-        "grade": request.grade,
-        "skills": {
-            "lesson_title": request.skills.lesson_title or "",
-            "substandard_id": request.skills.substandard_id,
-            "substandard_description": request.skills.substandard_description or "",
-        },
-        "subject": request.subject,
-        "curriculum": request.curriculum,
-        "difficulty": request.difficulty,
-        "locale": request.locale,
-    }
-    if request.instruction is not None:
-        internal_request["instruction"] = request.instruction
-    if request.substandard_metadata is not None:
-        internal_request["substandard_metadata"] = request.substandard_metadata
+    internal_request = _to_internal_request(request)
 
     try:
         # Call generation with self-correction
@@ -529,20 +777,16 @@ async def generate_question(request: GenerateRequest) -> InceptBenchGenerateResp
         if not result.get("success"):
             error = result.get("error", "Unknown error")
             logger.error(f"Generation failed: {error}")
+            if result.get("retry_after") is not None:
+                # Upstream overloaded/rate limited (after retries) or circuit open: tell the caller when to come back
+                raise HTTPException(
+                    status_code=503,
+                    detail=error,
+                    headers={"Retry-After": str(max(1, math.ceil(result["retry_after"])))},
+                )
             raise HTTPException(status_code=500, detail=error)
 
-        # Convert to response format
-        generated_content_list = []
-        for item in result.get("generated_content", []):
-            content_dict = _normalize_content_for_type(item.get("content", {}) or {}, request.type)
-
-            generated_content_list.append(
-                GeneratedContent(
-                    id=item.get("id", ""),
-                    request=internal_request,
-                    content=content_dict,
-                )
-            )
+        generated_content_list = _to_generated_content(result, internal_request, request.type)
 
         # Return minimal InceptBench shape:
         # { generated_content: [...] }
@@ -555,6 +799,58 @@ async def generate_question(request: GenerateRequest) -> InceptBenchGenerateResp
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@app.post("/generate/stream")
+async def generate_question_stream(request: GenerateRequest) -> StreamingResponse:
+    """
+    Streaming variant of /generate (Server-Sent Events).
+    
+    Events:
+      item  - {"generated_content": [...]} as soon as generation finishes
+              (generation turns are streamed and cut off once the JSON closes)
+      final - {"generated_content": [...]} after self-assessment/regeneration
+      error - {"error": "..."}
+    """
+    logger.info(f"Received stream request: {request.skills.substandard_id}, difficulty={request.difficulty}, type={request.type}")
+    internal_request = _to_internal_request(request)
+    queue: asyncio.Queue[str | None] = asyncio.Queue()
+
+    async def on_generated(items: list[dict]) -> None:
+        content = _to_generated_content({"generated_content": items}, internal_request, request.type)
+        await queue.put(_sse("item", {"generated_content": [c.model_dump() for c in content]}))
+
+    async def produce() -> None:
+        try:
+            result = await generate_with_self_correction(
+                internal_request,
+                threshold=SELF_ASSESS_THRESHOLD,
+                max_retries=MAX_RETRIES,
+                verbose=True,
+                stream=True,
+                on_generated=on_generated,
+            )
+            if result.get("success"):
+                content = _to_generated_content(result, internal_request, request.type)
+                await queue.put(_sse("final", {"generated_content": [c.model_dump() for c in content]}))
+            else:
+                await queue.put(_sse("error", {"error": result.get("error", "Unknown error")}))
+        except Exception as e:
+            logger.error(f"Pipeline execution failed: {e}", exc_info=True)
+            await queue.put(_sse("error", {"error": str(e)}))
+        finally:
+            await queue.put(None)
+
+    async def events():
+        task = asyncio.create_task(produce())
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            # Client disconnected (or we are done): stop any in-flight model calls
+            task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 # ============================================================================
 # CLI Mode
 # ============================================================================
@@ -581,12 +877,14 @@ async def cli_test(request_json: str, verbose: bool = True) -> None:
             "substandard_description": data.get("skills", {}).get("substandard_description", "") or data.get("substandard_description", ""),
         },
     }
+    if int(data.get("quantity") or 1) > 1:
+        request["quantity"] = int(data["quantity"])
     
     print("=" * 60)
     print("CLI Test: Generate with Self-Correction")
     print("=" * 60)
     print(f"Standard: {request['skills']['substandard_id']}")
-    print(f"Type: {request['type']}, Difficulty: {request['difficulty']}")
+    print(f"Type: {request['type']}, Difficulty: {request['difficulty']}, Quantity: {request.get('quantity', 1)}")
     print(f"Threshold: {SELF_ASSESS_THRESHOLD * 100}%, Max retries: {MAX_RETRIES}")
     print()
     
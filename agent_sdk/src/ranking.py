@@ -0,0 +1,87 @@
+"""
+Local ranking of best-of-k candidates (main.py's BEST_OF_K).
+
+rank_results() orders k pipeline results for the same request by their
+structural issues (ccapi.validation), then by heuristic_score(), a cheap
+estimate of the usual item-writing giveaways. No model call is made; only
+the winner goes on to self-assessment.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any
+
+# Shared modules (src/ccapi at the repository root; the image copies ccapi/ next to this file)
+_SHARED_SRC = Path(__file__).resolve().parents[2] / "src"
+if str(_SHARED_SRC) not in sys.path:
+    sys.path.insert(0, str(_SHARED_SRC))
+
+from ccapi.schemas import question_type
+from ccapi.validation import answer_keys, result_issues
+
+# Options that give the item away or dodge the skill
+CATCH_ALL_OPTIONS = ("all of the above", "none of the above", "both a and b", "all of these", "none of these")
+
+
+def heuristic_score(content: Any, qtype: str) -> float:
+    """
+    Cheap 0-1 quality estimate of a well-formed item (no model call).
+
+    Penalises the usual item-writing giveaways: a correct option much longer
+    than the distractors, the correct option's text repeated in the stem,
+    catch-all options ("all of the above"), badly unbalanced option lengths
+    and a thin explanation. Only meaningful for ranking candidates of the
+    same request against each other.
+    """
+    if not isinstance(content, dict):
+        return 0.0
+    score = 1.0
+    question = " ".join(str(content.get("question") or "").split()).lower()
+    explanation = str(content.get("answer_explanation") or "").strip()
+    if len(explanation) < 60:
+        score -= 0.15
+    options = content.get("answer_options")
+    if qtype == "fill-in" or not isinstance(options, list):
+        return max(0.0, score)
+
+    texts = {
+        str(o.get("key", "")).strip().upper(): " ".join(str(o.get("text", "")).split()).lower()
+        for o in options
+        if isinstance(o, dict)
+    }
+    answers = set(answer_keys(content.get("answer")))
+    correct = [t for k, t in texts.items() if k in answers and t]
+    distractors = [t for k, t in texts.items() if k not in answers and t]
+    if correct and distractors:
+        mean_distractor = sum(len(t) for t in distractors) / len(distractors)
+        if max(len(t) for t in correct) > 1.5 * mean_distractor + 5:
+            score -= 0.25
+        if any(len(t) >= 4 and t in question for t in correct) and not any(t in question for t in distractors):
+            score -= 0.25
+    if any(t.strip(" .") in CATCH_ALL_OPTIONS for t in texts.values()):
+        score -= 0.15
+    lengths = [len(t) for t in texts.values() if t]
+    if lengths and max(lengths) > 3 * max(1, min(lengths)) + 10:
+        score -= 0.1
+    return max(0.0, score)
+
+
+def rank_results(results: list[dict]) -> list[dict]:
+    """
+    Pipeline results best first: successful before failed, then fewest
+    structural issues, then highest mean heuristic_score over their items.
+    Ties keep the input order.
+    """
+
+    def key(result: dict) -> tuple[int, int, float]:
+        items = (result.get("generatedContent") or {}).get("generated_content") or []
+        scores = [heuristic_score(i.get("content"), question_type(i.get("request") or {})) for i in items]
+        return (
+            0 if result.get("success") and items else 1,
+            len(result_issues(result)),
+            -(sum(scores) / len(scores)) if scores else 0.0,
+        )
+
+    return sorted(results, key=key)
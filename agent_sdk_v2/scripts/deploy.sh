@@ -21,7 +21,7 @@ echo "  GET  /            - Health check"
 echo ""
 
 echo "Building Docker image..."
-gcloud builds submit . \
+gcloud builds submit .. \
   --config cloudbuild.yaml \
   --substitutions=_IMAGE_NAME="${IMAGE_NAME}"
 
@@ -78,8 +78,13 @@ def analyze_requests(requests: list[dict]) -> dict:
     return stats
 
 
-async def generate_one(request: dict, verbose: bool = False) -> dict:
-    """Generate one question using the agentic pipeline SDK."""
+async def generate_one(request: dict, verbose: bool = False) -> list[dict]:
+    """
+    Generate the request's question(s) using the agentic pipeline SDK.
+
+    Returns one result per generated item (request["quantity"] items come
+    back from a single agent run), or a single failure result.
+    """
     from agentic_pipeline_sdk import generate_one_agentic
     
     result = await generate_one_agentic(request, verbose=verbose)
@@ -87,27 +92,29 @@ async def generate_one(request: dict, verbose: bool = False) -> dict:
     if result.get("success"):
         generated_content = result.get("generatedContent", {}).get("generated_content", [])
         if generated_content:
-            item = generated_content[0]
-            return {
-                "success": True,
-                "id": item.get("id", ""),
-                "content": item.get("content", {}),
-                "request": request,
-            }
+            return [
+                {
+                    "success": True,
+                    "id": item.get("id", ""),
+                    "content": item.get("content", {}),
+                    "request": request,
+                }
+                for item in generated_content
+            ]
         else:
-            return {
+            return [{
                 "success": False,
                 "error": "No content in response",
                 "request": request,
                 "raw_response": result.get("raw_response", "")[:500] if result.get("raw_response") else "",
-            }
+            }]
     
-    return {
+    return [{
         "success": False,
         "error": result.get("error", "Unknown error"),
         "request": request,
         "raw_response": result.get("raw_response", "")[:500] if result.get("raw_response") else "",
-    }
+    }]
 
 
 async def run_batch(requests: list[dict], verbose: bool = False) -> list[dict]:
@@ -126,12 +133,13 @@ async def run_batch(requests: list[dict], verbose: bool = False) -> list[dict]:
         print(f"         Standard: {standard_id}")
         
         try:
-            result = await generate_one(request, verbose=verbose)
-            results.append(result)
+            request_results = await generate_one(request, verbose=verbose)
+            results.extend(request_results)
+            result = request_results[0]
             
             if result.get("success"):
-                success_count += 1
-                print(f"         ✓ Generated successfully")
+                success_count += len(request_results)
+                print(f"         ✓ Generated {len(request_results)} item(s)")
             else:
                 error = result.get("error", "Unknown error")
                 print(f"         ✗ {error[:80]}")
@@ -199,6 +207,12 @@ Examples:
         action="store_true",
         help="Show detailed SDK output",
     )
+    parser.add_argument(
+        "--quantity", "-q",
+        type=int,
+        default=None,
+        help="Questions per request from one agent run (overrides the benchmark's quantity field)",
+    )
     args = parser.parse_args()
     
     print("=" * 70)
@@ -246,6 +260,10 @@ Examples:
         print("\nNo records to process after filtering.")
         sys.exit(0)
     
+    if args.quantity is not None:
+        for r in requests:
+            r["quantity"] = args.quantity
+    
     # Analyze composition
     print(f"\nRequest composition:")
     stats = analyze_requests(requests)
@@ -11,22 +11,44 @@ Usage:
   python scripts/populate_curriculum_direct.py --dry-run
   python scripts/populate_curriculum_direct.py --limit 10
   python scripts/populate_curriculum_direct.py
+  python scripts/populate_curriculum_direct.py --concurrency 16 --rpm 200 --flush-every 50
+  python scripts/populate_curriculum_direct.py --batch-size 8
+
+Requests run concurrently (--concurrency) behind the shared ccapi rate
+limiter (--rpm, plus CCAPI_RATE_ITPM/OTPM) and ccapi's retry policy, and
+populated blocks are written back in batches of --flush-every via one
+locked, atomic rewrite per batch, so an interrupted run keeps everything
+flushed so far. With --batch-size K, up to K standards from the
+same grade/domain share one request (the skill instructions are sent once);
+entries missing or invalid in the batch response are retried one at a time.
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import os
 import re
 import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 # Project root
 ROOT = Path(__file__).resolve().parents[1]
 
+# ccapi from the repository's src/ (the image copies ccapi/ into this service's src/)
+for _src in (ROOT / "src", ROOT.parent / "src"):
+    if str(_src) not in sys.path:
+        sys.path.insert(0, str(_src))
+
+from ccapi.anthropic_client import get_async_client, run_with_client
+from ccapi.curriculum_store import load_curriculum, rewrite_blocks
+from ccapi.json_extract import extract_json
+from ccapi.rate_limit import configure_rate_limit
+from ccapi.resilience import call_with_retry
+
 # Load environment variables
 try:
     from dotenv import load_dotenv
@@ -58,10 +80,6 @@ class CurriculumNeed:
     needs_misconceptions: bool
 
 
-_STD_ID_RE = re.compile(r"^Standard ID:\s*(.+?)\s*$", re.MULTILINE)
-_STD_DESC_RE = re.compile(r"^Standard Description:\s*(.+?)\s*$", re.MULTILINE)
-
-
 def _infer_grade_from_standard_id(standard_id: str) -> str | None:
     parts = standard_id.split(".")
     if len(parts) >= 4 and parts[3].isdigit():
@@ -100,48 +118,18 @@ def build_benchmark_metadata(data_dir: Path) -> tuple[dict[str, str], dict[str,
     return id_to_desc, id_to_grade
 
 
-def split_blocks(curriculum_text: str) -> list[str]:
-    blocks = [b.strip() for b in curriculum_text.split("\n---\n") if b.strip()]
-    return blocks
-
-
-def _section_body(block: str, header: str, next_header: str) -> str:
-    pat = re.compile(
-        rf"{re.escape(header)}:\s*\n([\s\S]*?)\n\n{re.escape(next_header)}:",
-        re.MULTILINE,
-    )
-    m = pat.search(block)
-    return (m.group(1).strip() if m else "")
-
-
-def analyze_block_need(block: str) -> CurriculumNeed | None:
-    m_id = _STD_ID_RE.search(block)
-    if not m_id:
-        return None
-    sid = m_id.group(1).strip()
+def analyze_record_need(record: dict) -> CurriculumNeed | None:
+    """Which fields a pre-parsed sidecar record still needs (None for non-ELA standards)."""
+    sid = record.get("standard_id") or ""
     if not sid.startswith("CCSS.ELA-LITERACY."):
         return None
-
-    m_desc = _STD_DESC_RE.search(block)
-    desc = (m_desc.group(1).strip() if m_desc else "")
-
-    objectives = _section_body(block, "Learning Objectives", "Assessment Boundaries")
-    boundaries = _section_body(block, "Assessment Boundaries", "Common Misconceptions")
-    misconceptions = _section_body(block, "Common Misconceptions", "Difficulty Definitions")
-
-    needs_obj = (not objectives) or ("*None specified*" in objectives)
-    needs_bnd = (not boundaries) or ("*None specified*" in boundaries)
-    needs_mis = (not misconceptions) or ("*None specified*" in misconceptions)
-
-    grade = _infer_grade_from_standard_id(sid) or ""
-
     return CurriculumNeed(
         standard_id=sid,
-        standard_description=desc,
-        grade=grade,
-        needs_objectives=needs_obj,
-        needs_boundaries=needs_bnd,
-        needs_misconceptions=needs_mis,
+        standard_description=record.get("standard_description") or "",
+        grade=_infer_grade_from_standard_id(sid) or "",
+        needs_objectives=not record.get("learning_objectives"),
+        needs_boundaries=not record.get("assessment_boundaries"),
+        needs_misconceptions=not record.get("common_misconceptions"),
     )
 
 
@@ -155,21 +143,8 @@ def _format_bullets(items: list | str | None) -> str:
     return s if s else "*None specified*"
 
 
-def _update_curriculum_md_section(text: str, standard_id: str, data: dict) -> tuple[str, bool]:
-    """Update curriculum.md in-place for a given Standard ID."""
-    if f"Standard ID: {standard_id}" not in text:
-        return text, False
-
-    block_re = re.compile(
-        rf"(Standard ID:\s*{re.escape(standard_id)}[\s\S]*?)(?=\n---\n|\Z)",
-        re.MULTILINE,
-    )
-    m = block_re.search(text)
-    if not m:
-        return text, False
-
-    block = m.group(1)
-
+def _update_curriculum_block(block: str, data: dict) -> str:
+    """Return one curriculum.md block with objectives/boundaries/misconceptions replaced."""
     objectives = _format_bullets(data.get("learning_objectives"))
     boundaries = _format_bullets(data.get("assessment_boundaries"))
     misconceptions = _format_bullets(data.get("common_misconceptions"))
@@ -194,60 +169,16 @@ def _update_curriculum_md_section(text: str, standard_id: str, data: dict) -> tu
     if mis_re.search(block2):
         block2 = mis_re.sub(rf"\1{misconceptions}\3", block2)
 
-    new_text = text[: m.start(1)] + block2 + text[m.end(1) :]
-    return new_text, True
-
-
-def extract_json(text: str) -> str:
-    """Extract first JSON object from text."""
-    text = text.strip()
-    if not text:
-        return ""
-    
-    # Try code fence first
-    fence_match = re.search(r"```(?:json)?\s*(\{)", text, re.MULTILINE)
-    if fence_match:
-        start_pos = fence_match.end(1) - 1
-        depth = 0
-        for i in range(start_pos, len(text)):
-            if text[i] == "{":
-                depth += 1
-            elif text[i] == "}":
-                depth -= 1
-                if depth == 0:
-                    return text[start_pos:i+1].strip()
-    
-    # Fallback: find first {...}
-    start = text.find("{")
-    if start < 0:
-        return text
-    depth = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
-    return text
-
-
-def call_anthropic_api(
+    return block2
+
+
+def _build_prompt(
     standard_id: str,
     standard_description: str,
     grade: str,
     skill_instructions: str,
-    api_key: str,
-    model: str = "claude-sonnet-4-20250514",
-) -> dict:
-    """
-    Call Anthropic API directly to generate curriculum data.
-    """
-    import anthropic
-
-    client = anthropic.Anthropic(api_key=api_key)
-
-    prompt = f"""You are a curriculum specialist. Follow these instructions to generate curriculum data:
+) -> str:
+    return f"""You are a curriculum specialist. Follow these instructions to generate curriculum data:
 
 {skill_instructions}
 
@@ -268,31 +199,305 @@ Return ONLY a JSON object with these fields:
 No markdown code fences. Just the raw JSON object.
 """
 
+
+def _parse_response(response) -> dict:
+    text = ""
+    for block in response.content:
+        if hasattr(block, "text"):
+            text += block.text
+
+    json_str = extract_json(text, require=("learning_objectives", "assessment_boundaries"))
+    if not json_str:
+        return {"success": False, "error": "No JSON in response", "raw": text[:500]}
+
+    try:
+        data = json.loads(json_str)
+    except json.JSONDecodeError as e:
+        return {"success": False, "error": f"JSON parse error: {e}", "raw": text[:500]}
+    if not isinstance(data, dict):
+        return {"success": False, "error": "Expected a JSON object", "raw": text[:500]}
+    return {"success": True, "data": data}
+
+
+async def call_anthropic_api_async(
+    client,
+    standard_id: str,
+    standard_description: str,
+    grade: str,
+    skill_instructions: str,
+    model: str = "claude-sonnet-4-20250514",
+) -> dict:
+    """Generate curriculum data for one standard with the shared client (retried and rate-limited)."""
+    prompt = _build_prompt(standard_id, standard_description, grade, skill_instructions)
+
     try:
-        response = client.messages.create(
+        response = await call_with_retry(
+            "populate",
+            client.messages.create,
             model=model,
             max_tokens=1024,
             messages=[{"role": "user", "content": prompt}],
         )
-        
-        text = ""
-        for block in response.content:
-            if hasattr(block, "text"):
-                text += block.text
-        
-        json_str = extract_json(text)
-        if not json_str:
-            return {"success": False, "error": "No JSON in response", "raw": text[:500]}
-        
-        data = json.loads(json_str)
-        return {"success": True, "data": data}
-    
-    except json.JSONDecodeError as e:
-        return {"success": False, "error": f"JSON parse error: {e}", "raw": text[:500] if text else ""}
+        return _parse_response(response)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+def _build_batch_prompt(needs: list[CurriculumNeed], skill_instructions: str) -> str:
+    standards = "\n\n".join(
+        f"Standard ID: {n.standard_id}\nStandard Description: {n.standard_description}\nGrade: {n.grade}"
+        for n in needs
+    )
+    return f"""You are a curriculum specialist. Follow these instructions to generate curriculum data:
+
+{skill_instructions}
+
+---
+
+Generate curriculum data for EACH of these {len(needs)} standards, independently:
+
+{standards}
+
+Return ONLY a JSON array with one object per standard, each with these fields:
+- standard_id
+- learning_objectives (array of 2-4 strings)
+- assessment_boundaries (array of 1-3 strings)
+- common_misconceptions (array of 3-5 strings)
+
+No markdown code fences. Just the raw JSON array.
+"""
+
+
+def _valid_record(data) -> bool:
+    if not isinstance(data, dict):
+        return False
+    for key in ("learning_objectives", "assessment_boundaries", "common_misconceptions"):
+        value = data.get(key)
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list) or not any(str(v).strip() for v in value):
+            return False
+    return True
+
+
+def _parse_batch_text(text: str, expected: set[str]) -> dict[str, dict]:
+    """standard_id -> data for every valid entry of a batch response."""
+    decoder = json.JSONDecoder()
+    payload = None
+    for m in re.finditer(r"\[", text):
+        try:
+            payload, _ = decoder.raw_decode(text, m.start())
+            break
+        except json.JSONDecodeError:
+            continue
+    out: dict[str, dict] = {}
+    for item in payload if isinstance(payload, list) else []:
+        sid = item.get("standard_id") if isinstance(item, dict) else None
+        if sid in expected and sid not in out and _valid_record(item):
+            out[sid] = item
+    return out
+
+
+def batch_groups(needs: list[CurriculumNeed], batch_size: int) -> list[list[CurriculumNeed]]:
+    """Chunk needs into groups of up to batch_size sharing grade and domain."""
+    groups: dict[tuple[str, str], list[CurriculumNeed]] = {}
+    for n in needs:
+        parts = n.standard_id.split(".")
+        domain = parts[2] if len(parts) > 2 else ""
+        groups.setdefault((n.grade, domain), []).append(n)
+    size = max(1, batch_size)
+    return [g[i : i + size] for _, g in sorted(groups.items()) for i in range(0, len(g), size)]
+
+
+async def call_anthropic_api_batch_async(
+    client,
+    needs: list[CurriculumNeed],
+    skill_instructions: str,
+    model: str = "claude-sonnet-4-20250514",
+) -> dict:
+    """
+    Generate curriculum data for several standards in one request.
+
+    Returns {"success": bool, "data": {standard_id: data}, "error": ...};
+    standards absent from "data" were missing or invalid in the response.
+    """
+    prompt = _build_batch_prompt(needs, skill_instructions)
+    try:
+        response = await call_with_retry(
+            "populate",
+            client.messages.create,
+            model=model,
+            max_tokens=min(16000, 1024 * len(needs)),
+            messages=[{"role": "user", "content": prompt}],
+        )
+    except Exception as e:
+        return {"success": False, "data": {}, "error": str(e)}
+
+    text = "".join(getattr(block, "text", "") for block in response.content)
+    data = _parse_batch_text(text, {n.standard_id for n in needs})
+    if not data:
+        return {"success": False, "data": {}, "error": "No valid entries in batch response", "raw": text[:500]}
+    return {"success": True, "data": data}
+
+
+@dataclass
+class CheckpointWriter:
+    """
+    Buffers populated blocks and writes them to curriculum.md in batches.
+
+    Each flush is a single rewrite_blocks call (locked, atomic, block-local),
+    so a run that is interrupted keeps every batch flushed before it.
+    """
+
+    path: Path
+    flush_every: int = 20
+    pending: dict[str, dict] = field(default_factory=dict)
+    written: int = 0
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    async def add(self, standard_id: str, data: dict) -> None:
+        self.pending[standard_id] = data
+        if len(self.pending) >= self.flush_every:
+            await self.flush()
+
+    async def flush(self) -> set[str]:
+        async with self._lock:
+            if not self.pending:
+                return set()
+            batch, self.pending = self.pending, {}
+            updates = {
+                sid: (lambda block, data=data: _update_curriculum_block(block, data))
+                for sid, data in batch.items()
+            }
+            updated = await asyncio.to_thread(rewrite_blocks, self.path, updates)
+            self.written += len(updated)
+            missing = set(batch) - updated
+            print(f"  [flush] wrote {len(updated)} block(s) to {self.path.name}")
+            for sid in sorted(missing):
+                print(f"  [flush] {sid}: not found in curriculum.md")
+            return updated
+
+
+def _still_needs(record: dict | None) -> bool:
+    if record is None:
+        return True
+    need = analyze_record_need(record)
+    return bool(need and (need.needs_objectives or need.needs_boundaries or need.needs_misconceptions))
+
+
+async def populate_needs(
+    needs: list[CurriculumNeed],
+    *,
+    skill_instructions: str,
+    api_key: str,
+    model: str,
+    concurrency: int,
+    rpm: float,
+    flush_every: int,
+    batch_size: int = 1,
+) -> tuple[int, int, int]:
+    """Populate needs concurrently; returns (n_ok, n_skip, n_fail)."""
+    # Shared client with the SDK's retries off: call_with_retry is the only retry layer
+    client = get_async_client(api_key)
+    # Every call below waits on the process-wide limiter inside call_with_retry
+    configure_rate_limit(rpm=rpm)
+    writer = CheckpointWriter(CURRICULUM_MD, flush_every=max(1, flush_every))
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    # Re-check against the current file (in case it changed since selection)
+    current = {r["standard_id"]: r for r in load_curriculum(CURRICULUM_MD)}
+
+    counts = {"ok": 0, "skip": 0, "fail": 0}
+    total = len(needs)
+
+    async def single(i: int, n: CurriculumNeed) -> None:
+        sid = n.standard_id
+        async with sem:
+            result = await call_anthropic_api_async(
+                client,
+                standard_id=sid,
+                standard_description=n.standard_description,
+                grade=n.grade,
+                skill_instructions=skill_instructions,
+                model=model,
+            )
+
+        if not result.get("success"):
+            print(f"[{i}/{total}] {sid}: FAIL {result.get('error', 'Unknown error')}")
+            if result.get("raw"):
+                print(f"  Raw: {result['raw'][:200]}")
+            counts["fail"] += 1
+            return
+
+        print(f"[{i}/{total}] {sid}: OK")
+        counts["ok"] += 1
+        await writer.add(sid, result["data"])
+
+    def prepare(i: int, n: CurriculumNeed) -> CurriculumNeed | None:
+        """Normalize grade/description; None (and count a skip) if nothing to do."""
+        sid = n.standard_id
+        desc = (n.standard_description or "").strip()
+        grade = (n.grade or "").strip() or "3"
+
+        if not _still_needs(current.get(sid)):
+            print(f"[{i}/{total}] {sid}: SKIP already populated")
+            counts["skip"] += 1
+            return None
+        if not desc:
+            print(f"[{i}/{total}] {sid}: SKIP missing standard_description")
+            counts["skip"] += 1
+            return None
+        return CurriculumNeed(sid, desc, grade, n.needs_objectives, n.needs_boundaries, n.needs_misconceptions)
+
+    async def worker(i: int, n: CurriculumNeed) -> None:
+        ready = prepare(i, n)
+        if ready is not None:
+            await single(i, ready)
+
+    async def batch_worker(group: list[tuple[int, CurriculumNeed]]) -> None:
+        ready = [(i, r) for i, r in ((i, prepare(i, n)) for i, n in group) if r is not None]
+        if not ready:
+            return
+        if len(ready) == 1:
+            i, r = ready[0]
+            await single(i, r)
+            return
+
+        async with sem:
+            result = await call_anthropic_api_batch_async(
+                client, [r for _, r in ready], skill_instructions, model=model
+            )
+        got = result.get("data") or {}
+        if not result.get("success"):
+            print(f"  [batch] {len(ready)} standards: {result.get('error')}; retrying individually")
+
+        retry = []
+        for i, r in ready:
+            if r.standard_id in got:
+                print(f"[{i}/{total}] {r.standard_id}: OK (batch)")
+                counts["ok"] += 1
+                await writer.add(r.standard_id, got[r.standard_id])
+            else:
+                retry.append((i, r))
+        # Per-item fallback for entries the batch response didn't cover
+        await asyncio.gather(*(single(i, r) for i, r in retry))
+
+    try:
+        if batch_size > 1:
+            numbered = {n.standard_id: i for i, n in enumerate(needs, start=1)}
+            groups = batch_groups(needs, batch_size)
+            await asyncio.gather(
+                *(batch_worker([(numbered[n.standard_id], n) for n in g]) for g in groups)
+            )
+        else:
+            await asyncio.gather(*(worker(i, n) for i, n in enumerate(needs, start=1)))
+    finally:
+        # Flush whatever is buffered, including after Ctrl-C / errors
+        await writer.flush()
+
+    return counts["ok"], counts["skip"], counts["fail"]
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Populate missing curriculum fields (direct API)")
     ap.add_argument("--dry-run", action="store_true", help="Show what would be populated")
@@ -304,7 +509,26 @@ def main() -> int:
         help="Only populate standards referenced by benchmark files",
     )
     ap.add_argument("--all", action="store_true", help="Populate ALL standards in curriculum.md")
-    ap.add_argument("--delay", type=float, default=0.5, help="Delay between API calls (seconds)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Max API calls in flight")
+    ap.add_argument("--rpm", type=float, default=None, help="Max API requests per minute (default 50)")
+    ap.add_argument(
+        "--delay",
+        type=float,
+        default=None,
+        help="Deprecated: minimum seconds between API calls (converted to --rpm)",
+    )
+    ap.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Standards per API request, grouped by grade/domain (1 = one standard per call)",
+    )
+    ap.add_argument(
+        "--flush-every",
+        type=int,
+        default=20,
+        help="Write populated blocks to curriculum.md every N successes",
+    )
     ap.add_argument(
         "--model",
         default=os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514"),
@@ -313,6 +537,8 @@ def main() -> int:
     args = ap.parse_args()
     if args.all:
         args.only_benchmark = False
+    if args.rpm is None:
+        args.rpm = 60.0 / args.delay if args.delay else 50.0
 
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key and not args.dry_run:
@@ -333,14 +559,13 @@ def main() -> int:
             if len(parts) >= 3:
                 skill_instructions = parts[2].strip()
 
-    curriculum_text = CURRICULUM_MD.read_text(encoding="utf-8")
-    blocks = split_blocks(curriculum_text)
+    records = load_curriculum(CURRICULUM_MD)
 
     id_to_desc, id_to_grade = build_benchmark_metadata(ROOT / "data")
 
     needs: list[CurriculumNeed] = []
-    for block in blocks:
-        need = analyze_block_need(block)
+    for record in records:
+        need = analyze_record_need(record)
         if not need:
             continue
         if need.needs_objectives or need.needs_boundaries or need.needs_misconceptions:
@@ -367,11 +592,13 @@ def main() -> int:
     if args.limit is not None:
         needs = needs[: args.limit]
 
-    print(f"Curriculum blocks:                     {len(blocks)}")
+    print(f"Curriculum blocks:                     {len(records)}")
     print(f"Standards needing population (total):  {total}")
     print(f"Standards selected this run:           {len(needs)}")
     print(f"Model:                                 {args.model}")
-    print(f"Delay between calls:                   {args.delay}s")
+    print(f"Concurrency / rate limit:              {args.concurrency} / {args.rpm:g} rpm")
+    print(f"Batch size:                            {args.batch_size}")
+    print(f"Flush every:                           {args.flush_every}")
 
     if not needs:
         print("Nothing to populate.")
@@ -390,82 +617,22 @@ def main() -> int:
             print(f"  - {n.standard_id} (grade {n.grade}): {', '.join(flags)}")
         return 0
 
-    n_ok = 0
-    n_skip = 0
-    n_fail = 0
-
-    # Re-read curriculum for updates (in case it changed)
-    curriculum_text = CURRICULUM_MD.read_text(encoding="utf-8")
-
-    for i, n in enumerate(needs, start=1):
-        sid = n.standard_id
-        desc = (n.standard_description or "").strip()
-        grade = (n.grade or "").strip() or "3"
-
-        print(f"\n[{i}/{len(needs)}] {sid} (grade {grade})")
-
-        # Re-check if this standard still needs population (in case file was updated)
-        # Find the block for this standard and verify it still has *None specified*
-        block_match = re.search(
-            rf"(Standard ID:\s*{re.escape(sid)}[\s\S]*?)(?=\n---\n|\Z)",
-            curriculum_text,
-            re.MULTILINE,
-        )
-        if block_match:
-            block_text = block_match.group(1)
-            obj_body = _section_body(block_text, "Learning Objectives", "Assessment Boundaries")
-            bnd_body = _section_body(block_text, "Assessment Boundaries", "Common Misconceptions")
-            mis_body = _section_body(block_text, "Common Misconceptions", "Difficulty Definitions")
-            
-            still_needs = (
-                (not obj_body or "*None specified*" in obj_body) or
-                (not bnd_body or "*None specified*" in bnd_body) or
-                (not mis_body or "*None specified*" in mis_body)
-            )
-            
-            if not still_needs:
-                print("  SKIP: already populated")
-                n_skip += 1
-                continue
-
-        if not desc:
-            print("  SKIP: missing standard_description")
-            n_skip += 1
-            continue
-
-        result = call_anthropic_api(
-            standard_id=sid,
-            standard_description=desc,
-            grade=grade,
+    started = time.monotonic()
+    n_ok, n_skip, n_fail = asyncio.run(run_with_client(
+        populate_needs(
+            needs,
             skill_instructions=skill_instructions,
             api_key=api_key,
             model=args.model,
+            concurrency=args.concurrency,
+            rpm=args.rpm,
+            flush_every=args.flush_every,
+            batch_size=args.batch_size,
         )
-
-        if not result.get("success"):
-            print(f"  FAIL: {result.get('error', 'Unknown error')}")
-            if result.get("raw"):
-                print(f"  Raw: {result['raw'][:200]}")
-            n_fail += 1
-            time.sleep(args.delay)
-            continue
-
-        data = result["data"]
-        updated_text, updated = _update_curriculum_md_section(curriculum_text, sid, data)
-
-        if not updated:
-            print(f"  FAIL: Could not update curriculum.md (standard not found in file)")
-            n_fail += 1
-        else:
-            curriculum_text = updated_text
-            CURRICULUM_MD.write_text(curriculum_text, encoding="utf-8")
-            print("  OK: populated and saved")
-            n_ok += 1
-
-        time.sleep(args.delay)
+    ))
 
     print("\n" + "=" * 50)
-    print("Done.")
+    print(f"Done in {time.monotonic() - started:.1f}s.")
     print(f"Populated: {n_ok}")
     print(f"Skipped:   {n_skip}")
     print(f"Failed:    {n_fail}")
@@ -22,8 +22,19 @@ from __future__ import annotations
 import json
 import logging
 import re
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
+
+# Shared modules (src/ccapi at the repository root; the image copies ccapi/ next to this file)
+_SHARED_SRC = Path(__file__).resolve().parents[2] / "src"
+if str(_SHARED_SRC) not in sys.path:
+    sys.path.insert(0, str(_SHARED_SRC))
+
+from ccapi.curriculum_store import get_mapped_curriculum, rewrite_blocks
+from ccapi.formatters import parsed_entries, request_quantity
+from ccapi.json_extract import extract_json
 
 logger = logging.getLogger(__name__)
 
@@ -36,40 +47,6 @@ def utc_timestamp() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
 
 
-def extract_json(text: str) -> str:
-    """Extract first JSON object from text."""
-    text = text.strip()
-    if not text:
-        return ""
-    
-    # Try code fence first
-    fence_match = re.search(r"```(?:json)?\s*(\{)", text, re.MULTILINE)
-    if fence_match:
-        start_pos = fence_match.end(1) - 1
-        depth = 0
-        for i in range(start_pos, len(text)):
-            if text[i] == "{":
-                depth += 1
-            elif text[i] == "}":
-                depth -= 1
-                if depth == 0:
-                    return text[start_pos:i+1].strip()
-    
-    # Fallback: find first {...}
-    start = text.find("{")
-    if start < 0:
-        return text
-    depth = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
-    return text
-
-
 def _extract_text_from_content(content) -> str:
     """Extract text from SDK message content."""
     if isinstance(content, str):
@@ -98,12 +75,24 @@ def _curriculum_md_path() -> Path:
     return ROOT / ".claude" / "skills" / "ela-question-generation" / "reference" / "curriculum.md"
 
 
+def curriculum_records(path: Path | None = None) -> dict[str, dict[str, Any]]:
+    """
+    Pre-parsed curriculum records keyed by Standard ID.
+
+    Records come from the compiled sidecar (see curriculum_store) and are
+    reloaded only when curriculum.md's mtime or size changes.
+    """
+    return get_mapped_curriculum(path or _curriculum_md_path()).records()
+
+
 def lookup_curriculum(standard_id: str) -> str | None:
     """
     Extract curriculum data for a specific standard from curriculum.md.
     
     Instead of having Claude read the entire 8,190-line file,
     we pre-fetch only the relevant section (~30-40 lines).
+    The block is sliced out of a shared read-only mmap using the sidecar's
+    byte offsets, so the rest of the file is never copied.
     
     Args:
         standard_id: e.g., "CCSS.ELA-LITERACY.L.3.1.A"
@@ -116,18 +105,11 @@ def lookup_curriculum(standard_id: str) -> str | None:
         logger.warning(f"curriculum.md not found at {path}")
         return None
     
-    content = path.read_text(encoding="utf-8")
-    
-    # Split by block delimiter
-    blocks = content.split("\n---\n")
-    
-    for block in blocks:
-        # Check if this block contains the standard_id
-        if f"Standard ID: {standard_id}" in block:
-            return block.strip()
-    
-    logger.warning(f"Standard ID {standard_id} not found in curriculum.md")
-    return None
+    block = get_mapped_curriculum(path).block(standard_id)
+    if block is None:
+        logger.warning(f"Standard ID {standard_id} not found in curriculum.md")
+        return None
+    return block.strip()
 
 
 def _format_bullets(items: object) -> str:
@@ -141,27 +123,8 @@ def _format_bullets(items: object) -> str:
     return s if s else "*None specified*"
 
 
-def _update_curriculum_md_section(text: str, standard_id: str, data: dict) -> tuple[str, bool]:
-    """
-    Update the Learning Objectives / Assessment Boundaries / Common Misconceptions
-    inside the existing curriculum.md section for a given Standard ID.
-
-    Returns: (new_text, updated?)
-    """
-    if f"Standard ID: {standard_id}" not in text:
-        return text, False
-
-    # Find the block containing this standard (from Standard ID to next --- delimiter)
-    block_re = re.compile(
-        rf"(Standard ID:\s*{re.escape(standard_id)}[\s\S]*?)(?=\n---\n|\Z)",
-        re.MULTILINE,
-    )
-    m = block_re.search(text)
-    if not m:
-        return text, False
-
-    block = m.group(1)
-
+def _update_curriculum_block(block: str, data: dict) -> str:
+    """Return one curriculum.md block with objectives/boundaries/misconceptions replaced."""
     objectives = _format_bullets(data.get("learning_objectives"))
     boundaries = _format_bullets(data.get("assessment_boundaries"))
     misconceptions = _format_bullets(data.get("common_misconceptions"))
@@ -188,8 +151,7 @@ def _update_curriculum_md_section(text: str, standard_id: str, data: dict) -> tu
     if mis_re.search(block2):
         block2 = mis_re.sub(rf"\1{misconceptions}\3", block2)
 
-    new_text = text[: m.start(1)] + block2 + text[m.end(1) :]
-    return new_text, True
+    return block2
 
 
 async def run_skill_return_json(
@@ -253,7 +215,7 @@ async def populate_curriculum_entry(
 ) -> dict:
     """
     LOCAL-ONLY: Generate curriculum data using populate-curriculum skill and
-    update curriculum.md in-place.
+    update curriculum.md in-place (only this standard's block is rewritten).
     """
     skill_result = await run_skill_return_json(
         skill_name="populate-curriculum",
@@ -281,9 +243,8 @@ async def populate_curriculum_entry(
             "error": f"curriculum.md not found at {path}",
         }
 
-    original = path.read_text(encoding="utf-8")
-    updated_text, updated = _update_curriculum_md_section(original, standard_id, data)
-    if not updated:
+    # Block-local rewrite under an advisory lock, published via temp-file + rename
+    if standard_id not in curriculum_records(path):
         return {
             "success": False,
             "standard_id": standard_id,
@@ -291,12 +252,12 @@ async def populate_curriculum_entry(
             "curriculum_path": str(path),
         }
 
-    path.write_text(updated_text, encoding="utf-8")
+    updated = rewrite_blocks(path, {standard_id: lambda block: _update_curriculum_block(block, data)})
     return {
         "success": True,
         "standard_id": standard_id,
         "curriculum_path": str(path),
-        "updated": True,
+        "updated": bool(updated),
         "curriculum_data": data,
     }
 
@@ -353,6 +314,7 @@ async def generate_one_agentic(
     grade = request.get("grade", "3")
     qtype = request.get("type", "mcq")
     difficulty = request.get("difficulty", "medium")
+    quantity = request_quantity(request)
     
     # =========================================================================
     # STEP 2: Pre-fetch curriculum data (OPTIMIZATION)
@@ -392,7 +354,13 @@ to create pedagogically aligned questions. DO NOT read curriculum.md - use this
 {curriculum_context}
 """
     
-    prompt += """
+    if quantity > 1:
+        prompt += f"""
+Generate {quantity} DISTINCT questions in this single response (different passages/stems
+and correct answers), each with a unique id.
+Return ONE JSON object of the form {{"items": [...]}} whose entries each have "id" and "content" fields."""
+    else:
+        prompt += """
 Return the question as a JSON object with "id" and "content" fields."""
 
     # =========================================================================
@@ -515,7 +483,7 @@ Return the question as a JSON object with "id" and "content" fields."""
         try:
             # Extract text from response
             text = _extract_text_from_content(result_content)
-            json_str = extract_json(text) if text else ""
+            json_str = extract_json(text, require=("id", "content")) if text else ""
             
             if not json_str:
                 return {
@@ -526,11 +494,17 @@ Return the question as a JSON object with "id" and "content" fields."""
                     "raw_response": text[:500] if text else str(result_content)[:500],
                 }
             
-            parsed = json.loads(json_str)
-            
-            # Normalize content
-            content = parsed.get("content", {})
-            content["image_url"] = []
+            entries = parsed_entries(json.loads(json_str))[:quantity]
+            if not entries:
+                return {
+                    "success": False,
+                    "error": "No questions with content in response",
+                    "timestamp": utc_timestamp(),
+                    "generatedContent": {"generated_content": []},
+                    "raw_response": text[:500],
+                }
+            if len(entries) < quantity:
+                logger.warning(f"[SDK] Requested {quantity} questions, agent returned {len(entries)}")
             
             # Build request in expected format
             formatted_request = {
@@ -551,12 +525,16 @@ Return the question as a JSON object with "id" and "content" fields."""
                 "timestamp": utc_timestamp(),
                 "session_id": session_id,
                 "generatedContent": {
-                    "generated_content": [{
-                        "id": parsed.get("id", ""),
-                        "curriculum": request.get("curriculum", "common_core"),
-                        "request": formatted_request,
-                        "content": content,
-                    }]
+                    "generated_content": [
+                        {
+                            "id": entry["id"],
+                            "curriculum": request.get("curriculum", "common_core"),
+                            "request": formatted_request,
+                            # Normalize content
+                            "content": {**entry["content"], "image_url": []},
+                        }
+                        for entry in entries
+                    ]
                 },
             }
         except json.JSONDecodeError as e:
@@ -693,8 +671,10 @@ Return the question as a JSON object."""
     
     try:
         text = _extract_text_from_content(result)
-        json_str = extract_json(text)
+        json_str = extract_json(text, require=("id", "content"))
         parsed = json.loads(json_str)
+        if isinstance(parsed, list):
+            parsed = next((p for p in parsed if isinstance(p, dict)), {})
         
         content = parsed.get("content", {})
         content["image_url"] = []
@@ -33,7 +33,7 @@ from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # Project root (where .claude/skills/ lives)
 ROOT = Path(__file__).resolve().parents[1]
@@ -53,6 +53,7 @@ if str(ROOT / "src") not in sys.path:
 
 # Import SDK-based pipelines (Skills approach only)
 from agentic_pipeline_sdk import generate_one_agentic
+from ccapi.formatters import MAX_QUANTITY
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -99,6 +100,8 @@ class GenerateRequest(BaseModel):
     skills: Skills
     curriculum: str = "common core"
     instruction: str | None = None
+    # Number of distinct questions to generate in one agent run
+    quantity: int = Field(1, ge=1, le=MAX_QUANTITY)
 
 
 class GeneratedContent(BaseModel):
@@ -160,6 +163,8 @@ async def generate_question(request: GenerateRequest) -> GenerateResponse:
     }
     if request.instruction:
         internal_request["instruction"] = request.instruction
+    if request.quantity > 1:
+        internal_request["quantity"] = request.quantity
     
     try:
         result = await generate_one_agentic(internal_request, verbose=True)
@@ -213,6 +218,8 @@ async def cli_test_generate(request_json: str) -> None:
             "substandard_description": data.get("skills", {}).get("substandard_description", "") or data.get("substandard_description", ""),
         },
     }
+    if int(data.get("quantity") or 1) > 1:
+        request["quantity"] = int(data["quantity"])
     
     print("=" * 60)
     print("ELA Question Generation - Claude Agent SDK (Skills)")
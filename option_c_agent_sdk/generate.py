@@ -8,7 +8,6 @@ Claude in fully agentic mode with custom MCP tools.
 import asyncio
 import json
 import os
-import re
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -17,39 +16,15 @@ from claude_agent_sdk import query, ClaudeAgentOptions
 
 from .tools import create_curriculum_mcp_server, TOOL_NAMES
 
+# tools put the repository's src/ on sys.path
+from ccapi.json_extract import extract_json
+
 
 def _utc_ts() -> str:
     """Return current UTC timestamp."""
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
 
 
-def _extract_json(text: str) -> str:
-    """Extract JSON object from text."""
-    text = text.strip()
-    if not text:
-        return ""
-    
-    # Try to find JSON in code fence
-    fence_match = re.search(r"```(?:json)?\s*(\{[\s\S]*?\})\s*```", text)
-    if fence_match:
-        return fence_match.group(1).strip()
-    
-    # Find first { and matching }
-    start = text.find("{")
-    if start < 0:
-        return text
-    
-    depth = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start:i+1]
-    return text
-
-
 async def generate_mcq_agentic(
     request: dict,
     *,
@@ -233,8 +208,10 @@ OUTPUT FORMAT (JSON only, no markdown):
         }
     
     try:
-        json_str = _extract_json(result_text)
+        json_str = extract_json(result_text, require=("id", "content"))
         parsed = json.loads(json_str)
+        if isinstance(parsed, list):
+            parsed = next((p for p in parsed if isinstance(p, dict)), {})
         
         if verbose:
             print(f"  [SUCCESS] MCQ generated")
@@ -6,11 +6,19 @@ from claude-agent-sdk. Claude can call these tools autonomously.
 """
 
 import json
+import sys
 from pathlib import Path
 from typing import Any
 
 from claude_agent_sdk import tool, create_sdk_mcp_server
 
+# Shared curriculum index (parses the compiled sidecar, not the markdown)
+_SRC = Path(__file__).resolve().parents[1] / "src"
+if str(_SRC) not in sys.path:
+    sys.path.insert(0, str(_SRC))
+
+from ccapi.curriculum_lookup import get_curriculum_index
+
 
 # Path to curriculum data
 DATA_DIR = Path(__file__).parent / "data"
@@ -18,81 +26,29 @@ CURRICULUM_PATH = DATA_DIR / "curriculum.md"
 
 
 def _lookup_curriculum_sync(substandard_id: str, curriculum_path: Path) -> dict:
-    """Synchronously lookup curriculum data from markdown file."""
+    """Synchronously lookup curriculum data from the shared curriculum index."""
     if not curriculum_path.exists():
         return {
             "found": False,
             "error": f"Curriculum file not found: {curriculum_path}",
         }
     
-    content = curriculum_path.read_text(encoding="utf-8")
-    
-    # Search for the standard section
-    search_patterns = [
-        f"Standard ID: {substandard_id}",
-        f"## {substandard_id}",
-        f"### {substandard_id}",
-    ]
-    
-    found_pos = -1
-    for pattern in search_patterns:
-        pos = content.find(pattern)
-        if pos >= 0:
-            found_pos = pos
-            break
-    
-    if found_pos < 0:
+    record = get_curriculum_index(curriculum_path).get(substandard_id)
+    if record is None:
         return {
             "found": False,
             "error": f"Standard {substandard_id} not found in curriculum",
         }
     
-    # Extract section (until next ## or end)
-    section_end = content.find("\n## ", found_pos + 1)
-    if section_end < 0:
-        section_end = len(content)
-    section = content[found_pos:section_end]
-    
-    # Extract assessment boundaries
-    boundaries = None
-    boundaries_start = section.find("Assessment Boundaries:")
-    if boundaries_start >= 0:
-        boundaries_end = section.find("\n\n", boundaries_start)
-        if boundaries_end < 0:
-            boundaries_end = len(section)
-        boundaries = section[boundaries_start + len("Assessment Boundaries:"):boundaries_end].strip()
-        if boundaries == "*None specified*" or not boundaries:
-            boundaries = None
-    
-    # Extract misconceptions
-    misconceptions = []
-    misconceptions_start = section.find("Common Misconceptions:")
-    if misconceptions_start >= 0:
-        misconceptions_end = section.find("\n\n", misconceptions_start)
-        if misconceptions_end < 0:
-            misconceptions_end = len(section)
-        misconceptions_text = section[misconceptions_start + len("Common Misconceptions:"):misconceptions_end]
-        for line in misconceptions_text.strip().split("\n"):
-            line = line.strip()
-            if line.startswith("- ") or line.startswith("* "):
-                misconceptions.append(line[2:].strip())
-    
-    # Extract description
-    description = None
-    desc_start = section.find("Description:")
-    if desc_start >= 0:
-        desc_end = section.find("\n\n", desc_start)
-        if desc_end < 0:
-            desc_end = section.find("\n", desc_start + 20)
-        if desc_end >= 0:
-            description = section[desc_start + len("Description:"):desc_end].strip()
+    boundaries = record.get("assessment_boundaries")
+    misconceptions = record.get("common_misconceptions") or []
     
     return {
         "found": True,
         "substandard_id": substandard_id,
         "assessment_boundaries": boundaries,
-        "common_misconceptions": misconceptions if misconceptions else None,
-        "standard_description": description,
+        "common_misconceptions": list(misconceptions) if misconceptions else None,
+        "standard_description": record.get("standard_description"),
         "has_boundaries": bool(boundaries),
         "has_misconceptions": bool(misconceptions),
     }
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+File-backed local stand-in for the Anthropic Messages and Message Batches APIs.
+
+Lets the batch backend (and interactive fallback mode) run end to end
+without network access or an API key. Batches are stored as JSON files and
+report "ended" once --batch-latency seconds have passed since creation;
+every request gets a canned MCQ built from the request JSON in its prompt
+(as a tool_use block when the request forces a tool call).
+
+Fault injection (for exercising ccapi.resilience): --fault-rate makes that
+fraction of POST /v1/messages calls fail with one of --fault-status (429
+rate_limit_error, 529 overloaded_error, 5xx api_error; 429/529 carry a
+retry-after header of --retry-after seconds), and --outage makes every call
+return 529 for the first N seconds after startup (trips circuit breakers).
+
+Usage:
+  python scripts/anthropic_standin.py [--port 8765] [--data-dir outputs/standin] [--batch-latency 5]
+  python scripts/anthropic_standin.py --fault-rate 0.3 --fault-status 429,529,500 --retry-after 1
+  python scripts/anthropic_standin.py --outage 20
+
+  Then, in another shell:
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=standin \\
+      python scripts/generate_batch.py --backend batch --limit 20 --poll-interval 2
+
+Endpoints:
+  POST /v1/messages
+  POST /v1/messages/batches
+  GET  /v1/messages/batches/{id}
+  GET  /v1/messages/batches/{id}/results   (JSONL)
+  POST /v1/messages/batches/{id}/cancel
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_BATCH_PATH = re.compile(r"^/v1/messages/batches/(?P<id>[A-Za-z0-9_]+)(?P<rest>/results|/cancel)?$")
+
+
+def _iso(ts: float | None) -> str | None:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _request_from_prompt(params: dict) -> dict:
+    """First JSON object in the last user message (the generation request dump)."""
+    messages = params.get("messages") or []
+    content = messages[-1].get("content", "") if messages else ""
+    if isinstance(content, list):
+        content = "".join(b.get("text", "") for b in content if isinstance(b, dict))
+    start = content.find("{")
+    if start < 0:
+        return {}
+    try:
+        value, _ = json.JSONDecoder().raw_decode(content, start)
+    except json.JSONDecodeError:
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def fake_message(params: dict) -> dict:
+    """A Messages API response carrying canned MCQ JSON for the prompt's request."""
+    req = _request_from_prompt(params)
+    sid = (req.get("skills") or {}).get("substandard_id", "standard")
+    difficulty = req.get("difficulty", "medium")
+    try:
+        quantity = max(1, int(req.get("quantity") or 1))
+    except (TypeError, ValueError):
+        quantity = 1
+    prefix = re.sub(r"[^a-z0-9]+", "_", sid.lower()).strip("_") or "item"
+
+    items = [
+        {
+            "id": f"{prefix}_mcq_{difficulty}_{n:03d}",
+            "content": {
+                "answer": "B",
+                "question": f"[stand-in] Which choice best shows {sid} ({difficulty}, #{n})?",
+                "image_url": [],
+                "answer_options": [
+                    {"key": "A", "text": "Option A"},
+                    {"key": "B", "text": "Option B"},
+                    {"key": "C", "text": "Option C"},
+                    {"key": "D", "text": "Option D"},
+                ],
+                "additional_details": sid,
+                "answer_explanation": "Stand-in response; B is correct by construction.",
+            },
+        }
+        for n in range(1, quantity + 1)
+    ]
+    body = items[0] if quantity == 1 else {"items": items}
+    text = json.dumps(body, indent=2)
+    choice = params.get("tool_choice") or {}
+    if choice.get("type") == "tool":
+        # Forced tool call (structured output mode): the item is the tool input
+        content = [{"type": "tool_use", "id": f"toolu_standin_{uuid.uuid4().hex[:20]}", "name": choice.get("name"), "input": body}]
+        stop_reason = "tool_use"
+    else:
+        content = [{"type": "text", "text": text}]
+        stop_reason = "end_turn"
+    return {
+        "id": f"msg_standin_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get("model", "standin"),
+        "content": content,
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": len(json.dumps(params)) // 4,
+            "output_tokens": len(text) // 4,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        },
+    }
+
+
+_FAULT_ERROR_TYPES = {429: "rate_limit_error", 529: "overloaded_error"}
+
+
+class FaultInjector:
+    """Decides which Messages calls fail, and how (random faults and a startup outage)."""
+
+    def __init__(self, rate: float, statuses: list[int], retry_after: float, outage: float, seed: int | None) -> None:
+        self.rate = rate
+        self.statuses = statuses or [529]
+        self.retry_after = retry_after
+        self.outage_until = time.monotonic() + outage
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.injected = 0
+
+    def fault(self) -> tuple[int, dict, dict[str, str]] | None:
+        """(status, error body, headers) for a call that should fail, else None."""
+        with self._lock:
+            if time.monotonic() < self.outage_until:
+                status = 529
+            elif self.rate and self._rng.random() < self.rate:
+                status = self._rng.choice(self.statuses)
+            else:
+                return None
+            self.injected += 1
+        error_type = _FAULT_ERROR_TYPES.get(status, "api_error")
+        body = {"type": "error", "error": {"type": error_type, "message": f"stand-in injected {status}"}}
+        headers = {"retry-after": f"{self.retry_after:g}"} if status in _FAULT_ERROR_TYPES and self.retry_after else {}
+        return status, body, headers
+
+
+class BatchStore:
+    """Batches as <data_dir>/<id>.json; status is derived from creation time."""
+
+    def __init__(self, data_dir: Path, latency: float, error_every: int) -> None:
+        self.data_dir = data_dir
+        self.latency = latency
+        self.error_every = error_every
+        self._lock = threading.Lock()
+        data_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, batch_id: str) -> Path:
+        return self.data_dir / f"{batch_id}.json"
+
+    def create(self, requests: list[dict]) -> dict:
+        record = {
+            "id": f"msgbatch_standin_{uuid.uuid4().hex[:20]}",
+            "created": time.time(),
+            "canceled": None,
+            "requests": requests,
+        }
+        with self._lock:
+            self._path(record["id"]).write_text(json.dumps(record), encoding="utf-8")
+        return record
+
+    def get(self, batch_id: str) -> dict | None:
+        try:
+            return json.loads(self._path(batch_id).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def cancel(self, batch_id: str) -> dict | None:
+        with self._lock:
+            record = self.get(batch_id)
+            if record is not None and record["canceled"] is None:
+                record["canceled"] = time.time()
+                self._path(batch_id).write_text(json.dumps(record), encoding="utf-8")
+        return record
+
+    def ended_at(self, record: dict) -> float | None:
+        if record["canceled"] is not None:
+            return record["canceled"]
+        done = record["created"] + self.latency
+        return done if time.time() >= done else None
+
+    def result_lines(self, record: dict) -> list[dict]:
+        lines = []
+        for n, entry in enumerate(record["requests"], start=1):
+            if record["canceled"] is not None:
+                result = {"type": "canceled"}
+            elif self.error_every and n % self.error_every == 0:
+                result = {
+                    "type": "errored",
+                    "error": {"type": "error", "error": {"type": "invalid_request_error", "message": "stand-in injected error"}},
+                }
+            else:
+                result = {"type": "succeeded", "message": fake_message(entry.get("params") or {})}
+            lines.append({"custom_id": entry.get("custom_id"), "result": result})
+        return lines
+
+    def to_api(self, record: dict, base_url: str) -> dict:
+        ended = self.ended_at(record)
+        n = len(record["requests"])
+        if ended is None:
+            counts = {"processing": n, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        else:
+            types = [line["result"]["type"] for line in self.result_lines(record)]
+            counts = {"processing": 0, **{t: types.count(t) for t in ("succeeded", "errored", "canceled", "expired")}}
+        return {
+            "id": record["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended is not None else "in_progress",
+            "request_counts": counts,
+            "created_at": _iso(record["created"]),
+            "expires_at": _iso(record["created"] + timedelta(days=1).total_seconds()),
+            "ended_at": _iso(ended),
+            "cancel_initiated_at": _iso(record["canceled"]),
+            "archived_at": None,
+            "results_url": f"{base_url}/v1/messages/batches/{record['id']}/results" if ended is not None else None,
+        }
+
+
+def make_handler(store: BatchStore, faults: FaultInjector | None = None) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _base_url(self) -> str:
+            return f"http://{self.headers.get('Host') or '%s:%d' % self.server.server_address[:2]}"
+
+        def _send(
+            self,
+            status: int,
+            body: bytes,
+            content_type: str = "application/json",
+            headers: dict[str, str] | None = None,
+        ) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("request-id", f"req_standin_{uuid.uuid4().hex[:16]}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, data: dict) -> None:
+            self._send(status, json.dumps(data).encode("utf-8"))
+
+        def _not_found(self) -> None:
+            self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": f"Not found: {self.path}"}})
+
+        def _read_body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_POST(self) -> None:  # noqa: N802
+            path = self.path.split("?", 1)[0]
+            if path == "/v1/messages":
+                params = self._read_body()
+                fault = faults.fault() if faults is not None else None
+                if fault is not None:
+                    status, body, headers = fault
+                    self._send(status, json.dumps(body).encode("utf-8"), headers=headers)
+                else:
+                    self._json(200, fake_message(params))
+                return
+            if path == "/v1/messages/batches":
+                record = store.create(self._read_body().get("requests") or [])
+                self._json(200, store.to_api(record, self._base_url()))
+                return
+            m = _BATCH_PATH.match(path)
+            if m and m.group("rest") == "/cancel":
+                self._read_body()
+                record = store.cancel(m.group("id"))
+                if record is None:
+                    self._not_found()
+                else:
+                    self._json(200, store.to_api(record, self._base_url()))
+                return
+            self._not_found()
+
+        def do_GET(self) -> None:  # noqa: N802
+            m = _BATCH_PATH.match(self.path.split("?", 1)[0])
+            record = store.get(m.group("id")) if m else None
+            if record is None:
+                self._not_found()
+                return
+            if m.group("rest") == "/results":
+                if store.ended_at(record) is None:
+                    self._json(400, {"type": "error", "error": {"type": "invalid_request_error", "message": "Batch has not ended"}})
+                    return
+                body = "".join(json.dumps(line) + "\n" for line in store.result_lines(record))
+                self._send(200, body.encode("utf-8"), "application/binary")
+                return
+            self._json(200, store.to_api(record, self._base_url()))
+
+        def log_message(self, fmt: str, *args) -> None:
+            print(f"[standin] {self.command} {self.path} -> {fmt % args}")
+
+    return Handler
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Local file-backed stand-in for the Messages / Message Batches APIs.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--data-dir", type=Path, default=ROOT / "outputs" / "standin", help="Where batch files are stored")
+    ap.add_argument("--batch-latency", type=float, default=5.0, help="Seconds until a batch reports ended")
+    ap.add_argument("--error-every", type=int, default=0, help="Make every Nth batch request errored (0 = never)")
+    ap.add_argument("--fault-rate", type=float, default=0.0, help="Fraction of /v1/messages calls that fail (0-1)")
+    ap.add_argument("--fault-status", default="429,529,500", help="Comma-separated HTTP statuses injected faults pick from")
+    ap.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds sent with injected 429/529 (0 = none)")
+    ap.add_argument("--outage", type=float, default=0.0, help="Every /v1/messages call returns 529 for this many seconds after startup")
+    ap.add_argument("--fault-seed", type=int, default=None, help="Seed for reproducible fault patterns")
+    args = ap.parse_args()
+
+    store = BatchStore(args.data_dir, args.batch_latency, args.error_every)
+    faults = FaultInjector(
+        args.fault_rate,
+        [int(s) for s in args.fault_status.split(",") if s.strip()],
+        args.retry_after,
+        args.outage,
+        args.fault_seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, faults))
+    print(f"Anthropic stand-in listening on http://{args.host}:{args.port} (data: {args.data_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
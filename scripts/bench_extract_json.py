@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: ccapi.json_extract.extract_json vs the old three-pass extractor.
+
+Builds synthetic agent transcripts (tool-result JSON blobs, prose with stray
+braces, a final MCQ whose option text contains "}") at several sizes and
+times both extractors on each. A row is "ok" when the extracted text parses
+and is the final MCQ (or, for transcripts without one, is not mistaken for
+it). The "none" rows show the old backtracking regex going quadratic; keep
+sizes modest or the legacy column takes minutes.
+
+Usage:
+  python scripts/bench_extract_json.py [--sizes 10000,100000,300000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(ROOT / "src"))
+
+from ccapi.json_extract import extract_json
+
+FINAL_ID = "rl_3_1_mcq_medium_001"
+
+
+def legacy_extract_json(text: str) -> str:
+    """The fence-regex / backtracking-regex / brace-walk extractor extract_json replaced."""
+    text = text.strip()
+    if not text:
+        return ""
+    fence_match = re.search(r"```(?:json)?\s*(\{)", text, re.MULTILINE)
+    if fence_match:
+        start_pos = fence_match.end(1) - 1
+        depth = 0
+        for i in range(start_pos, len(text)):
+            if text[i] == "{":
+                depth += 1
+            elif text[i] == "}":
+                depth -= 1
+                if depth == 0:
+                    candidate = text[start_pos:i + 1].strip()
+                    if '"id"' in candidate and '"content"' in candidate:
+                        return candidate
+                    break
+    pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*"id"[\s\S]*?"content"[\s\S]*?\}'
+    m = re.search(pattern, text)
+    if m:
+        candidate = m.group(0)
+        if candidate.count("{") == candidate.count("}"):
+            return candidate
+    start = text.find("{")
+    if start < 0:
+        return text
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "{":
+            depth += 1
+        elif text[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start : i + 1]
+    return text
+
+
+def _final_item(fenced: bool) -> str:
+    item = {
+        "id": FINAL_ID,
+        "content": {
+            "answer": "C",
+            "question": "Which detail shows how Mia feels? (Hint: look for the word in {braces})",
+            "image_url": [],
+            "answer_options": [
+                {"key": "A", "text": "She runs home }"},
+                {"key": "B", "text": "She says \"{wow}\""},
+                {"key": "C", "text": "She smiles at the note"},
+                {"key": "D", "text": "She closes the door"},
+            ],
+            "additional_details": "CCSS.ELA-LITERACY.RL.3.1",
+            "answer_explanation": "C shows her feeling; A and B are actions }{.",
+        },
+    }
+    body = json.dumps(item, indent=2)
+    return f"Here is the question:\n```json\n{body}\n```\n" if fenced else f"Final answer:\n{body}\n"
+
+
+def _filler(rng: random.Random) -> str:
+    kind = rng.randrange(4)
+    if kind == 0:
+        record = {
+            "success": True,
+            "substandard_id": "CCSS.ELA-LITERACY.RL.3.1",
+            "id": rng.randrange(10**6),
+            "assessment_boundaries": "Ask and answer questions {literal} only } not inference",
+            "common_misconceptions": [f"misconception {n} with a stray {{ brace" for n in range(3)],
+        }
+        return f"Tool result: {json.dumps(record)}\n"
+    if kind == 1:
+        return "Thinking about the {standard} and what {students} need to do at this level.\n"
+    if kind == 2:
+        return 'Draft: {"id": "draft", "notes": "not the final item", "score": 3}\n'
+    return "The item should avoid {ambiguous} distractors; I'll check the boundaries again.\n"
+
+
+def make_transcript(size: int, *, final: str, seed: int = 0) -> str:
+    """final: "fenced" / "plain" MCQ at the end, or "none" (e.g. a failed run)."""
+    rng = random.Random(seed)
+    parts: list[str] = []
+    total = 0
+    while total < size:
+        chunk = _filler(rng)
+        parts.append(chunk)
+        total += len(chunk)
+    if final != "none":
+        parts.append(_final_item(final == "fenced"))
+    return "".join(parts)
+
+
+def _ok(extracted: str, final: str) -> bool:
+    if final == "none":
+        return FINAL_ID not in extracted
+    try:
+        return json.loads(extracted).get("id") == FINAL_ID
+    except (json.JSONDecodeError, AttributeError):
+        return False
+
+
+def _time(fn, text: str, repeat: int) -> tuple[float, str]:
+    best = float("inf")
+    out = ""
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark JSON extraction on synthetic transcripts.")
+    ap.add_argument("--sizes", default="10000,100000,300000", help="Comma-separated transcript sizes in characters")
+    ap.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is reported)")
+    args = ap.parse_args()
+
+    new = lambda text: extract_json(text, require=("id", "content"))  # noqa: E731
+    print(f"{'size':>9} {'final':>6} {'legacy ms':>10} {'ok':>3} {'new ms':>8} {'ok':>3} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        for final in ("fenced", "plain", "none"):
+            text = make_transcript(size, final=final)
+            t_old, out_old = _time(legacy_extract_json, text, args.repeat)
+            t_new, out_new = _time(new, text, args.repeat)
+            print(
+                f"{len(text):>9} {final:>6} {t_old * 1e3:>10.2f} {'y' if _ok(out_old, final) else 'n':>3} "
+                f"{t_new * 1e3:>8.2f} {'y' if _ok(out_new, final) else 'n':>3} {t_old / t_new:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
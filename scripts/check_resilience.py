@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Exercise the retry / circuit-breaker layer against the fault-injecting stand-in.
+
+Starts scripts/anthropic_standin.py in-process on a free port with the
+given fault settings, points the Anthropic client at it and runs --requests
+concurrent generate_one calls (fallback mode). Prints how many rows
+succeeded, the injected fault count and per-pipeline retry / breaker stats.
+Exits 1 if any row was lost.
+
+--breaker-cases instead runs the circuit breaker's half-open edge cases on
+a fake clock (no stand-in, no API): a probe answered with 429, a cancelled
+probe and a probe that never reports back must not leave the circuit stuck
+half-open. Exits 1 if any case fails.
+
+Usage:
+  python scripts/check_resilience.py [--requests 50] [--concurrency 10] [--fault-rate 0.3]
+  python scripts/check_resilience.py --outage 5 --circuit-wait 60     # breaker opens, then recovers
+  python scripts/check_resilience.py --breaker-cases
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(ROOT / "src"))
+
+from anthropic_standin import BatchStore, FaultInjector, make_handler
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _breaker_cases() -> list[str]:
+    """Half-open edge cases on a fake clock; returns the failures."""
+    from ccapi.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retry, configure_resilience
+
+    now = [0.0]
+    failures: list[str] = []
+
+    def opened(name: str) -> CircuitBreaker:
+        breaker = CircuitBreaker(name, failure_threshold=1, reset_timeout=30.0, clock=lambda: now[0])
+        configure_resilience(name, policy=RetryPolicy(base_delay=0.01, max_delay=0.01), breaker=breaker)
+        breaker.record_failure()
+        now[0] += 31.0
+        return breaker
+
+    def check(case: str, ok: bool, breaker: CircuitBreaker) -> None:
+        print(f"  {'ok  ' if ok else 'FAIL'} {case}: {breaker.snapshot()}")
+        if not ok:
+            failures.append(case)
+
+    async def answered(name: str) -> bool:
+        try:
+            return await call_with_retry(name, _ok)
+        except CircuitOpenError:
+            return False
+
+    async def _ok() -> bool:
+        return True
+
+    async def run() -> None:
+        # 1. The probe gets a 429, then its retry succeeds
+        breaker = opened("probe_429")
+        calls = [0]
+
+        async def limited_once() -> bool:
+            calls[0] += 1
+            if calls[0] == 1:
+                raise _StatusError(429)
+            return True
+
+        try:
+            result = await call_with_retry("probe_429", limited_once)
+        except CircuitOpenError:
+            result = False
+        check("429 on the probe closes the circuit", result and breaker.state == "closed", breaker)
+
+        # 2. The probe is cancelled (client disconnect / tool timeout)
+        breaker = opened("probe_cancelled")
+        task = asyncio.create_task(call_with_retry("probe_cancelled", asyncio.sleep, 3600))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        check(
+            "cancelled probe reopens, next call probes",
+            breaker.state == "open" and await answered("probe_cancelled") and breaker.state == "closed",
+            breaker,
+        )
+
+        # 3. The probe never reports back: half-open expires after reset_timeout
+        breaker = opened("probe_stale")
+        breaker.before_call()
+        blocked = not await answered("probe_stale")
+        now[0] += 31.0
+        check(
+            "stale half-open lets a new probe through",
+            blocked and await answered("probe_stale") and breaker.state == "closed",
+            breaker,
+        )
+
+    asyncio.run(run())
+    return failures
+
+
+def _request(n: int) -> dict:
+    return {
+        "type": "mcq",
+        "grade": "3",
+        "skills": {"substandard_id": f"CCSS.ELA-LITERACY.RL.3.{n % 10 + 1}"},
+        "subject": "ela",
+        "curriculum": "common core",
+        "difficulty": ("easy", "medium", "hard")[n % 3],
+    }
+
+
+async def _run(n_requests: int, concurrency: int, circuit_wait: float) -> list[dict]:
+    from ccapi.anthropic_client import run_with_client
+    from ccapi.pipeline import generate_one
+    from ccapi.resilience import RetryPolicy, configure_resilience
+
+    configure_resilience(policy=RetryPolicy(base_delay=0.2, max_delay=2.0, circuit_wait=circuit_wait))
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(n: int) -> dict:
+        async with sem:
+            return await generate_one(_request(n), skill_id="", stream=False, output_mode="text")
+
+    async def run_all() -> list[dict]:
+        return await asyncio.gather(*(one(n) for n in range(n_requests)))
+
+    return await run_with_client(run_all())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run generate_one through a fault-injecting stand-in.")
+    ap.add_argument("--requests", type=int, default=50)
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--fault-rate", type=float, default=0.3)
+    ap.add_argument("--fault-status", default="429,529,500")
+    ap.add_argument("--retry-after", type=float, default=0.5)
+    ap.add_argument("--outage", type=float, default=0.0)
+    ap.add_argument("--circuit-wait", type=float, default=60.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--breaker-cases", action="store_true", help="Run the half-open edge cases on a fake clock and exit")
+    args = ap.parse_args()
+
+    if args.breaker_cases:
+        sys.exit(1 if _breaker_cases() else 0)
+
+    faults = FaultInjector(
+        args.fault_rate,
+        [int(s) for s in args.fault_status.split(",") if s.strip()],
+        args.retry_after,
+        args.outage,
+        args.seed,
+    )
+    store = BatchStore(Path(tempfile.mkdtemp(prefix="standin_")), 0.0, 0)
+    handler = make_handler(store, faults)
+    handler.log_message = lambda *a, **k: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("ANTHROPIC_API_KEY", "standin")
+
+    from ccapi import config
+    from ccapi.gen_cache import configure_generation_cache
+    from ccapi.resilience import resilience_stats
+
+    config.ANTHROPIC_API_KEY = config.ANTHROPIC_API_KEY or "standin"
+    configure_generation_cache("off")
+    t0 = time.perf_counter()
+    try:
+        results = asyncio.run(_run(args.requests, args.concurrency, args.circuit_wait))
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - t0
+
+    ok = sum(1 for r in results if r.get("success"))
+    print(f"{ok}/{len(results)} rows generated in {elapsed:.1f}s ({faults.injected} faults injected)")
+    for name, stats in resilience_stats().items():
+        print(f"  {name}: {stats}")
+    for r in results:
+        if not r.get("success"):
+            print(f"  lost: {r.get('error')}")
+    sys.exit(0 if ok == len(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
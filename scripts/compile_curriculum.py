@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Compile curriculum.md into its JSONL sidecar index (compile-curriculum).
+
+The sidecar (curriculum.md.index.jsonl) holds one pre-parsed record per
+standard plus byte offsets into the markdown. Pipelines load it through
+ccapi.curriculum_store.load_curriculum, which rebuilds it automatically when
+the source hash changes; run this before a deploy so containers start with a
+fresh sidecar instead of parsing markdown on cold start.
+
+Usage:
+  python scripts/compile_curriculum.py                     # all known curriculum.md files
+  python scripts/compile_curriculum.py path/to/curriculum.md
+  python scripts/compile_curriculum.py --check             # exit 1 if any sidecar is stale
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(ROOT / "src"))
+
+from ccapi.curriculum_store import main as compile_main
+
+DEFAULT_CURRICULA = [
+    ROOT / "option_c_agent_sdk" / "data" / "curriculum.md",
+    ROOT / "data" / "curriculum.md",
+    ROOT / "agent_sdk" / "data" / "curriculum.md",
+    ROOT / "agent_sdk" / ".claude" / "skills" / "ela-question-generation" / "references" / "curriculum.md",
+    ROOT / "agent_sdk_v2" / ".claude" / "skills" / "ela-question-generation" / "reference" / "curriculum.md",
+]
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    if not [a for a in argv if not a.startswith("-")]:
+        argv += [str(p) for p in DEFAULT_CURRICULA if p.exists()]
+    return compile_main(argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -11,8 +11,13 @@ Usage:
   Benchmark: grade-3-ela-benchmark.jsonl; default from CCAPI_BENCHMARK_PATH or
   ../edullm-ela-experiment/grade-3-ela-benchmark.jsonl.
   
-  --use-curriculum: Use curriculum context (looks up and populates curriculum.md data)
+  --use-curriculum: Use curriculum context (looks up and populates curriculum.md data).
+                    Missing entries for the whole benchmark are populated up front,
+                    --populate-batch-size standards per LLM call.
   --evaluate/--evaluation: Run InceptBench evaluation per item (no API key required)
+  --backend batch: submit all rows as one Message Batches job and poll for it
+                   (resumable via --batch-state / --batch-id; see scripts/anthropic_standin.py
+                   for an offline stand-in server)
 """
 
 from __future__ import annotations
@@ -36,10 +41,19 @@ try:
 except ImportError:
     pass
 
+from ccapi.anthropic_client import run_with_client
+from ccapi.batch_backend import run_message_batch
 from ccapi.config import CCAPI_BENCHMARK_PATH
-from ccapi.formatters import benchmark_row_to_request
+from ccapi.formatters import benchmark_row_to_request, request_quantity
+from ccapi.gen_cache import CACHE_MODES, configure_generation_cache
+from ccapi.ladder import generate_ladder, ladder_groups
 from ccapi.pipeline import generate_one
 from ccapi.pipeline_with_curriculum import generate_one_with_curriculum
+from ccapi.populate_curriculum import populate_curriculum_batch
+from ccapi.rate_limit import default_concurrency, get_rate_limiter
+from ccapi.resilience import RetryPolicy, configure_resilience, resilience_stats
+from ccapi.router import get_router, pass_rates_by_tier
+from ccapi.usage import USAGE
 # evaluate_item imported lazily only when --evaluate is used
 
 
@@ -49,7 +63,7 @@ def _default_benchmark() -> Path:
     return ROOT.parent / "edullm-ela-experiment" / "grade-3-ela-benchmark.jsonl"
 
 
-def load_mcq_requests(benchmark_path: Path, limit: int | None) -> list[dict]:
+def load_mcq_requests(benchmark_path: Path, limit: int | None, quantity: int | None = None) -> list[dict]:
     out = []
     with open(benchmark_path, "r", encoding="utf-8") as f:
         for line in f:
@@ -59,7 +73,11 @@ def load_mcq_requests(benchmark_path: Path, limit: int | None) -> list[dict]:
             d = json.loads(line)
             if d.get("type") != "mcq":
                 continue
-            out.append(benchmark_row_to_request(d))
+            req = benchmark_row_to_request(d)
+            if quantity is not None:
+                # Override the row's "quantity": N distinct MCQs per model call
+                req["quantity"] = request_quantity({"quantity": quantity})
+            out.append(req)
             if limit is not None and len(out) >= limit:
                 break
     return out
@@ -71,12 +89,45 @@ async def run(
     limit: int | None,
     do_evaluate: bool,
     use_curriculum: bool,
+    populate_batch_size: int = 8,
+    quantity: int | None = None,
+    ladder: bool = False,
+    backend: str = "interactive",
+    batch_id: str | None = None,
+    batch_state: Path | None = None,
+    poll_interval: float = 30.0,
+    cache: str | None = None,
+    circuit_wait: float = 600.0,
+    concurrency: int = 1,
 ) -> None:
-    requests = load_mcq_requests(benchmark_path, limit)
+    requests = load_mcq_requests(benchmark_path, limit, quantity)
     if not requests:
         print("No MCQ rows in benchmark.", file=sys.stderr)
         sys.exit(1)
-    print(f"Generating {len(requests)} MCQs from {benchmark_path}")
+    n_questions = sum(request_quantity(r) for r in requests)
+    print(f"Generating {n_questions} MCQs ({len(requests)} requests) from {benchmark_path}")
+    gen_cache = configure_generation_cache(cache)
+    if gen_cache is not None:
+        print(f"Generation cache: {gen_cache.mode} ({gen_cache.root})")
+    # A batch run rides out an upstream outage instead of failing every in-flight row
+    configure_resilience(policy=RetryPolicy(circuit_wait=circuit_wait))
+    # Learn the hard standards before this run's eval_results.csv replaces the history
+    router = get_router()
+    if router.enabled:
+        print(f"Model cascade: {router.fast_model} -> {router.full_model} ({len(router.hard_standards)} hard standards)")
+
+    if use_curriculum:
+        # Fill missing curriculum entries in a few multi-standard calls instead
+        # of one call per standard during generation
+        sids = [r.get("skills", {}).get("substandard_id", "") for r in requests]
+        populated = await populate_curriculum_batch(
+            [s for s in sids if s],
+            ROOT / "data" / "curriculum.md",
+            batch_size=populate_batch_size,
+        )
+        n_updated = sum(1 for r in populated.values() if r.get("updated"))
+        if n_updated:
+            print(f"Populated curriculum for {n_updated} standards")
 
     all_items = []
     errors = []
@@ -107,19 +158,59 @@ async def run(
         csv_writer = csv.DictWriter(
             csv_file,
             fieldnames=["id", "substandard_id", "difficulty", "question", "gen_error", 
-                       "overall_score", "overall_score_100", "rating", "eval_error"],
+                       "overall_score", "overall_score_100", "rating", "eval_error", "model_tier"],
             extrasaction="ignore"
         )
         csv_writer.writeheader()
 
+    # Interactive rows run up to `concurrency` at a time, paced by the shared
+    # rate limiter (CCAPI_RATE_*); the loop below still consumes them in order
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(fn, *args, **kwargs):
+        async with sem:
+            return await fn(*args, **kwargs)
+
+    # row index -> (task, position in the task's result list or None)
+    row_tasks: dict[int, tuple[asyncio.Task, int | None]] = {}
+    # Batch backend: every row goes out in one Message Batches job up front
+    batch_results: list[dict] = []
+    if backend == "batch":
+        state = batch_state or output_path.with_suffix(".batch_state.json")
+        print(f"Message batch backend (state: {state})")
+        batch_results = await run_message_batch(
+            requests,
+            state_path=state,
+            batch_id=batch_id,
+            use_curriculum=use_curriculum,
+            poll_interval=poll_interval,
+        )
+    elif ladder:
+        # Difficulty ladder: one call per standard covers its easy/medium/hard rows
+        groups = ladder_groups(requests)
+        print(f"Difficulty ladder: {len(requests)} requests in {len(groups)} calls")
+        for group in groups:
+            task = asyncio.ensure_future(
+                bounded(generate_ladder, [requests[j] for j in group], use_curriculum=use_curriculum)
+            )
+            row_tasks.update({j: (task, pos) for pos, j in enumerate(group)})
+    else:
+        generate = generate_one_with_curriculum if use_curriculum else generate_one
+        row_tasks = {i: (asyncio.ensure_future(bounded(generate, req)), None) for i, req in enumerate(requests)}
+    if row_tasks and concurrency > 1:
+        print(f"Concurrency: {concurrency}")
+
     for i, req in enumerate(requests):
         sid = req.get("skills", {}).get("substandard_id", "?")
         diff = req.get("difficulty", "?")
         print(f"  [{i+1}/{len(requests)}] {sid} ({diff})")
-        if use_curriculum:
-            res = await generate_one_with_curriculum(req)
+        if batch_results:
+            res = batch_results[i]
         else:
-            res = await generate_one(req)
+            task, pos = row_tasks.pop(i)
+            res = await task
+            if pos is not None:
+                res = res[pos]
         if generation_mode is None:
             generation_mode = res.get("generation_mode")
         if not res.get("success"):
@@ -135,6 +226,7 @@ async def run(
                     "overall_score_100": "",
                     "rating": "",
                     "eval_error": "not_evaluated",
+                    "model_tier": res.get("model_tier", ""),
                 }
                 csv_writer.writerow(row)
                 csv_rows.append(row)
@@ -152,6 +244,7 @@ async def run(
                     "overall_score_100": "",
                     "rating": "",
                     "eval_error": "not_evaluated",
+                    "model_tier": res.get("model_tier", ""),
                 }
                 csv_writer.writerow(row)
                 csv_rows.append(row)
@@ -182,6 +275,7 @@ async def run(
                             "overall_score_100": "",
                             "rating": "",
                             "eval_error": "inceptbench_failed",
+                            "model_tier": res.get("model_tier", ""),
                         }
                     else:
                         overall = ev.get("overall") or {}
@@ -202,6 +296,7 @@ async def run(
                             "overall_score_100": overall_score_100 if overall_score_100 is not None else "",
                             "rating": rating,
                             "eval_error": "",
+                            "model_tier": res.get("model_tier", ""),
                         }
                     csv_writer.writerow(row)
                     csv_rows.append(row)
@@ -210,6 +305,7 @@ async def run(
     if csv_file:
         csv_file.close()
 
+    limiter = get_rate_limiter()
     payload = {
         "benchmark": str(benchmark_path),
         "limit": limit,
@@ -217,12 +313,38 @@ async def run(
         "total_generated": len(all_items),
         "generation_mode": generation_mode or "unknown",
         "errors": errors,
+        "usage": USAGE.snapshot(),
+        "generation_cache": gen_cache.stats() if gen_cache is not None else None,
+        "resilience": resilience_stats(),
+        "rate_limit": limiter.stats() if limiter is not None else None,
+        "router": router.stats() if router.enabled else None,
         "generated_content": all_items,
     }
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
     print(f"Wrote {output_path} ({len(all_items)} items, {len(errors)} errors)")
+    usage = payload["usage"]
+    print(
+        f"Prompt cache: {usage['cache_hits']} hits / {usage['cache_misses']} misses "
+        f"({usage['cache_read_input_tokens']} cached input tokens, {usage['input_tokens']} uncached)"
+    )
+    if gen_cache is not None:
+        stats = payload["generation_cache"]
+        print(f"Generation cache: {stats['hits']} hits / {stats['misses']} misses ({stats['entries']} entries on disk)")
+    if payload["rate_limit"] is not None:
+        stats = payload["rate_limit"]
+        print(f"Rate limiter: {stats['calls']} calls, {stats['waited_seconds']}s spent waiting for budget")
+    for name, stats in payload["resilience"].items():
+        if stats["retries"] or stats["opened"]:
+            print(f"API retries ({name}): {stats['retries']} retried, circuit opened {stats['opened']}x, {stats['rejected']} calls held back")
+    if payload["router"] is not None:
+        for tier in ("fast", "full"):
+            stats = payload["router"][tier]
+            print(
+                f"Model {tier} ({router.model(tier)}): {stats['passed']}/{stats['calls']} kept, "
+                f"{stats['escalated']} escalated, p50 {stats['p50_seconds']}s"
+            )
 
     # Write evaluation summary if evaluation was enabled
     if do_evaluate and csv_path:
@@ -242,6 +364,9 @@ async def run(
             "n_failed_generation": n_failed_gen,
             "n_failed_evaluation": n_failed_eval,
             "generation_mode": generation_mode or "unknown",
+            "usage": payload["usage"],
+            "router": payload["router"],
+            "by_model_tier": pass_rates_by_tier(csv_rows) if router.enabled else None,
             "timestamp": datetime.now().isoformat(),
         }
         
@@ -261,7 +386,19 @@ def main() -> None:
     ap.add_argument("--evaluate", action="store_true", help="Run InceptBench evaluation per item")
     ap.add_argument("--evaluation", action="store_true", help="Alias for --evaluate (Run InceptBench evaluation per item)")
     ap.add_argument("--use-curriculum", action="store_true", help="Use curriculum context (lookup and populate curriculum data)")
+    ap.add_argument("--populate-batch-size", type=int, default=8, help="Standards per curriculum population call (with --use-curriculum)")
+    ap.add_argument("--quantity", type=int, default=None, help="Questions per request from one model call (overrides the benchmark's quantity field)")
+    ap.add_argument("--ladder", action="store_true", help="Generate each standard's easy/medium/hard rows in one call (difficulty ladder)")
+    ap.add_argument("--backend", choices=["interactive", "batch"], default="interactive", help="interactive: one call per request; batch: one Message Batches job for all rows")
+    ap.add_argument("--batch-id", default=None, help="Resume this message batch instead of submitting a new one (--backend batch)")
+    ap.add_argument("--batch-state", type=Path, default=None, help="Batch state file for resuming (default: <output>.batch_state.json)")
+    ap.add_argument("--poll-interval", type=float, default=30.0, help="Seconds between batch status polls (--backend batch)")
+    ap.add_argument("--cache", choices=CACHE_MODES, default=None, help="Generation cache: use (reuse unchanged rows), refresh (regenerate and overwrite), off (default: CCAPI_GEN_CACHE)")
+    ap.add_argument("--concurrency", type=int, default=None, help="Requests generated at once (interactive backend; default 4 when CCAPI_RATE_RPM/ITPM/OTPM pace the run, else 1)")
+    ap.add_argument("--circuit-wait", type=float, default=600.0, help="Seconds a call waits for an open circuit (API degraded) before the row fails (0 = fail fast)")
     args = ap.parse_args()
+    if args.backend == "batch" and args.ladder:
+        ap.error("--ladder is not supported with --backend batch")
     
     # --evaluation is alias for --evaluate
     do_evaluate = args.evaluate or args.evaluation
@@ -275,7 +412,23 @@ def main() -> None:
     if out is None:
         out = ROOT / "outputs" / "batch_generated.json"
 
-    asyncio.run(run(bench, out, args.limit, do_evaluate, args.use_curriculum))
+    asyncio.run(run_with_client(run(
+        bench,
+        out,
+        args.limit,
+        do_evaluate,
+        args.use_curriculum,
+        args.populate_batch_size,
+        args.quantity,
+        args.ladder,
+        backend=args.backend,
+        batch_id=args.batch_id,
+        batch_state=args.batch_state,
+        poll_interval=args.poll_interval,
+        cache=args.cache,
+        circuit_wait=args.circuit_wait,
+        concurrency=args.concurrency if args.concurrency is not None else default_concurrency(),
+    )))
 
 
 if __name__ == "__main__":
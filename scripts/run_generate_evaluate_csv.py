@@ -62,9 +62,17 @@ try:
 except ImportError:
     pass
 
+from ccapi.anthropic_client import run_with_client
+from ccapi.batch_backend import run_message_batch
 from ccapi.config import CCAPI_BENCHMARK_PATH
 from ccapi.formatters import benchmark_row_to_request, to_inceptbench_item
+from ccapi.gen_cache import CACHE_MODES, configure_generation_cache
+from ccapi.ladder import generate_ladder, ladder_groups
 from ccapi.pipeline import generate_one
+from ccapi.rate_limit import default_concurrency, get_rate_limiter
+from ccapi.resilience import RetryPolicy, configure_resilience, resilience_stats
+from ccapi.router import get_router, pass_rates_by_tier
+from ccapi.usage import USAGE
 
 
 def _default_benchmark() -> Path:
@@ -235,6 +243,14 @@ async def run(
     csv_path: Path,
     limit: int | None,
     log_file: Path | None = None,
+    ladder: bool = False,
+    backend: str = "interactive",
+    batch_id: str | None = None,
+    batch_state: Path | None = None,
+    poll_interval: float = 30.0,
+    cache: str | None = None,
+    circuit_wait: float = 600.0,
+    concurrency: int = 1,
 ) -> None:
     logger = setup_logging(log_file)
     
@@ -256,9 +272,51 @@ async def run(
         sys.exit(1)
     
     logger.info(f"Loaded {len(requests)} MCQ requests from benchmark")
+    gen_cache = configure_generation_cache(cache)
+    if gen_cache is not None:
+        logger.info(f"Generation cache: {gen_cache.mode} ({gen_cache.root})")
+    # A batch run rides out an upstream outage instead of failing every in-flight row
+    configure_resilience(policy=RetryPolicy(circuit_wait=circuit_wait))
+    # Learn the hard standards before this run's CSV replaces the history
+    router = get_router()
+    if router.enabled:
+        logger.info(f"Model cascade: {router.fast_model} -> {router.full_model} ({len(router.hard_standards)} hard standards)")
+
+    # Interactive rows run up to `concurrency` at a time, paced by the shared
+    # rate limiter (CCAPI_RATE_*); the loop below still consumes them in order
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(fn, *args, **kwargs):
+        async with sem:
+            return await fn(*args, **kwargs)
+
+    # row index -> (task, position in the task's result list or None)
+    row_tasks: dict[int, tuple[asyncio.Task, int | None]] = {}
+    # Batch backend: every row goes out in one Message Batches job up front
+    batch_results: list[dict] = []
+    if backend == "batch":
+        state = batch_state or csv_path.with_suffix(".batch_state.json")
+        logger.info(f"Message batch backend (state: {state})")
+        batch_results = await run_message_batch(
+            requests,
+            state_path=state,
+            batch_id=batch_id,
+            poll_interval=poll_interval,
+        )
+    elif ladder:
+        # Difficulty ladder: one call per standard covers its easy/medium/hard rows
+        groups = ladder_groups(requests)
+        logger.info(f"Difficulty ladder: {len(requests)} requests in {len(groups)} calls")
+        for group in groups:
+            task = asyncio.ensure_future(bounded(generate_ladder, [requests[j] for j in group]))
+            row_tasks.update({j: (task, pos) for pos, j in enumerate(group)})
+    else:
+        row_tasks = {i: (asyncio.ensure_future(bounded(generate_one, req)), None) for i, req in enumerate(requests)}
+    if row_tasks:
+        logger.info(f"Concurrency: {concurrency}")
 
     csv_path.parent.mkdir(parents=True, exist_ok=True)
-    header = ["id", "substandard_id", "difficulty", "question", "gen_error", "overall_score", "overall_score_100", "rating", "eval_error"]
+    header = ["id", "substandard_id", "difficulty", "question", "gen_error", "overall_score", "overall_score_100", "rating", "eval_error", "model_tier"]
     rows: list[dict[str, str | float | None]] = []
     scores_100: list[float] = []
     all_items: list[dict] = []
@@ -275,7 +333,13 @@ async def run(
             logger.info(f"[{i+1}/{len(requests)}] Processing {sid} ({diff})")
 
             logger.debug(f"Request: {json.dumps(req, indent=2)}")
-            res = await generate_one(req)
+            if batch_results:
+                res = batch_results[i]
+            else:
+                task, pos = row_tasks.pop(i)
+                res = await task
+                if pos is not None:
+                    res = res[pos]
             
             if generation_mode is None:
                 generation_mode = res.get("generation_mode")
@@ -294,6 +358,7 @@ async def run(
                     "overall_score_100": "",
                     "rating": "",
                     "eval_error": "not_evaluated",
+                    "model_tier": res.get("model_tier", ""),
                 }
                 w.writerow(row)
                 rows.append(row)
@@ -303,7 +368,7 @@ async def run(
             items = res.get("generatedContent", {}).get("generated_content", [])
             if not items:
                 logger.warning(f"No items generated for {sid} ({diff})")
-                row = {"id": "", "substandard_id": sid, "difficulty": diff, "question": "", "gen_error": "no_item", "overall_score": "", "overall_score_100": "", "rating": "", "eval_error": "not_evaluated"}
+                row = {"id": "", "substandard_id": sid, "difficulty": diff, "question": "", "gen_error": "no_item", "overall_score": "", "overall_score_100": "", "rating": "", "eval_error": "not_evaluated", "model_tier": res.get("model_tier", "")}
                 w.writerow(row)
                 rows.append(row)
                 errors.append({"request": req, "error": "no_item"})
@@ -319,7 +384,8 @@ async def run(
                 logger.debug(f"Evaluating item {item_id}")
                 
                 incept = to_inceptbench_item(it, content_as_string=True)
-                ev = run_inceptbench_cli(incept, verbose=True, logger=logger)
+                # In a thread so in-flight generations keep running while the CLI evaluates
+                ev = await asyncio.to_thread(run_inceptbench_cli, incept, verbose=True, logger=logger)
 
                 if ev is None:
                     logger.warning(f"Evaluation failed for {item_id} ({sid})")
@@ -333,6 +399,7 @@ async def run(
                         "overall_score_100": "",
                         "rating": "",
                         "eval_error": "inceptbench_failed",
+                        "model_tier": res.get("model_tier", ""),
                     }
                     w.writerow(row)
                     rows.append(row)
@@ -354,6 +421,7 @@ async def run(
                         "overall_score_100": ev.get("overall_score_100") if ev.get("overall_score_100") is not None else "",
                         "rating": ev.get("rating") if ev.get("rating") is not None else "",
                         "eval_error": "",
+                        "model_tier": res.get("model_tier", ""),
                     }
                     w.writerow(row)
                     rows.append(row)
@@ -378,6 +446,35 @@ async def run(
     logger.info(f"Aggregate score: {aggregate_score}%")
     logger.info(f"Pass rate (score > 85%): {pass_rate}%")
     logger.info(f"Generation mode: {generation_mode}")
+    usage = USAGE.snapshot()
+    logger.info(
+        f"Prompt cache: {usage['cache_hits']} hits / {usage['cache_misses']} misses "
+        f"({usage['cache_read_input_tokens']} cached input tokens)"
+    )
+    cache_stats = gen_cache.stats() if gen_cache is not None else None
+    if cache_stats:
+        logger.info(
+            f"Generation cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['entries']} entries on disk)"
+        )
+    limiter = get_rate_limiter()
+    rate_stats = limiter.stats() if limiter is not None else None
+    if rate_stats:
+        logger.info(f"Rate limiter: {rate_stats['calls']} calls, {rate_stats['waited_seconds']}s spent waiting for budget")
+    router_stats = router.stats() if router.enabled else None
+    if router_stats:
+        for tier, stats in pass_rates_by_tier(rows).items():
+            logger.info(
+                f"Model {tier}: {stats['n_evaluated']} evaluated, aggregate {stats['aggregate_score']}, "
+                f"pass rate {stats['pass_rate_percent']}%"
+            )
+    retry_stats = resilience_stats()
+    for name, stats in retry_stats.items():
+        if stats["retries"] or stats["opened"]:
+            logger.info(
+                f"API retries ({name}): {stats['retries']} retried, circuit opened {stats['opened']}x, "
+                f"{stats['rejected']} calls held back"
+            )
 
     summary = {
         "n_total": n_total,
@@ -387,6 +484,12 @@ async def run(
         "n_failed_generation": n_failed_gen,
         "n_failed_evaluation": n_failed_eval,
         "generation_mode": generation_mode,
+        "usage": usage,
+        "generation_cache": cache_stats,
+        "resilience": retry_stats,
+        "rate_limit": rate_stats,
+        "router": router_stats,
+        "by_model_tier": pass_rates_by_tier(rows) if router_stats else None,
         "timestamp": datetime.now().isoformat(),
     }
     summary_path = csv_path.with_name(csv_path.stem + "_summary.json")
@@ -418,7 +521,17 @@ def main() -> None:
     ap.add_argument("--limit", type=int, default=None, help="Max MCQs")
     ap.add_argument("--output", "-o", type=Path, default=None, help="Output CSV (default: outputs/eval_results.csv)")
     ap.add_argument("--log", type=Path, default=None, help="Log file (default: outputs/generate_evaluate.log)")
+    ap.add_argument("--ladder", action="store_true", help="Generate each standard's easy/medium/hard rows in one call (difficulty ladder)")
+    ap.add_argument("--backend", choices=["interactive", "batch"], default="interactive", help="interactive: one call per request; batch: one Message Batches job for all rows")
+    ap.add_argument("--batch-id", default=None, help="Resume this message batch instead of submitting a new one (--backend batch)")
+    ap.add_argument("--batch-state", type=Path, default=None, help="Batch state file for resuming (default: <output>.batch_state.json)")
+    ap.add_argument("--poll-interval", type=float, default=30.0, help="Seconds between batch status polls (--backend batch)")
+    ap.add_argument("--cache", choices=CACHE_MODES, default=None, help="Generation cache: use (reuse unchanged rows), refresh (regenerate and overwrite), off (default: CCAPI_GEN_CACHE)")
+    ap.add_argument("--concurrency", type=int, default=None, help="Requests generated at once (interactive backend; default 4 when CCAPI_RATE_RPM/ITPM/OTPM pace the run, else 1)")
+    ap.add_argument("--circuit-wait", type=float, default=600.0, help="Seconds a call waits for an open circuit (API degraded) before the row fails (0 = fail fast)")
     args = ap.parse_args()
+    if args.backend == "batch" and args.ladder:
+        ap.error("--ladder is not supported with --backend batch")
 
     bench = args.benchmark or _default_benchmark()
     if not bench.exists():
@@ -430,7 +543,20 @@ def main() -> None:
     
     print(f"Generating + evaluating (inceptbench CLI) from {bench}, limit={args.limit}")
     print(f"Log file: {log_file}")
-    asyncio.run(run(bench, out, args.limit, log_file))
+    asyncio.run(run_with_client(run(
+        bench,
+        out,
+        args.limit,
+        log_file,
+        args.ladder,
+        backend=args.backend,
+        batch_id=args.batch_id,
+        batch_state=args.batch_state,
+        poll_interval=args.poll_interval,
+        cache=args.cache,
+        circuit_wait=args.circuit_wait,
+        concurrency=args.concurrency if args.concurrency is not None else default_concurrency(),
+    )))
 
 
 if __name__ == "__main__":
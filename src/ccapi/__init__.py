@@ -2,13 +2,25 @@
 
 from .pipeline import generate_one
 from .pipeline_with_curriculum import generate_one_with_curriculum
-from .curriculum_lookup import lookup_curriculum
-from .populate_curriculum import populate_curriculum_entry, update_curriculum_file
+from .ladder import generate_ladder, ladder_groups
+from .batch_backend import run_message_batch
+from .curriculum_lookup import CurriculumIndex, get_curriculum_index, lookup_curriculum
+from .populate_curriculum import (
+    populate_curriculum_batch,
+    populate_curriculum_entry,
+    update_curriculum_file,
+)
 
 __all__ = [
     "generate_one",
     "generate_one_with_curriculum",
+    "generate_ladder",
+    "ladder_groups",
+    "run_message_batch",
     "lookup_curriculum",
+    "CurriculumIndex",
+    "get_curriculum_index",
     "populate_curriculum_entry",
+    "populate_curriculum_batch",
     "update_curriculum_file",
 ]
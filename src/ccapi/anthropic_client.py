@@ -0,0 +1,114 @@
+"""
+Process-wide AsyncAnthropic client with a pooled, keep-alive HTTP connection.
+
+Creating a client per call throws away its connection pool and redoes the
+TLS handshake every time. get_async_client() hands out one shared client
+per (API key, event loop): httpx pools are bound to the loop they were
+created on, so a script that calls asyncio.run() repeatedly transparently
+gets a fresh client for each loop.
+
+Pool tuning (env):
+  ANTHROPIC_HTTP_MAX_CONNECTIONS    total connections (default 100)
+  ANTHROPIC_HTTP_MAX_KEEPALIVE      idle keep-alive connections (default 20)
+  ANTHROPIC_HTTP_KEEPALIVE_EXPIRY   seconds an idle connection is kept (default 30)
+  ANTHROPIC_HTTP_TIMEOUT            request timeout in seconds (default 600)
+
+SDK-level retries are off (max_retries=0 unless a caller passes its own):
+call sites go through resilience.call_with_retry, which owns backoff,
+Retry-After handling and the circuit breaker.
+
+Servers should call aclose_async_client() on shutdown (or use
+client_lifespan()); scripts can wrap their entry coroutine in
+run_with_client() so pooled sockets are closed cleanly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_CLIENTS: dict[str, tuple[asyncio.AbstractEventLoop, Any]] = {}
+
+
+def _env_number(key: str, default: float) -> float:
+    try:
+        return float((os.environ.get(key) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _http_client():
+    import anthropic
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=int(_env_number("ANTHROPIC_HTTP_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(_env_number("ANTHROPIC_HTTP_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=_env_number("ANTHROPIC_HTTP_KEEPALIVE_EXPIRY", 30.0),
+    )
+    timeout = httpx.Timeout(_env_number("ANTHROPIC_HTTP_TIMEOUT", 600.0), connect=10.0)
+    return anthropic.DefaultAsyncHttpxClient(limits=limits, timeout=timeout)
+
+
+def get_async_client(api_key: str | None = None, **kwargs: Any):
+    """
+    Return the shared AsyncAnthropic client for api_key on the running loop.
+
+    Extra kwargs (e.g. timeout) are only applied when the client is
+    created; callers that need different settings should pass them
+    consistently. Must be called from inside a running event loop.
+    """
+    import anthropic
+
+    api_key = (api_key or os.environ.get("ANTHROPIC_API_KEY") or "").strip()
+    loop = asyncio.get_running_loop()
+    entry = _CLIENTS.get(api_key)
+    if entry is not None and entry[0] is loop and not loop.is_closed():
+        return entry[1]
+
+    if entry is not None:
+        # Previous loop is gone (e.g. another asyncio.run); its pool can't be reused
+        logger.debug("Recreating Anthropic client for a new event loop")
+    kwargs.setdefault("max_retries", 0)
+    client = anthropic.AsyncAnthropic(api_key=api_key, http_client=_http_client(), **kwargs)
+    _CLIENTS[api_key] = (loop, client)
+    return client
+
+
+async def aclose_async_client() -> None:
+    """Close every shared client owned by the running loop."""
+    loop = asyncio.get_running_loop()
+    for key, (owner, client) in list(_CLIENTS.items()):
+        if owner is not loop:
+            continue
+        _CLIENTS.pop(key, None)
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning("Error closing Anthropic client: %s", e)
+
+
+@asynccontextmanager
+async def client_lifespan(api_key: str | None = None) -> AsyncIterator[None]:
+    """Open the shared client up front and close it on exit (FastAPI lifespan, batch runs)."""
+    try:
+        get_async_client(api_key)
+    except Exception as e:
+        logger.warning("Shared Anthropic client not opened: %s", e)
+    try:
+        yield
+    finally:
+        await aclose_async_client()
+
+
+async def run_with_client(awaitable: Awaitable[T]) -> T:
+    """Await a batch entry point with the shared client open, closing it afterwards."""
+    async with client_lifespan():
+        return await awaitable
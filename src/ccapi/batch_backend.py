@@ -0,0 +1,227 @@
+"""
+Message Batches API backend for offline benchmark runs.
+
+Instead of one interactive messages.create per row, run_message_batch()
+submits every request as a single asynchronous batch job, polls until it
+has ended, and maps each result back to its row by custom_id
+("row-00000", "row-00001", ...). Batch requests use the fallback-mode
+prompt (skill file as a cached system prompt); the Skills API container is
+not used here.
+
+Runs are resumable: the batch id is written to a small JSON state file as
+soon as the job is created, and a later run with the same requests (or an
+explicit batch_id) polls and collects that job instead of submitting a new
+one. Rows already in the generation cache (see gen_cache) are not
+resubmitted. Point ANTHROPIC_BASE_URL at scripts/anthropic_standin.py to exercise
+the whole flow offline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any
+
+from . import config
+from .anthropic_client import get_async_client
+from .curriculum_lookup import lookup_curriculum
+from .formatters import request_quantity
+from .gen_cache import cached_generation, generation_key, store_generation
+from .pipeline import (
+    _emit_tool,
+    _fallback_params,
+    _get_text_from_message_content,
+    _result_from_message,
+    _result_from_text,
+    _skill_fingerprint,
+    _user_content,
+    _utc_ts,
+)
+from .pipeline_with_curriculum import _curriculum_context
+from .resilience import call_with_retry
+from .usage import record_usage
+
+logger = logging.getLogger(__name__)
+
+# Message Batches API limit on requests per batch
+MAX_BATCH_REQUESTS = 100_000
+
+
+def custom_id_for(index: int) -> str:
+    return f"row-{index:05d}"
+
+
+def _index_from_custom_id(custom_id: str) -> int | None:
+    prefix, _, number = custom_id.partition("-")
+    return int(number) if prefix == "row" and number.isdigit() else None
+
+
+def build_batch_requests(
+    requests: list[dict],
+    *,
+    model: str | None = None,
+    use_curriculum: bool = False,
+    curriculum_path: Path | None = None,
+    output_mode: str | None = None,
+) -> list[dict[str, Any]]:
+    """Message Batches request entries ({"custom_id", "params"}), one per generation request."""
+    model = model or config.CCAPI_LLM_MODEL
+    output_mode = output_mode or config.CCAPI_OUTPUT_MODE
+    skill_path = config.SKILL_PATH
+    skill_content = skill_path.read_text(encoding="utf-8") if skill_path.exists() else ""
+    if use_curriculum and curriculum_path is None:
+        curriculum_path = Path(__file__).resolve().parents[2] / "data" / "curriculum.md"
+
+    entries = []
+    for i, req in enumerate(requests):
+        user_content = _user_content(req)
+        if use_curriculum:
+            sid = (req.get("skills") or {}).get("substandard_id", "")
+            user_content += _curriculum_context(sid, lookup_curriculum(sid, curriculum_path))
+        entries.append({
+            "custom_id": custom_id_for(i),
+            "params": _fallback_params(
+                model, request_quantity(req), skill_content, user_content, _emit_tool(req, output_mode)
+            ),
+        })
+    return entries
+
+
+def _fingerprint(entries: list[dict[str, Any]]) -> str:
+    return hashlib.sha256(json.dumps(entries, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _load_state(state_path: Path) -> dict[str, Any]:
+    try:
+        return json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_state(state_path: Path, state: dict[str, Any]) -> None:
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_suffix(state_path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    tmp.replace(state_path)
+
+
+def _error_result(error: str, generation_mode: str) -> dict:
+    return {
+        "error": error,
+        "success": False,
+        "timestamp": _utc_ts(),
+        "generatedContent": {"generated_content": []},
+        "generation_mode": generation_mode,
+    }
+
+
+async def run_message_batch(
+    requests: list[dict],
+    *,
+    state_path: Path,
+    batch_id: str | None = None,
+    model: str | None = None,
+    use_curriculum: bool = False,
+    curriculum_path: Path | None = None,
+    poll_interval: float = 30.0,
+    max_wait: float | None = None,
+    output_mode: str | None = None,
+) -> list[dict]:
+    """
+    Generate all requests through one Message Batches job.
+
+    state_path: JSON file recording the submitted batch (for resuming).
+    batch_id: resume this batch instead of the one in state_path / a new one.
+    max_wait: give up polling after this many seconds (TimeoutError); the
+        batch keeps running and can be resumed later.
+    output_mode: "text" or "tool" (forced emit_question call; default from
+        config CCAPI_OUTPUT_MODE).
+
+    Returns one generate_one-shaped result per request, in order.
+    """
+    if len(requests) > MAX_BATCH_REQUESTS:
+        raise ValueError(f"{len(requests)} requests exceed the {MAX_BATCH_REQUESTS} per-batch limit")
+    generation_mode = "message_batch_with_curriculum" if use_curriculum else "message_batch"
+    output_mode = output_mode or config.CCAPI_OUTPUT_MODE
+    client = get_async_client(config.ANTHROPIC_API_KEY)
+
+    all_entries = build_batch_requests(
+        requests,
+        model=model,
+        use_curriculum=use_curriculum,
+        curriculum_path=curriculum_path,
+        output_mode=output_mode,
+    )
+    skill = _skill_fingerprint(None)
+    cache_keys = [
+        generation_key(
+            req,
+            entry["params"]["messages"][0]["content"],
+            model=entry["params"]["model"],
+            generation_mode=generation_mode,
+            skill=skill,
+            output_mode=output_mode,
+        )
+        for req, entry in zip(requests, all_entries)
+    ]
+    results: list[dict | None] = [cached_generation(key) for key in cache_keys]
+    entries = [entry for entry, res in zip(all_entries, results) if res is None]
+    if not entries:
+        logger.info("All %d batch rows served from the generation cache", len(requests))
+        return results
+    fingerprint = _fingerprint(entries)
+    state = _load_state(state_path)
+
+    if batch_id is None and state.get("batch_id") and state.get("fingerprint") == fingerprint:
+        batch_id = state["batch_id"]
+        logger.info("Resuming message batch %s from %s", batch_id, state_path)
+    if batch_id is None:
+        batch = await call_with_retry("batch", client.messages.batches.create, requests=entries)
+        batch_id = batch.id
+        state = {
+            "batch_id": batch_id,
+            "fingerprint": fingerprint,
+            "n_requests": len(entries),
+            "submitted_at": _utc_ts(),
+        }
+        _save_state(state_path, state)
+        logger.info("Submitted message batch %s (%d requests)", batch_id, len(entries))
+
+    started = time.monotonic()
+    while True:
+        batch = await call_with_retry("batch", client.messages.batches.retrieve, batch_id)
+        counts = getattr(batch, "request_counts", None)
+        logger.info("Batch %s: %s %s", batch_id, batch.processing_status, counts)
+        if batch.processing_status == "ended":
+            break
+        if max_wait is not None and time.monotonic() - started > max_wait:
+            raise TimeoutError(f"Batch {batch_id} still {batch.processing_status} after {max_wait:.0f}s")
+        await asyncio.sleep(poll_interval)
+
+    async for entry in await call_with_retry("batch", client.messages.batches.results, batch_id):
+        index = _index_from_custom_id(entry.custom_id)
+        if index is None or not 0 <= index < len(requests):
+            logger.warning("Ignoring batch result with unknown custom_id %s", entry.custom_id)
+            continue
+        result = entry.result
+        if result.type == "succeeded":
+            record_usage(result.message)
+            tool = _emit_tool(requests[index], output_mode)
+            if tool is not None:
+                res = _result_from_message(result.message, requests[index], generation_mode, tool)
+            else:
+                raw = _get_text_from_message_content(result.message.content)
+                res = _result_from_text(raw, requests[index], generation_mode)
+            results[index] = store_generation(cache_keys[index], res)
+        else:
+            error = getattr(result, "error", None)
+            detail = getattr(getattr(error, "error", None), "message", None) or result.type
+            results[index] = _error_result(f"Batch request {result.type}: {detail}", generation_mode)
+
+    state.update({"batch_id": batch_id, "ended_at": _utc_ts()})
+    _save_state(state_path, state)
+    return [r or _error_result("No result in batch output", generation_mode) for r in results]
@@ -21,12 +21,54 @@ def _path(key: str, default: Path | None = None) -> Path | None:
     v = _str(key)
     return Path(v) if v else default
 
+def _bool(key: str, default: bool = False) -> bool:
+    v = _str(key).lower()
+    return v in {"1", "true", "yes"} if v else default
+
+def _float(key: str, default: float) -> float:
+    try:
+        return float(_str(key) or default)
+    except ValueError:
+        return default
+
 ANTHROPIC_API_KEY = _str("ANTHROPIC_API_KEY")
 CCAPI_ELA_MCQ_SKILL_ID = _str("CCAPI_ELA_MCQ_SKILL_ID")
 CCAPI_POPULATE_CURRICULUM_SKILL_ID = _str("CCAPI_POPULATE_CURRICULUM_SKILL_ID")
 INCEPT_API_KEY = _str("INCEPT_API_KEY")
 CCAPI_BENCHMARK_PATH = _path("CCAPI_BENCHMARK_PATH")
 CCAPI_LLM_MODEL = _str("CCAPI_LLM_MODEL") or "claude-sonnet-4-5-20250929"
+# Cheaper model tried first, escalating to CCAPI_LLM_MODEL (see router.py; empty = cascade off)
+CCAPI_FAST_MODEL = _str("CCAPI_FAST_MODEL")
+# eval_results.csv whose failed standards skip the fast model
+CCAPI_ROUTER_HISTORY = _path("CCAPI_ROUTER_HISTORY", _ROOT / "outputs" / "eval_results.csv")
+# A standard is hard once it has this many evaluated rows and at least this share of them failed
+CCAPI_ROUTER_MIN_SAMPLES = int(_float("CCAPI_ROUTER_MIN_SAMPLES", 3))
+CCAPI_ROUTER_FAIL_RATE = _float("CCAPI_ROUTER_FAIL_RATE", 0.5)
+# Seconds a failed curriculum population is remembered before it is retried
+CCAPI_POPULATE_NEGATIVE_TTL = _float("CCAPI_POPULATE_NEGATIVE_TTL", 60.0)
+# Stream fallback-mode generations and stop reading once the JSON item closes
+CCAPI_STREAM = _bool("CCAPI_STREAM")
+# Fallback-mode output: "text" (parse JSON from the reply) or "tool" (forced emit_question tool call)
+CCAPI_OUTPUT_MODE = _str("CCAPI_OUTPUT_MODE", "text").lower()
+# On-disk generation cache: "use" | "refresh" | "off" (scripts override with --cache)
+CCAPI_GEN_CACHE = _str("CCAPI_GEN_CACHE", "off").lower()
+CCAPI_GEN_CACHE_DIR = _path("CCAPI_GEN_CACHE_DIR", _ROOT / "outputs" / "gen_cache")
+CCAPI_GEN_CACHE_MAX_MB = _float("CCAPI_GEN_CACHE_MAX_MB", 500.0)  # 0 = unbounded
+CCAPI_GEN_CACHE_TTL_DAYS = _float("CCAPI_GEN_CACHE_TTL_DAYS", 0.0)  # 0 = never expire
+# Retries of transient API errors (see resilience.py; the SDK's own retries are off)
+CCAPI_RETRY_MAX_ATTEMPTS = int(_float("CCAPI_RETRY_MAX_ATTEMPTS", 6))  # 429 / 529
+CCAPI_RETRY_SERVER_ATTEMPTS = int(_float("CCAPI_RETRY_SERVER_ATTEMPTS", 3))  # other 5xx, timeouts, connection errors
+CCAPI_RETRY_BASE_DELAY = _float("CCAPI_RETRY_BASE_DELAY", 1.0)
+CCAPI_RETRY_MAX_DELAY = _float("CCAPI_RETRY_MAX_DELAY", 60.0)
+# Consecutive transient failures that open a pipeline's circuit (0 = off), and seconds it stays open
+CCAPI_BREAKER_THRESHOLD = int(_float("CCAPI_BREAKER_THRESHOLD", 10))
+CCAPI_BREAKER_RESET = _float("CCAPI_BREAKER_RESET_SECONDS", 30.0)
+# Seconds a call waits for an open circuit before failing (0 = fail fast; batch scripts raise it)
+CCAPI_BREAKER_WAIT = _float("CCAPI_BREAKER_WAIT_SECONDS", 0.0)
+# Process-wide API budget (see rate_limit.py): requests / input tokens / output tokens per minute (0 = unlimited)
+CCAPI_RATE_RPM = _float("CCAPI_RATE_RPM", 0.0)
+CCAPI_RATE_ITPM = _float("CCAPI_RATE_ITPM", 0.0)
+CCAPI_RATE_OTPM = _float("CCAPI_RATE_OTPM", 0.0)
 
 # Skill file paths (for fallback when Skills API not used)
 SKILL_PATH = _ROOT / "skills" / "ela-mcq-generation" / "SKILL.md"
@@ -8,9 +8,12 @@ substandard_id and return assessment boundaries and common misconceptions.
 from __future__ import annotations
 
 import re
+import threading
 from pathlib import Path
 from typing import Any
 
+from .curriculum_store import load_curriculum
+
 
 def parse_curriculum_entry(text: str) -> dict[str, Any]:
     """
@@ -83,6 +86,88 @@ def parse_curriculum_entry(text: str) -> dict[str, Any]:
     return result
 
 
+def default_curriculum_path() -> Path:
+    """Return the curriculum.md used when callers don't pass one explicitly."""
+    # First try: option_c_agent_sdk/data/curriculum.md
+    root = Path(__file__).resolve().parents[2]  # Go up to ccapi/
+    curriculum_path = root / "option_c_agent_sdk" / "data" / "curriculum.md"
+    if not curriculum_path.exists():
+        # Fallback: data/curriculum.md in root
+        curriculum_path = root / "data" / "curriculum.md"
+    return curriculum_path
+
+
+class CurriculumIndex:
+    """
+    Parsed view of one curriculum.md, keyed by Standard ID.
+
+    The file is loaded once (from its compiled sidecar, see curriculum_store)
+    and reloaded only when its mtime or size changes, so a lookup is a dict
+    probe instead of a regex scan over every block.
+    Instances are shared process-wide via get_curriculum_index().
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._signature: tuple[int, int] | None = None
+        self._entries: dict[str, dict[str, Any]] = {}
+
+    def _stat_signature(self) -> tuple[int, int]:
+        st = self.path.stat()
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, signature: tuple[int, int]) -> None:
+        entries: dict[str, dict[str, Any]] = {}
+        # Records come from the compiled sidecar, rebuilt when the source hash changes
+        for record in load_curriculum(self.path):
+            # Keep the first occurrence, matching the old linear scan
+            entries.setdefault(record["standard_id"], record)
+        self._entries = entries
+        self._signature = signature
+
+    def refresh(self) -> None:
+        """Re-parse the file if it changed on disk since the last load."""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                self._load(signature)
+
+    def invalidate(self) -> None:
+        """Drop the parsed entries; the next access re-reads the file."""
+        with self._lock:
+            self._signature = None
+            self._entries = {}
+
+    def get(self, standard_id: str) -> dict[str, Any] | None:
+        """Return the parsed entry for standard_id, or None if it isn't in the file."""
+        self.refresh()
+        return self._entries.get(standard_id)
+
+    def __contains__(self, standard_id: str) -> bool:
+        return self.get(standard_id) is not None
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._entries)
+
+
+_INDEXES: dict[Path, CurriculumIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_curriculum_index(curriculum_path: Path) -> CurriculumIndex:
+    """Return the process-wide CurriculumIndex for curriculum_path."""
+    key = Path(curriculum_path).resolve()
+    index = _INDEXES.get(key)
+    if index is None:
+        with _INDEXES_LOCK:
+            index = _INDEXES.setdefault(key, CurriculumIndex(key))
+    return index
+
+
 def lookup_curriculum(substandard_id: str, curriculum_path: Path | None = None) -> dict[str, Any]:
     """
     Search curriculum.md for a given substandard_id and return assessment boundaries
@@ -102,13 +187,7 @@ def lookup_curriculum(substandard_id: str, curriculum_path: Path | None = None)
         }
     """
     if curriculum_path is None:
-        # Try to find curriculum.md in common locations
-        # First try: option_c_agent_sdk/data/curriculum.md
-        root = Path(__file__).resolve().parents[2]  # Go up to ccapi/
-        curriculum_path = root / "option_c_agent_sdk" / "data" / "curriculum.md"
-        if not curriculum_path.exists():
-            # Fallback: data/curriculum.md in root
-            curriculum_path = root / "data" / "curriculum.md"
+        curriculum_path = default_curriculum_path()
     
     if not curriculum_path.exists():
         return {
@@ -121,7 +200,7 @@ def lookup_curriculum(substandard_id: str, curriculum_path: Path | None = None)
         }
     
     try:
-        content = curriculum_path.read_text(encoding="utf-8")
+        parsed = get_curriculum_index(curriculum_path).get(substandard_id)
     except Exception as e:
         return {
             "found": False,
@@ -132,20 +211,16 @@ def lookup_curriculum(substandard_id: str, curriculum_path: Path | None = None)
             "error": f"Failed to read curriculum file: {e}",
         }
     
-    # Split by "---" separator to get individual entries
-    entries = content.split("---")
-    
-    # Search for the matching standard_id
-    for entry in entries:
-        parsed = parse_curriculum_entry(entry)
-        if parsed["standard_id"] == substandard_id:
-            return {
-                "found": True,
-                "standard_id": parsed["standard_id"],
-                "standard_description": parsed["standard_description"],
-                "assessment_boundaries": parsed["assessment_boundaries"],
-                "common_misconceptions": parsed["common_misconceptions"],
-            }
+    if parsed is not None:
+        return {
+            "found": True,
+            "standard_id": parsed["standard_id"],
+            "standard_description": parsed["standard_description"],
+            "assessment_boundaries": parsed["assessment_boundaries"],
+            "common_misconceptions": (
+                list(parsed["common_misconceptions"]) if parsed["common_misconceptions"] else None
+            ),
+        }
     
     # Not found
     return {
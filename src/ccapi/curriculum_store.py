@@ -0,0 +1,464 @@
+"""
+Precompiled curriculum sidecar.
+
+curriculum.md is compiled into a JSONL sidecar next to it
+(curriculum.md.index.jsonl) so pipelines read small pre-parsed records
+instead of regex-scanning the whole markdown document:
+
+    line 1: {"version": 1, "source": "curriculum.md", "sha256": "...", "size": N}
+    line N: {"standard_id", "standard_description", "learning_objectives",
+             "assessment_boundaries", "common_misconceptions",
+             "difficulty_definitions", "offset", "length"}
+
+"offset"/"length" are byte offsets of the block in curriculum.md, so callers
+that need the raw markdown can slice it without splitting the file;
+MappedCurriculum does that over a read-only mmap shared by all workers.
+
+load_curriculum() checks the source hash and rebuilds the sidecar when it is
+stale. rewrite_blocks() is the only writer: it takes an advisory lock,
+rewrites just the affected blocks and publishes via temp-file + rename. This
+module is stdlib-only; agent_sdk and agent_sdk_v2 import it from the
+repository's src/ (their images copy ccapi/ next to their sources).
+
+CLI:
+  python -m ccapi.curriculum_store path/to/curriculum.md [--check]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+SIDECAR_VERSION = 1
+SIDECAR_SUFFIX = ".index.jsonl"
+BLOCK_DELIMITER = b"\n---\n"
+
+_WHITESPACE = b" \t\r\n"
+_STD_ID_RE = re.compile(r"^Standard ID:\s*(.+?)\s*$", re.MULTILINE)
+_STD_DESC_RE = re.compile(r"^Standard Description:\s*(.+?)\s*$", re.MULTILINE)
+_SECTION_RE = re.compile(
+    r"^(Key Concepts|Learning Objectives|Assessment Boundaries|Common Misconceptions|Difficulty Definitions):[ \t]*",
+    re.MULTILINE,
+)
+_NONE_SPECIFIED_RE = re.compile(r"^\*\s*None specified\s*\*$", re.MULTILINE)
+_DIFFICULTY_RE = re.compile(r"^\*\s*(Easy|Medium|Hard):[ \t]*\n?([\s\S]*?)(?=^\*\s*(?:Easy|Medium|Hard):|\Z)", re.MULTILINE)
+
+
+def sidecar_path(source: Path) -> Path:
+    """Return the sidecar path for a curriculum.md (curriculum.md.index.jsonl)."""
+    source = Path(source)
+    return source.with_name(source.name + SIDECAR_SUFFIX)
+
+
+def iter_block_spans(data: bytes) -> Iterator[tuple[int, int]]:
+    """Yield (start, end) byte offsets of each non-empty, whitespace-trimmed block."""
+    pos = 0
+    size = len(data)
+    while pos <= size:
+        delim = data.find(BLOCK_DELIMITER, pos)
+        stop = size if delim < 0 else delim
+        start, end = pos, stop
+        while start < end and data[start] in _WHITESPACE:
+            start += 1
+        while end > start and data[end - 1] in _WHITESPACE:
+            end -= 1
+        if end > start:
+            yield start, end
+        if delim < 0:
+            break
+        pos = delim + len(BLOCK_DELIMITER)
+
+
+def _bullets(body: str) -> list[str] | None:
+    items = [
+        line.strip().lstrip("*-").strip()
+        for line in body.split("\n")
+        if line.strip().startswith(("*", "- ")) and not line.strip().startswith("*None")
+    ]
+    items = [i for i in items if i]
+    return items or None
+
+
+def _difficulty_definitions(body: str) -> dict[str, str] | None:
+    out: dict[str, str] = {}
+    for m in _DIFFICULTY_RE.finditer(body):
+        text = m.group(2).strip()
+        if text and text != "<unspecified>":
+            out[m.group(1).lower()] = text
+    return out or None
+
+
+def parse_block(text: str) -> dict[str, Any]:
+    """
+    Parse one curriculum block into a record.
+
+    Returns:
+        {
+            "standard_id": str | None,
+            "standard_description": str | None,
+            "learning_objectives": list[str] | None,
+            "assessment_boundaries": str | None,
+            "common_misconceptions": list[str] | None,
+            "difficulty_definitions": {"easy"|"medium"|"hard": str} | None
+        }
+    """
+    m_id = _STD_ID_RE.search(text)
+    m_desc = _STD_DESC_RE.search(text)
+
+    sections: dict[str, str] = {}
+    headers = list(_SECTION_RE.finditer(text))
+    for i, h in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        body = _NONE_SPECIFIED_RE.sub("", text[h.end():end]).strip()
+        sections[h.group(1)] = body
+
+    return {
+        "standard_id": m_id.group(1) if m_id else None,
+        "standard_description": m_desc.group(1) if m_desc else None,
+        "learning_objectives": _bullets(sections.get("Learning Objectives", "")),
+        "assessment_boundaries": sections.get("Assessment Boundaries") or None,
+        "common_misconceptions": _bullets(sections.get("Common Misconceptions", "")),
+        "difficulty_definitions": _difficulty_definitions(sections.get("Difficulty Definitions", "")),
+    }
+
+
+def build_records(data: bytes | mmap.mmap) -> list[dict[str, Any]]:
+    """Parse every block in curriculum.md bytes into records with byte offsets."""
+    records = []
+    for start, end in iter_block_spans(data):
+        record = parse_block(data[start:end].decode("utf-8"))
+        if not record["standard_id"]:
+            continue
+        record["offset"] = start
+        record["length"] = end - start
+        records.append(record)
+    return records
+
+
+def _header(source: Path, data: bytes | mmap.mmap) -> dict[str, Any]:
+    return {
+        "version": SIDECAR_VERSION,
+        "source": source.name,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "size": len(data),
+    }
+
+
+def _write_atomic(path: Path, content: str | bytes) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=str(path.parent))
+    try:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _write_sidecar(dest: Path, header: dict[str, Any], records: list[dict[str, Any]]) -> None:
+    lines = [json.dumps(header)] + [json.dumps(r, ensure_ascii=False) for r in records]
+    _write_atomic(dest, "\n".join(lines) + "\n")
+
+
+def compile_curriculum(source: Path, dest: Path | None = None) -> Path:
+    """Compile curriculum.md into its JSONL sidecar. Returns the sidecar path."""
+    source = Path(source)
+    dest = Path(dest) if dest else sidecar_path(source)
+    data = source.read_bytes()
+    _write_sidecar(dest, _header(source, data), build_records(data))
+    return dest
+
+
+def _read_sidecar(path: Path, expected: dict[str, Any]) -> list[dict[str, Any]] | None:
+    """Return sidecar records if the sidecar matches `expected`, else None."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "null")
+            if not isinstance(header, dict):
+                return None
+            if header.get("version") != expected["version"] or header.get("sha256") != expected["sha256"]:
+                return None
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return None
+
+
+def load_curriculum(
+    source: Path,
+    *,
+    data: bytes | mmap.mmap | None = None,
+    write_sidecar: bool = True,
+) -> list[dict[str, Any]]:
+    """
+    Load curriculum records for source, using the sidecar when it is fresh.
+
+    A missing or stale sidecar (source hash changed) is rebuilt from the
+    markdown; if the directory is read-only the parsed records are still
+    returned. Pass `data` (e.g. an mmap of source) to avoid reading the file
+    a second time.
+    """
+    source = Path(source)
+    if data is None:
+        data = source.read_bytes()
+    header = _header(source, data)
+    dest = sidecar_path(source)
+
+    records = _read_sidecar(dest, header)
+    if records is not None:
+        return records
+
+    records = build_records(data)
+    if write_sidecar:
+        try:
+            _write_sidecar(dest, header, records)
+        except OSError:
+            pass
+    return records
+
+
+def is_fresh(source: Path) -> bool:
+    """True if the sidecar exists and matches the current source hash."""
+    source = Path(source)
+    return _read_sidecar(sidecar_path(source), _header(source, source.read_bytes())) is not None
+
+
+@contextmanager
+def curriculum_lock(source: Path) -> Iterator[None]:
+    """
+    Exclusive advisory lock for writers of source (curriculum.md.lock).
+
+    flock is per open file description, so this serializes writers across
+    threads and across worker processes alike. Readers never take it: they
+    see either the old or the new file thanks to the atomic rename.
+    """
+    source = Path(source)
+    lock_path = source.with_name(source.name + ".lock")
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def rewrite_blocks(source: Path, updates: dict[str, Callable[[str], str]]) -> set[str]:
+    """
+    Apply per-standard block rewrites to curriculum.md atomically.
+
+    `updates` maps a Standard ID to a function that receives that block's
+    markdown and returns the new markdown (returning it unchanged is a
+    no-op). Under curriculum_lock the current file is read, only the target
+    blocks are located (via the sidecar offsets) and transformed, and the
+    result is published with temp-file + rename. The sidecar is updated in
+    place by shifting offsets instead of re-parsing every block.
+
+    Returns the set of Standard IDs whose block actually changed.
+    """
+    source = Path(source)
+    with curriculum_lock(source):
+        data = source.read_bytes()
+        records = load_curriculum(source, data=data, write_sidecar=False)
+        by_id: dict[str, dict[str, Any]] = {}
+        for record in records:
+            by_id.setdefault(record["standard_id"], record)
+
+        changes: list[tuple[dict[str, Any], bytes]] = []
+        for standard_id, transform in updates.items():
+            record = by_id.get(standard_id)
+            if record is None:
+                continue
+            start = record["offset"]
+            old = data[start:start + record["length"]].decode("utf-8")
+            new = transform(old)
+            if new != old:
+                changes.append((record, new.encode("utf-8")))
+        if not changes:
+            return set()
+
+        changes.sort(key=lambda c: c[0]["offset"])
+        pieces: list[bytes] = []
+        new_spans: dict[int, tuple[int, int, bytes]] = {}
+        cursor = 0
+        out_len = 0
+        for record, new in changes:
+            start = record["offset"]
+            pieces.append(data[cursor:start])
+            out_len += start - cursor
+            new_spans[start] = (out_len, len(new), new)
+            pieces.append(new)
+            out_len += len(new)
+            cursor = start + record["length"]
+        pieces.append(data[cursor:])
+        new_data = b"".join(pieces)
+
+        _write_atomic(source, new_data)
+
+        # Shift offsets for the sidecar; only changed blocks are re-parsed
+        shift = 0
+        new_records = []
+        for record in sorted(records, key=lambda r: r["offset"]):
+            span = new_spans.get(record["offset"])
+            if span is not None:
+                offset, length, new = span
+                shift = offset + length - (record["offset"] + record["length"])
+                updated = parse_block(new.decode("utf-8"))
+                if not updated["standard_id"]:
+                    continue
+                # Keep spans whitespace-trimmed, as iter_block_spans would
+                lead = len(new) - len(new.lstrip(_WHITESPACE))
+                updated["offset"] = offset + lead
+                updated["length"] = len(new.strip(_WHITESPACE))
+                new_records.append(updated)
+            else:
+                new_records.append({**record, "offset": record["offset"] + shift})
+        try:
+            _write_sidecar(sidecar_path(source), _header(source, new_data), new_records)
+        except OSError:
+            pass
+
+    # This process's mapping must not keep serving the old offsets
+    mapped = _MAPPED.get(source.resolve())
+    if mapped is not None:
+        mapped.invalidate()
+    return {record["standard_id"] for record, _ in changes}
+
+
+class MappedCurriculum:
+    """
+    Random access to curriculum blocks through a read-only mmap.
+
+    The byte-offset table is loaded once per file version (inode/mtime/size)
+    and a lookup slices only the requested block out of the mapping, so no
+    copy of the whole file is made per call. The mapping is MAP_SHARED, so every
+    worker process on the host reads the same page-cache pages. An atomic
+    rename of curriculum.md (new inode) is picked up on the next call, and
+    rewrite_blocks invalidates this process's mapping directly; the old
+    mapping stays valid for readers still holding it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._signature: tuple[int, int, int] | None = None
+        # (mapping, records indexing it): one attribute, swapped and read as a unit
+        self._state: tuple[mmap.mmap | None, dict[str, dict[str, Any]]] = (None, {})
+
+    def _open(self, signature: tuple[int, int, int]) -> None:
+        records: dict[str, dict[str, Any]] = {}
+        mm = None
+        if signature[2] > 0:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            for record in load_curriculum(self.path, data=mm):
+                records.setdefault(record["standard_id"], record)
+        # Readers that already grabbed the old state keep its mapping alive until they finish
+        self._state = (mm, records)
+        self._signature = signature
+
+    def refresh(self) -> None:
+        """Remap if curriculum.md changed on disk since the last load."""
+        st = os.stat(self.path)
+        # rewrite_blocks publishes via rename, so a new inode marks a rewrite
+        # even when mtime granularity hides it and the size is unchanged
+        signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                self._open(signature)
+
+    def invalidate(self) -> None:
+        """Force a remap on the next access (the current mapping stays valid for its readers)."""
+        with self._lock:
+            self._signature = None
+
+    def records(self) -> dict[str, dict[str, Any]]:
+        """Pre-parsed records keyed by Standard ID."""
+        self.refresh()
+        return self._state[1]
+
+    def block(self, standard_id: str) -> str | None:
+        """Return the raw markdown block for standard_id, or None if absent."""
+        self.refresh()
+        mm, records = self._state
+        record = records.get(standard_id)
+        if mm is None or record is None:
+            return None
+        start = record["offset"]
+        return mm[start:start + record["length"]].decode("utf-8")
+
+
+_MAPPED: dict[Path, MappedCurriculum] = {}
+_MAPPED_LOCK = threading.Lock()
+
+
+def get_mapped_curriculum(source: Path) -> MappedCurriculum:
+    """Return the process-wide MappedCurriculum for source."""
+    key = Path(source).resolve()
+    mapped = _MAPPED.get(key)
+    if mapped is None:
+        with _MAPPED_LOCK:
+            mapped = _MAPPED.setdefault(key, MappedCurriculum(key))
+    return mapped
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Compile curriculum.md into a JSONL sidecar index.")
+    ap.add_argument("paths", nargs="+", type=Path, help="curriculum.md file(s)")
+    ap.add_argument("--check", action="store_true", help="Exit 1 if any sidecar is missing or stale")
+    args = ap.parse_args(argv)
+
+    stale = 0
+    for path in args.paths:
+        if not path.exists():
+            print(f"Not found: {path}", file=sys.stderr)
+            return 2
+        if args.check:
+            fresh = is_fresh(path)
+            stale += 0 if fresh else 1
+            print(f"{'OK   ' if fresh else 'STALE'} {sidecar_path(path)}")
+            continue
+        dest = compile_curriculum(path)
+        n = sum(1 for _ in open(dest, encoding="utf-8")) - 1
+        print(f"Wrote {dest} ({n} standards)")
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
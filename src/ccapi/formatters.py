@@ -5,6 +5,9 @@ from __future__ import annotations
 import json
 from typing import Any
 
+# Upper bound on questions produced by one model call
+MAX_QUANTITY = 20
+
 
 def benchmark_row_to_request(row: dict) -> dict:
     """
@@ -13,7 +16,7 @@ def benchmark_row_to_request(row: dict) -> dict:
     Input row: { "grade", "subject", "type", "difficulty", "skills": { "substandard_id", "substandard_description" } }
     """
     skills = row.get("skills") or {}
-    return {
+    out = {
         "type": "mcq",
         "grade": str(row.get("grade", "3")),
         "skills": {
@@ -25,6 +28,23 @@ def benchmark_row_to_request(row: dict) -> dict:
         "curriculum": "common core",
         "difficulty": row.get("difficulty", "medium"),
     }
+    if row.get("quantity") is not None:
+        out["quantity"] = request_quantity(row)
+    return out
+
+
+def request_quantity(request: dict) -> int:
+    """Number of questions requested ("quantity", default 1), clamped to 1..MAX_QUANTITY."""
+    try:
+        n = int(request.get("quantity") or 1)
+    except (TypeError, ValueError):
+        n = 1
+    return max(1, min(MAX_QUANTITY, n))
+
+
+def output_token_budget(quantity: int) -> int:
+    """max_tokens for a call producing `quantity` questions."""
+    return min(16384, 4096 + 1536 * (max(1, quantity) - 1))
 
 
 def normalize_content(content: dict) -> dict:
@@ -46,14 +66,65 @@ def parsed_to_item(parsed: dict, request: dict, normalize: bool = True) -> dict:
     Build standardized item from parsed LLM JSON and original request.
 
     parsed: { "id", "content": { "answer", "question", "image_url", "answer_options", ... } }
+    An embedded "self_assessment" object is kept on the item.
     """
     c = parsed.get("content", {})
     content = normalize_content(c) if normalize else dict(c)
-    return {
+    item = {
         "id": parsed.get("id", ""),
         "content": content,
         "request": request,
     }
+    if isinstance(parsed.get("self_assessment"), dict):
+        item["self_assessment"] = parsed["self_assessment"]
+    return item
+
+
+def parsed_entries(parsed: Any) -> list[dict]:
+    """
+    Question dicts from a single item, a list, or a wrapper like {"items": [...]}.
+
+    Entries without content are dropped, and missing or duplicate ids get a
+    _NNN suffix so ids are unique within the response.
+    """
+    if isinstance(parsed, dict):
+        for key in ("items", "questions", "generated_content"):
+            if isinstance(parsed.get(key), list):
+                parsed = parsed[key]
+                break
+        else:
+            parsed = [parsed]
+    if not isinstance(parsed, list):
+        return []
+    entries = [
+        p for p in parsed
+        if isinstance(p, dict) and isinstance(p.get("content"), dict) and p.get("content")
+    ]
+
+    seen: set[str] = set()
+    for n, entry in enumerate(entries, start=1):
+        base = str(entry.get("id") or "item")
+        entry_id = base if entry.get("id") else f"{base}_{n:03d}"
+        suffix = n
+        while entry_id in seen:
+            entry_id = f"{base}_{suffix:03d}"
+            suffix += 1
+        seen.add(entry_id)
+        entry["id"] = entry_id
+    return entries
+
+
+def parsed_to_items(
+    parsed: Any,
+    request: dict,
+    normalize: bool = True,
+    limit: int | None = None,
+) -> list[dict]:
+    """Build standardized items from a (possibly multi-item) parsed LLM response (see parsed_entries)."""
+    entries = parsed_entries(parsed)
+    if limit is not None:
+        entries = entries[:limit]
+    return [parsed_to_item(p, request, normalize) for p in entries]
 
 
 def _content_to_incept_string(c: dict) -> str:
@@ -0,0 +1,229 @@
+"""
+Content-addressed on-disk cache of generation results.
+
+A result is stored under the SHA-256 of everything that determines it: the
+normalized request, the rendered prompt, the model id and the skill (file
+content hash or Skills API id). Re-running the benchmark after changing
+only evaluation code then reuses every item whose inputs are unchanged and
+pays only for the rows that actually changed.
+
+Entries are JSON files under <root>/<key[:2]>/<key>.json. Reads touch the
+file's mtime, so eviction (when total size or entry count exceeds its
+bound) drops the least recently used entries first; entries older than the
+TTL are treated as misses. Only successful results are cached.
+
+Modes: "use" (read and write), "refresh" (ignore hits, overwrite), "off".
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("use", "refresh", "off")
+
+
+def cache_key(**parts: Any) -> str:
+    """Stable hash of the given parts (dicts are key-sorted before hashing)."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's bytes ("" if it does not exist)."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return ""
+
+
+class GenerationCache:
+    """Size/count-bounded LRU cache of JSON results on disk, with optional TTL."""
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        mode: str = "use",
+        max_bytes: int | None = 500 * 1024 * 1024,
+        max_entries: int | None = None,
+        ttl: float | None = None,
+    ) -> None:
+        if mode not in CACHE_MODES:
+            raise ValueError(f"cache mode must be one of {CACHE_MODES}, got {mode!r}")
+        self.root = Path(root)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (size, last used); loaded from disk on first use
+        self._index: dict[str, tuple[int, float]] | None = None
+        self._total = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> dict[str, tuple[int, float]]:
+        if self._index is None:
+            self._index = {}
+            for path in self.root.glob("*/*.json"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                self._index[path.stem] = (st.st_size, st.st_mtime)
+            self._total = sum(size for size, _ in self._index.values())
+        return self._index
+
+    def _drop(self, key: str) -> None:
+        index = self._load_index()
+        size, _ = index.pop(key, (0, 0.0))
+        self._total -= size
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def get(self, key: str) -> dict | None:
+        """Cached result for key, or None (always None unless mode is "use")."""
+        if self.mode != "use":
+            return None
+        path = self._path(key)
+        with self._lock:
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+            if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+                self._drop(key)
+                self.misses += 1
+                return None
+            now = time.time()
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            index = self._load_index()
+            if key in index:
+                index[key] = (index[key][0], now)
+            self.hits += 1
+        return entry.get("result")
+
+    def put(self, key: str, result: dict) -> None:
+        """Store a successful result (no-op when mode is "off")."""
+        if self.mode == "off" or not result.get("success"):
+            return
+        data = json.dumps({"key": key, "created": time.time(), "result": result}, ensure_ascii=False)
+        path = self._path(key)
+        with self._lock:
+            index = self._load_index()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(data, encoding="utf-8")
+            tmp.replace(path)
+            old_size, _ = index.get(key, (0, 0.0))
+            size = len(data.encode("utf-8"))
+            index[key] = (size, time.time())
+            self._total += size - old_size
+            self._evict()
+
+    def _evict(self) -> None:
+        index = self._load_index()
+        over = lambda: (  # noqa: E731
+            (self.max_bytes is not None and self._total > self.max_bytes)
+            or (self.max_entries is not None and len(index) > self.max_entries)
+        )
+        if not over():
+            return
+        for key, _ in sorted(index.items(), key=lambda kv: kv[1][1]):
+            if not over():
+                break
+            self._drop(key)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            index = self._load_index()
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(index),
+                "bytes": self._total,
+            }
+
+
+_CACHE: GenerationCache | None = None
+_CONFIGURED = False
+
+
+def configure_generation_cache(
+    mode: str | None = None,
+    root: Path | None = None,
+    **kwargs: Any,
+) -> GenerationCache | None:
+    """Set the process-wide cache used by the generators ("off" disables it)."""
+    global _CACHE, _CONFIGURED
+    _CONFIGURED = True
+    mode = mode or config.CCAPI_GEN_CACHE
+    if mode == "off":
+        _CACHE = None
+        return None
+    kwargs.setdefault("max_bytes", int(config.CCAPI_GEN_CACHE_MAX_MB * 1024 * 1024) or None)
+    kwargs.setdefault("ttl", config.CCAPI_GEN_CACHE_TTL_DAYS * 86400 or None)
+    _CACHE = GenerationCache(root or config.CCAPI_GEN_CACHE_DIR, mode=mode, **kwargs)
+    return _CACHE
+
+
+def get_generation_cache() -> GenerationCache | None:
+    """The process-wide cache (configured from CCAPI_GEN_CACHE on first use)."""
+    if not _CONFIGURED:
+        configure_generation_cache()
+    return _CACHE
+
+
+def generation_key(request: dict, prompt: str, *, model: str, generation_mode: str, **extra: Any) -> str:
+    """
+    Cache key for one generation call ("" when caching is off).
+
+    extra: anything else the output depends on (e.g. skill=<skill file hash
+        or Skills API id>), so changing it invalidates the entry.
+    """
+    if get_generation_cache() is None:
+        return ""
+    return cache_key(request=request, prompt=prompt, model=model, generation_mode=generation_mode, **extra)
+
+
+def cached_generation(key: str) -> dict | None:
+    """Cached result for key (marked "cached": True), or None."""
+    cache = get_generation_cache()
+    if not key or cache is None:
+        return None
+    result = cache.get(key)
+    if result is None:
+        return None
+    return {**result, "cached": True}
+
+
+def store_generation(key: str, result: dict) -> dict:
+    """Cache result under key if it succeeded; returns result unchanged."""
+    cache = get_generation_cache()
+    if key and cache is not None:
+        try:
+            cache.put(key, result)
+        except OSError as e:
+            logger.warning("Could not write generation cache entry %s: %s", key[:12], e)
+    return result
@@ -0,0 +1,232 @@
+"""
+Incremental JSON extraction for streamed model output.
+
+IncrementalJSONScanner is fed text deltas as they arrive and reports the
+first complete top-level JSON object the moment its closing brace is seen,
+so a streaming caller can stop reading (and stop paying for output tokens)
+while the model is still writing prose after the JSON. Braces inside JSON
+strings are ignored; a balanced span that does not parse (e.g. "{...}" in
+prose before the real object) is skipped and scanning continues. With
+require=("id", "content") only an item (or an {"items": [...]} wrapper)
+counts, so an object echoed in a preamble ('Input: {"grade": "3"}') does
+not end the stream; if nothing matches, callers fall back to extract_json
+on the full text.
+
+extract_json() is the one-shot counterpart for complete responses and long
+agent transcripts: a single string-aware pass finds every balanced object,
+json.JSONDecoder.raw_decode validates them in place, and the first one with
+the required keys wins (fenced ```json blocks first).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+
+
+class IncrementalJSONScanner:
+    """
+    Find the first complete top-level JSON object in text fed in chunks.
+
+    require: keys the object must have (directly, or on the entries of a
+        wrapped list, as in extract_json); an object without them is
+        searched for inner ones and scanning continues.
+    """
+
+    def __init__(self, require: Iterable[str] | None = None) -> None:
+        self._keys = tuple(require or ())
+        self._text = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.result: str | None = None
+        self.value: Any = None
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        return self._text
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> str | None:
+        """Add a delta; returns the object's JSON text once it has closed, else None."""
+        if self.result is not None:
+            return self.result
+        self._text += chunk
+        text = self._text
+        i = self._pos
+        n = len(text)
+        while i < n:
+            if self._start < 0:
+                # Outside any object: jump straight to the next "{"
+                j = text.find("{", i)
+                if j < 0:
+                    i = n
+                    break
+                self._start, self._depth, i = j, 1, j + 1
+                continue
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = text[self._start : i + 1]
+                    try:
+                        value = json.loads(candidate)
+                    except json.JSONDecodeError:
+                        value = None
+                    if value is None or (self._keys and not _has_keys(value, self._keys)):
+                        # Not JSON after all (or not what we want); resume right after its opening brace
+                        i = self._start + 1
+                        self._start = -1
+                        continue
+                    self.value = value
+                    self.result = candidate
+                    self._pos = i + 1
+                    return candidate
+            i += 1
+        self._pos = i
+        return None
+
+
+# Inside an object: a whole JSON string literal, a brace, or a stray quote
+# (one whose string does not close on the same line, so it is prose)
+_TOKEN_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|[{}]|"')
+# An object starts with a key or is empty; "{standard}" in prose is skipped unparsed
+_OBJECT_START_RE = re.compile(r'\{\s*["}]')
+_FENCE_BEFORE_RE = re.compile(r"```[A-Za-z]*[ \t]*\r?\n?[ \t]*$")
+_DECODER = json.JSONDecoder()
+
+
+class _Candidate(NamedTuple):
+    start: int
+    end: int
+    value: Any
+
+
+def _object_spans(text: str) -> list[tuple[int, int]]:
+    """(start, end) of every balanced {...} in text, ignoring braces in JSON strings, sorted outermost first."""
+    spans: list[tuple[int, int]] = []
+    stack: list[int] = []
+    pos = 0
+    n = len(text)
+    while pos < n:
+        if not stack:
+            pos = text.find("{", pos)
+            if pos < 0:
+                break
+            stack.append(pos)
+            pos += 1
+            continue
+        m = _TOKEN_RE.search(text, pos)
+        if m is None:
+            break
+        tok = m.group()
+        pos = m.end()
+        if tok == "{":
+            stack.append(m.start())
+        elif tok == "}":
+            spans.append((stack.pop(), pos))
+        elif tok == '"':
+            # Unterminated string: these braces were prose, not JSON
+            stack.clear()
+    spans.sort(key=lambda span: (span[0], -span[1]))
+    return spans
+
+
+def _candidates(
+    text: str,
+    spans: list[tuple[int, int]],
+    needles: tuple[str, ...] = (),
+    accept: Callable[[Any], bool] | None = None,
+) -> Iterator[_Candidate]:
+    """
+    Outermost acceptable objects, left to right; a span that fails to parse
+    (or is not accepted) is searched for inner ones.
+
+    needles: substrings a span must contain to be decoded at all (a cheap
+        pre-filter; spans without them are skipped, not searched inside).
+    """
+    covered = 0
+    for start, end in spans:
+        if start < covered or not _OBJECT_START_RE.match(text, start):
+            continue
+        # Decode the span on its own: JSONDecodeError counts lines from the
+        # start of the document, which would make every failure O(len(text))
+        span = text[start:end]
+        if needles and not all(n in span for n in needles):
+            continue
+        try:
+            value, stop = _DECODER.raw_decode(span)
+        except json.JSONDecodeError:
+            continue
+        if stop != len(span) or (accept is not None and not accept(value)):
+            continue
+        covered = end
+        yield _Candidate(start, end, value)
+
+
+def _has_keys(value: Any, keys: tuple[str, ...]) -> bool:
+    """value has all keys, or wraps a list of such objects (e.g. {"items": [...]})."""
+    if not isinstance(value, dict):
+        return False
+    if all(k in value for k in keys):
+        return True
+    return any(
+        isinstance(v, list) and any(isinstance(e, dict) and all(k in e for k in keys) for e in v)
+        for v in value.values()
+    )
+
+
+def extract_json(text: str, require: Iterable[str] | None = None) -> str:
+    """
+    JSON object text from a model response or transcript, in linear time.
+
+    require: keys the object must have (directly, or on the entries of a
+        wrapped list such as {"items": [...]}). Preference order: a
+        response that is a JSON array ([{"id": ...}, ...], returned whole
+        if any entry has the keys), first fenced object with the keys,
+        first object with the keys, first parseable object. With nothing
+        parseable the stripped text is returned unchanged, so json.loads()
+        reports the error.
+    """
+    text = text.strip()
+    if not text:
+        return ""
+    keys = tuple(require or ())
+    if text.startswith("["):
+        try:
+            value, stop = _DECODER.raw_decode(text)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if not keys or _has_keys({"items": value}, keys):
+                return text[:stop]
+    spans = _object_spans(text)
+    match = None
+    if keys:
+        needles = tuple(f'"{k}"' for k in keys)
+        for cand in _candidates(text, spans, needles, lambda value: _has_keys(value, keys)):
+            if _FENCE_BEFORE_RE.search(text, max(0, cand.start - 32), cand.start):
+                match = cand
+                break
+            if match is None:
+                match = cand
+    best = match or next(_candidates(text, spans), None)
+    return text[best.start : best.end] if best else text
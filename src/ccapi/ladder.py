@@ -0,0 +1,165 @@
+"""
+Difficulty-ladder generation: easy/medium/hard for one standard in one call.
+
+The benchmark lists each substandard once per difficulty. Generating them
+separately repeats the curriculum lookup, skill prompt and request context
+three times. ladder_groups() groups benchmark requests by substandard_id
+(at most one row per difficulty), and generate_ladder() asks for all of a
+group's difficulties in a single model call, then splits the response back
+into one generate_one-shaped result per row. Rows whose item is missing from
+the combined response are regenerated on their own.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from .formatters import request_quantity
+from .pipeline import _utc_ts, generate_one
+from .pipeline_with_curriculum import generate_one_with_curriculum
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTY_ORDER = ("easy", "medium", "hard")
+
+
+def _difficulty(request: dict) -> str:
+    return str(request.get("difficulty") or "medium").strip().lower()
+
+
+def ladder_groups(requests: list[dict]) -> list[list[int]]:
+    """
+    Group request indices by substandard_id, one row per difficulty per group.
+
+    Groups are ordered by first appearance; within a group, indices follow
+    DIFFICULTY_ORDER. Requests asking for more than one question ("quantity")
+    and repeated (standard, difficulty) rows get groups of their own.
+    """
+    groups: list[list[int]] = []
+    open_groups: dict[str, list[list[int]]] = {}
+    for i, req in enumerate(requests):
+        sid = (req.get("skills") or {}).get("substandard_id", "")
+        if not sid or request_quantity(req) > 1:
+            groups.append([i])
+            continue
+        diff = _difficulty(req)
+        for group in open_groups.setdefault(sid, []):
+            if all(_difficulty(requests[j]) != diff for j in group):
+                group.append(i)
+                break
+        else:
+            group = [i]
+            open_groups[sid].append(group)
+            groups.append(group)
+
+    rank = {d: n for n, d in enumerate(DIFFICULTY_ORDER)}
+    for group in groups:
+        group.sort(key=lambda j: (rank.get(_difficulty(requests[j]), len(rank)), j))
+    return groups
+
+
+def _ladder_instruction(difficulties: list[str]) -> str:
+    ordered = ", ".join(difficulties)
+    return (
+        f"\n\nDIFFICULTY LADDER: produce exactly one question per difficulty, in this order: {ordered}. "
+        "Ignore the request's single \"difficulty\" field. Include the difficulty in each item's id "
+        '(e.g. "..._easy_001") and calibrate the items against each other: each step must be '
+        "clearly harder than the one before it while assessing the same standard."
+    )
+
+
+def _split_items(items: list[dict], difficulties: list[str]) -> dict[str, dict]:
+    """Assign items to difficulties by the difficulty named in the id, else by position."""
+    assigned: dict[str, dict] = {}
+    leftover = []
+    for item in items:
+        item_id = str(item.get("id") or "").lower()
+        match = next((d for d in difficulties if d in item_id and d not in assigned), None)
+        if match:
+            assigned[match] = item
+        else:
+            leftover.append(item)
+    for diff in difficulties:
+        if diff not in assigned and leftover:
+            assigned[diff] = leftover.pop(0)
+    return assigned
+
+
+async def generate_ladder(
+    requests: list[dict],
+    *,
+    use_curriculum: bool = False,
+    curriculum_path: Path | None = None,
+    skill_id: str | None = None,
+    model: str | None = None,
+) -> list[dict]:
+    """
+    Generate one item per request for a group of same-standard requests in one call.
+
+    requests: rows for one substandard_id with distinct difficulties (see ladder_groups).
+
+    Returns one result per request, in order, shaped like generate_one's
+    ({"error","success","timestamp","generatedContent","generation_mode"}).
+    """
+    if len(requests) == 1:
+        return [await _generate_single(requests[0], use_curriculum, curriculum_path, skill_id, model)]
+
+    difficulties = [_difficulty(r) for r in requests]
+    combined = {k: v for k, v in requests[0].items() if k != "quantity"}
+    combined["difficulty"] = "/".join(difficulties)
+    combined["quantity"] = len(requests)
+    instruction = _ladder_instruction(difficulties)
+
+    if use_curriculum:
+        res = await generate_one_with_curriculum(
+            combined,
+            curriculum_path=curriculum_path,
+            skill_id=skill_id,
+            model=model,
+            extra_instruction=instruction,
+        )
+    else:
+        res = await generate_one(combined, skill_id=skill_id, model=model, extra_instruction=instruction)
+
+    generation_mode = res.get("generation_mode")
+    items = res.get("generatedContent", {}).get("generated_content", []) if res.get("success") else []
+    by_difficulty = _split_items(items, difficulties)
+
+    results = []
+    for req, diff in zip(requests, difficulties):
+        item = by_difficulty.get(diff)
+        if item is None:
+            logger.warning(
+                "Ladder call for %s missing %s item (%s); generating it alone",
+                (req.get("skills") or {}).get("substandard_id", "?"),
+                diff,
+                res.get("error") or "short response",
+            )
+            results.append(await _generate_single(req, use_curriculum, curriculum_path, skill_id, model))
+            continue
+        result = {
+            "error": None,
+            "success": True,
+            "timestamp": _utc_ts(),
+            "generatedContent": {"generated_content": [{**item, "request": req}]},
+            "generation_mode": f"{generation_mode}_ladder",
+        }
+        if "model_tier" in res:
+            result["model_tier"] = res["model_tier"]
+        results.append(result)
+    return results
+
+
+async def _generate_single(
+    request: dict,
+    use_curriculum: bool,
+    curriculum_path: Path | None,
+    skill_id: str | None,
+    model: str | None,
+) -> dict:
+    if use_curriculum:
+        return await generate_one_with_curriculum(
+            request, curriculum_path=curriculum_path, skill_id=skill_id, model=model
+        )
+    return await generate_one(request, skill_id=skill_id, model=model)
@@ -10,12 +10,19 @@ from __future__ import annotations
 
 import json
 import logging
-import re
 from datetime import datetime, timezone
 from typing import Any
 
 from . import config
-from .formatters import normalize_content, parsed_to_item
+from .anthropic_client import get_async_client
+from .formatters import normalize_content, output_token_budget, parsed_to_items, request_quantity
+from .gen_cache import cached_generation, file_digest, generation_key, store_generation
+from .json_extract import IncrementalJSONScanner, extract_json
+from .resilience import call_with_retry, transient_error_fields
+from .router import get_router
+from .schemas import emit_tool, forced_tool_choice, question_type, tool_input
+from .usage import cached_system, record_usage
+from .validation import result_issues
 
 logger = logging.getLogger(__name__)
 
@@ -24,60 +31,6 @@ def _utc_ts() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
 
 
-def _extract_json(text: str) -> str:
-    """Take first JSON object from text, optionally inside ```json ... ```.
-    
-    Looks for JSON with "id" and "content" keys (our expected shape).
-    Tries: code fences first, then plain JSON object.
-    """
-    text = text.strip()
-    if not text:
-        return ""
-    
-    # Try code fence first (```json ... ``` or ``` ... ```)
-    # Find the code fence, then extract balanced JSON inside
-    fence_match = re.search(r"```(?:json)?\s*(\{)", text, re.MULTILINE)
-    if fence_match:
-        start_pos = fence_match.end(1) - 1  # Position of opening {
-        # Find matching closing } by counting braces
-        depth = 0
-        for i in range(start_pos, len(text)):
-            if text[i] == "{":
-                depth += 1
-            elif text[i] == "}":
-                depth -= 1
-                if depth == 0:
-                    candidate = text[start_pos:i+1].strip()
-                    # Quick validation: should have "id" and "content"
-                    if '"id"' in candidate and '"content"' in candidate:
-                        return candidate
-                    break
-    
-    # Try to find JSON object with "id" and "content" anywhere in text
-    # Look for { ... "id" ... "content" ... }
-    pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*"id"[\s\S]*?"content"[\s\S]*?\}'
-    m = re.search(pattern, text)
-    if m:
-        candidate = m.group(0)
-        # Validate it's balanced braces
-        if candidate.count("{") == candidate.count("}"):
-            return candidate
-    
-    # Fallback: find first {...} (original logic)
-    start = text.find("{")
-    if start < 0:
-        return text
-    depth = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : i + 1]
-    return text
-
-
 def _get_text_from_message_content(content: list) -> str:
     """Extract combined text from Message content blocks.
     
@@ -118,23 +71,216 @@ def _get_text_from_message_content(content: list) -> str:
     return ""
 
 
-async def generate_one(request: dict, *, skill_id: str | None = None, model: str | None = None) -> dict:
+def _quantity_instruction(quantity: int) -> str:
+    """Extra user-message text asking for `quantity` questions in one response ("" when 1)."""
+    if quantity <= 1:
+        return ""
+    return (
+        f"\n\nGenerate {quantity} DISTINCT questions for this request in this single response. "
+        'Return ONE JSON object of the form {"items": [ <question>, ... ]} where each <question> '
+        "has the usual \"id\" and \"content\" fields. Every id must be unique, and no two questions "
+        "may share the same passage, stem, or correct answer."
+    )
+
+
+def _user_content(request: dict, extra_instruction: str | None = None) -> str:
+    """User message body for one generation request (without curriculum context)."""
+    return f"""Generate the MCQ question for this request. Return the JSON directly in your response (not in a file).
+
+{json.dumps(request, indent=2)}{_quantity_instruction(request_quantity(request))}{extra_instruction or ""}"""
+
+
+def _fallback_params(
+    model: str,
+    quantity: int,
+    skill_content: str,
+    user_content: str,
+    tool: dict[str, Any] | None = None,
+) -> dict[str, Any]:
     """
-    Generate one ELA MCQ.
+    messages.create kwargs for fallback mode (also the params of a Message Batches request).
+
+    tool: emit tool for "tool" output mode (see schemas); the call is forced.
+    """
+    params = dict(
+        model=model,
+        max_tokens=output_token_budget(quantity),
+        system=_fallback_system(skill_content),
+        messages=[{"role": "user", "content": f"Execute the skill with this input:\n\n{user_content}"}],
+    )
+    if tool is not None:
+        params["tools"] = [tool]
+        params["tool_choice"] = forced_tool_choice(tool)
+    return params
+
+
+def _emit_tool(request: dict, output_mode: str) -> dict[str, Any] | None:
+    """The forced emit tool for "tool" output mode, else None."""
+    if output_mode != "tool":
+        return None
+    return emit_tool(question_type(request), request_quantity(request))
+
+
+def _result_from_text(raw: str, request: dict, generation_mode: str, streamed_json: str = "") -> dict:
+    """Parse model text into the generate_one result envelope."""
+    if not raw:
+        return {
+            "error": "Empty model response",
+            "success": False,
+            "timestamp": _utc_ts(),
+            "generatedContent": {"generated_content": []},
+            "generation_mode": generation_mode,
+        }
 
-    request: { "type":"mcq", "grade","skills", "subject","curriculum","difficulty" }
+    js = streamed_json or extract_json(raw, require=("id", "content"))
+    try:
+        parsed = json.loads(js)
+    except json.JSONDecodeError as e:
+        return {
+            "error": f"Invalid JSON: {e}",
+            "success": False,
+            "timestamp": _utc_ts(),
+            "generatedContent": {"generated_content": []},
+            "generation_mode": generation_mode,
+        }
+    return _result_from_parsed(parsed, request, generation_mode)
+
+
+def _result_from_message(resp: Any, request: dict, generation_mode: str, tool: dict[str, Any]) -> dict:
+    """Result envelope from a forced emit-tool call (no text parsing)."""
+    parsed = tool_input(getattr(resp, "content", None), tool["name"])
+    if parsed is None:
+        return {
+            "error": f"No {tool['name']} call in response (stop_reason={getattr(resp, 'stop_reason', None)})",
+            "success": False,
+            "timestamp": _utc_ts(),
+            "generatedContent": {"generated_content": []},
+            "generation_mode": generation_mode,
+        }
+    return _result_from_parsed(parsed, request, generation_mode)
+
+
+def _result_from_parsed(parsed: Any, request: dict, generation_mode: str) -> dict:
+    """Result envelope from parsed model output (one item, a list, or {"items": [...]})."""
+    quantity = request_quantity(request)
+    items = parsed_to_items(parsed, request, limit=quantity)
+    if not items:
+        return {
+            "error": "No questions with content in model response",
+            "success": False,
+            "timestamp": _utc_ts(),
+            "generatedContent": {"generated_content": []},
+            "generation_mode": generation_mode,
+        }
+    if len(items) < quantity:
+        substandard_id = (request.get("skills") or {}).get("substandard_id", "?")
+        logger.warning("Requested %d questions for %s, model returned %d", quantity, substandard_id, len(items))
+    return {
+        "error": None,
+        "success": True,
+        "timestamp": _utc_ts(),
+        "generatedContent": {"generated_content": items},
+        "generation_mode": generation_mode,
+    }
+
+
+async def _stream_first_json(client: Any, **kwargs: Any) -> tuple[str, str, Any]:
+    """
+    Stream a messages call and stop as soon as the first top-level JSON object closes.
+
+    Returns (json_text, text_so_far, message_snapshot); json_text is "" if the
+    stream ended without a complete item object. Leaving the stream context early closes the
+    HTTP response, so output the model writes after the JSON is never
+    generated or billed.
+    """
+    scanner = IncrementalJSONScanner(require=("id", "content"))
+    async with client.messages.stream(**kwargs) as stream:
+        async for event in stream:
+            if getattr(event, "type", None) == "text" and scanner.feed(event.text):
+                break
+        snapshot = getattr(stream, "current_message_snapshot", None)
+    # Usage as of the last event seen (output_tokens undercounts on early exit)
+    record_usage(snapshot)
+    return scanner.result or "", scanner.text, snapshot
+
+
+def _skill_fingerprint(skill_id: str | None) -> str:
+    """Identifies the skill behind a generation (Skills API id, else SKILL.md content hash)."""
+    return f"skill_id:{skill_id}" if skill_id else f"sha256:{file_digest(config.SKILL_PATH)}"
+
+
+def _fallback_system(skill_content: str) -> list[dict[str, Any]]:
+    """
+    System prompt for fallback mode: the skill definition as one cacheable block.
+
+    Kept byte-identical across requests (per-request data such as curriculum
+    context goes in the user message) so every call after the first reads
+    the skill prefix from the prompt cache.
+    """
+    return cached_system(
+        "You are executing a Claude Code Skill. Follow the instructions in the skill definition exactly.\n\n"
+        + skill_content
+        + "\n\nGenerate your response following the skill's output schema. Respond with ONLY the JSON object, no markdown or extra text."
+    )
+
+
+async def generate_one(
+    request: dict,
+    *,
+    skill_id: str | None = None,
+    model: str | None = None,
+    extra_instruction: str | None = None,
+    stream: bool | None = None,
+    output_mode: str | None = None,
+) -> dict:
+    """
+    Generate one ELA MCQ, or request["quantity"] distinct MCQs from a single model call.
+
+    request: { "type":"mcq", "grade","skills", "subject","curriculum","difficulty", "quantity"? }
     skill_id: override; default from config CCAPI_ELA_MCQ_SKILL_ID.
-    model: override; default from config CCAPI_LLM_MODEL.
+    model: override; default from config CCAPI_LLM_MODEL, tried after
+        CCAPI_FAST_MODEL when the model cascade is on (router.py). An
+        explicit model bypasses the cascade.
+    extra_instruction: appended to the user message (e.g. the difficulty ladder).
+    stream: fallback mode only; stream the response and return as soon as the
+        JSON item is complete (default from config CCAPI_STREAM).
+    output_mode: fallback mode only; "text" parses JSON out of the reply,
+        "tool" forces an emit_question call whose input is the item (default
+        from config CCAPI_OUTPUT_MODE; "tool" does not stream).
 
     Returns:
         {
           "error": None | str,
           "success": bool,
           "timestamp": "ISO8601Z",
-          "generatedContent": { "generated_content": [ { "id", "content", "request" } ] }
+          "generatedContent": { "generated_content": [ { "id", "content", "request" }, ... ] },
+          "model_tier": "fast" | "full"   # only with the model cascade on
         }
     """
-    model = model or config.CCAPI_LLM_MODEL
+    options = dict(skill_id=skill_id, extra_instruction=extra_instruction, stream=stream, output_mode=output_mode)
+    router = get_router()
+    if model is None and router.enabled:
+        result, tier = await router.cascade(
+            request,
+            lambda m: _generate_one(request, model=m, **options),
+            lambda r: not result_issues(r),
+        )
+        return {**result, "model_tier": tier}
+    return await _generate_one(request, model=model or config.CCAPI_LLM_MODEL, **options)
+
+
+async def _generate_one(
+    request: dict,
+    *,
+    model: str,
+    skill_id: str | None,
+    extra_instruction: str | None,
+    stream: bool | None,
+    output_mode: str | None,
+) -> dict:
+    quantity = request_quantity(request)
+    stream = config.CCAPI_STREAM if stream is None else stream
+    output_mode = output_mode or config.CCAPI_OUTPUT_MODE
     sid = skill_id or config.CCAPI_ELA_MCQ_SKILL_ID
     use_skills_api = bool(sid and config.ANTHROPIC_API_KEY)
     generation_mode = "skills_api" if use_skills_api else "fallback"
@@ -159,19 +305,31 @@ async def generate_one(request: dict, *, skill_id: str | None = None, model: str
             "generation_mode": "unknown",
         }
 
-    client = anthropic.AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY)
+    client = get_async_client(config.ANTHROPIC_API_KEY)
     # For Skills API: explicitly request JSON in response, not in a file
-    user_content = f"""Generate the MCQ question for this request. Return the JSON directly in your response (not in a file).
-
-{json.dumps(request, indent=2)}"""
+    user_content = _user_content(request, extra_instruction)
+    cache_key = generation_key(
+        request,
+        user_content,
+        model=model,
+        generation_mode=generation_mode,
+        skill=_skill_fingerprint(sid if use_skills_api else None),
+        output_mode=output_mode,
+    )
+    cached = cached_generation(cache_key)
+    if cached is not None:
+        return cached
+    streamed_json = ""
 
     if use_skills_api:
         # Skills API: container + code_execution tool
         # Explicit user message requests JSON directly (not in a file)
         try:
-            resp = await client.beta.messages.create(
+            resp = await call_with_retry(
+                "generate",
+                client.beta.messages.create,
                 model=model,
-                max_tokens=4096,
+                max_tokens=output_token_budget(quantity),
                 betas=["code-execution-2025-08-25", "skills-2025-10-02"],
                 container={
                     "skills": [{"type": "custom", "skill_id": sid, "version": "latest"}],
@@ -187,7 +345,9 @@ async def generate_one(request: dict, *, skill_id: str | None = None, model: str
                 "timestamp": _utc_ts(),
                 "generatedContent": {"generated_content": []},
                 "generation_mode": generation_mode,
+                **transient_error_fields(e),
             }
+        record_usage(resp)
         raw = _get_text_from_message_content(resp.content)
         # If still empty, check stop_reason and log for debugging
         if not raw:
@@ -210,18 +370,14 @@ async def generate_one(request: dict, *, skill_id: str | None = None, model: str
                 "generatedContent": {"generated_content": []},
                 "generation_mode": generation_mode,
             }
-        system = (
-            "You are executing a Claude Code Skill. Follow the instructions in the skill definition exactly.\n\n"
-            + skill_content
-            + "\n\nGenerate your response following the skill's output schema. Respond with ONLY the JSON object, no markdown or extra text."
-        )
+        tool = _emit_tool(request, output_mode)
+        request_kwargs = _fallback_params(model, quantity, skill_content, user_content, tool)
         try:
-            resp = await client.messages.create(
-                model=model,
-                max_tokens=4096,
-                system=system,
-                messages=[{"role": "user", "content": f"Execute the skill with this input:\n\n{user_content}"}],
-            )
+            if stream and tool is None:
+                streamed_json, raw, _ = await call_with_retry("generate", _stream_first_json, client, **request_kwargs)
+                resp = None
+            else:
+                resp = await call_with_retry("generate", client.messages.create, **request_kwargs)
         except Exception as e:
             logger.exception("Messages create failed")
             return {
@@ -230,42 +386,19 @@ async def generate_one(request: dict, *, skill_id: str | None = None, model: str
                 "timestamp": _utc_ts(),
                 "generatedContent": {"generated_content": []},
                 "generation_mode": generation_mode,
+                **transient_error_fields(e),
             }
-        # resp.content is list of ContentBlock
-        raw = _get_text_from_message_content(resp.content) if hasattr(resp.content, "__iter__") else ""
-        if not raw and hasattr(resp, "content"):
-            # Classic Messages API: content can be a list of blocks
-            for b in (resp.content or []):
-                if getattr(b, "type", None) == "text":
-                    raw = getattr(b, "text", "") or ""
-                    break
-
-    if not raw:
-        return {
-            "error": "Empty model response",
-            "success": False,
-            "timestamp": _utc_ts(),
-            "generatedContent": {"generated_content": []},
-            "generation_mode": generation_mode,
-        }
+        if resp is not None:
+            record_usage(resp)
+            if tool is not None:
+                return store_generation(cache_key, _result_from_message(resp, request, generation_mode, tool))
+            # resp.content is list of ContentBlock
+            raw = _get_text_from_message_content(resp.content) if hasattr(resp.content, "__iter__") else ""
+            if not raw and hasattr(resp, "content"):
+                # Classic Messages API: content can be a list of blocks
+                for b in (resp.content or []):
+                    if getattr(b, "type", None) == "text":
+                        raw = getattr(b, "text", "") or ""
+                        break
 
-    js = _extract_json(raw)
-    try:
-        parsed = json.loads(js)
-    except json.JSONDecodeError as e:
-        return {
-            "error": f"Invalid JSON: {e}",
-            "success": False,
-            "timestamp": _utc_ts(),
-            "generatedContent": {"generated_content": []},
-            "generation_mode": generation_mode,
-        }
-
-    item = parsed_to_item(parsed, request)
-    return {
-        "error": None,
-        "success": True,
-        "timestamp": _utc_ts(),
-        "generatedContent": {"generated_content": [item]},
-        "generation_mode": generation_mode,
-    }
+    return store_generation(cache_key, _result_from_text(raw, request, generation_mode, streamed_json))
@@ -11,27 +11,73 @@ This is the "normal way" - Python controls the workflow, not Claude.
 
 from __future__ import annotations
 
-import json
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from . import config
+from .anthropic_client import get_async_client
 from .curriculum_lookup import lookup_curriculum
 from .populate_curriculum import populate_curriculum_entry
-from .formatters import normalize_content, parsed_to_item
-from .pipeline import _utc_ts, _extract_json, _get_text_from_message_content
+from .formatters import normalize_content, output_token_budget, request_quantity
+from .gen_cache import cached_generation, generation_key, store_generation
+from .pipeline import (
+    _emit_tool,
+    _fallback_params,
+    _get_text_from_message_content,
+    _result_from_message,
+    _result_from_text,
+    _skill_fingerprint,
+    _stream_first_json,
+    _user_content,
+    _utc_ts,
+)
+from .resilience import call_with_retry, transient_error_fields
+from .router import get_router
+from .usage import record_usage
+from .validation import result_issues
 
 logger = logging.getLogger(__name__)
 
 
+def _curriculum_context(substandard_id: str, curriculum_info: dict) -> str:
+    """Curriculum section appended to the user message ("" if the standard is not found)."""
+    if not curriculum_info.get("found"):
+        return ""
+    boundaries = curriculum_info.get('assessment_boundaries', 'Not specified')
+    misconceptions = curriculum_info.get('common_misconceptions', [])
+    
+    curriculum_context = f"""
+
+CURRICULUM CONTEXT (from curriculum.md for substandard_id: {substandard_id}):"""
+    
+    if boundaries and boundaries != 'Not specified':
+        curriculum_context += f"""
+- Assessment Boundaries: {boundaries}"""
+    
+    if misconceptions:
+        curriculum_context += f"""
+- Common Misconceptions:
+{chr(10).join([f"  * {m}" for m in misconceptions])}"""
+    
+    curriculum_context += """
+
+Use this context to:
+1. Ensure your question aligns with the assessment boundaries
+2. Create distractors that reflect the common misconceptions listed above"""
+    return curriculum_context
+
+
 async def generate_one_with_curriculum(
     request: dict,
     *,
     curriculum_path: Path | None = None,
     skill_id: str | None = None,
     model: str | None = None,
+    extra_instruction: str | None = None,
+    stream: bool | None = None,
+    output_mode: str | None = None,
 ) -> dict:
     """
     Generate one ELA MCQ with curriculum context.
@@ -51,11 +97,18 @@ async def generate_one_with_curriculum(
             },
             "subject": "ela",
             "curriculum": "common core",
-            "difficulty": "easy"
+            "difficulty": "easy",
+            "quantity": 1  # optional; N distinct MCQs from one model call
         }
         curriculum_path: Path to curriculum.md (default: option_c_agent_sdk/data/curriculum.md)
         skill_id: Override skill ID (default from config)
-        model: Override model (default from config)
+        model: Override model (default from config; an explicit model bypasses
+            the CCAPI_FAST_MODEL cascade, see router.py)
+        extra_instruction: Appended to the request part of the user message
+        stream: Fallback mode only; return as soon as the streamed JSON item
+            is complete (default from config CCAPI_STREAM)
+        output_mode: Fallback mode only; "text" (parse JSON from the reply) or
+            "tool" (forced emit_question call; default from config CCAPI_OUTPUT_MODE)
     
     Returns:
         {
@@ -63,10 +116,41 @@ async def generate_one_with_curriculum(
             "success": bool,
             "timestamp": "ISO8601Z",
             "generatedContent": { "generated_content": [ { "id", "content", "request" } ] },
-            "generation_mode": "skills_api_with_curriculum" | "fallback_with_curriculum"
+            "generation_mode": "skills_api_with_curriculum" | "fallback_with_curriculum",
+            "model_tier": "fast" | "full"  # only with the model cascade on
         }
     """
-    model = model or config.CCAPI_LLM_MODEL
+    options = dict(
+        curriculum_path=curriculum_path,
+        skill_id=skill_id,
+        extra_instruction=extra_instruction,
+        stream=stream,
+        output_mode=output_mode,
+    )
+    router = get_router()
+    if model is None and router.enabled:
+        result, tier = await router.cascade(
+            request,
+            lambda m: _generate_one_with_curriculum(request, model=m, **options),
+            lambda r: not result_issues(r),
+        )
+        return {**result, "model_tier": tier}
+    return await _generate_one_with_curriculum(request, model=model or config.CCAPI_LLM_MODEL, **options)
+
+
+async def _generate_one_with_curriculum(
+    request: dict,
+    *,
+    model: str,
+    curriculum_path: Path | None,
+    skill_id: str | None,
+    extra_instruction: str | None,
+    stream: bool | None,
+    output_mode: str | None,
+) -> dict:
+    quantity = request_quantity(request)
+    stream = config.CCAPI_STREAM if stream is None else stream
+    output_mode = output_mode or config.CCAPI_OUTPUT_MODE
     sid = skill_id or config.CCAPI_ELA_MCQ_SKILL_ID
     use_skills_api = bool(sid and config.ANTHROPIC_API_KEY)
     generation_mode = "skills_api_with_curriculum" if use_skills_api else "fallback_with_curriculum"
@@ -111,45 +195,30 @@ async def generate_one_with_curriculum(
     curriculum_info = lookup_curriculum(substandard_id, curriculum_path)
     
     # STEP 3: Build prompt with curriculum context
-    base_user_content = f"""Generate the MCQ question for this request. Return the JSON directly in your response (not in a file).
-
-{json.dumps(request, indent=2)}"""
-    
-    # Add curriculum context to user message
-    user_content = base_user_content
-    if curriculum_info.get("found"):
-        boundaries = curriculum_info.get('assessment_boundaries', 'Not specified')
-        misconceptions = curriculum_info.get('common_misconceptions', [])
-        
-        curriculum_context = f"""
-
-CURRICULUM CONTEXT (from curriculum.md for substandard_id: {substandard_id}):"""
-        
-        if boundaries and boundaries != 'Not specified':
-            curriculum_context += f"""
-- Assessment Boundaries: {boundaries}"""
-        
-        if misconceptions:
-            curriculum_context += f"""
-- Common Misconceptions:
-{chr(10).join([f"  * {m}" for m in misconceptions])}"""
-        
-        curriculum_context += """
-
-Use this context to:
-1. Ensure your question aligns with the assessment boundaries
-2. Create distractors that reflect the common misconceptions listed above"""
-        
-        user_content = base_user_content + curriculum_context
+    user_content = _user_content(request, extra_instruction) + _curriculum_context(substandard_id, curriculum_info)
+    cache_key = generation_key(
+        request,
+        user_content,
+        model=model,
+        generation_mode=generation_mode,
+        skill=_skill_fingerprint(sid if use_skills_api else None),
+        output_mode=output_mode,
+    )
+    cached = cached_generation(cache_key)
+    if cached is not None:
+        return cached
     
-    client = anthropic.AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY)
+    client = get_async_client(config.ANTHROPIC_API_KEY)
+    streamed_json = ""
     
     if use_skills_api:
         # Skills API: container + code_execution tool
         try:
-            resp = await client.beta.messages.create(
+            resp = await call_with_retry(
+                "curriculum",
+                client.beta.messages.create,
                 model=model,
-                max_tokens=4096,
+                max_tokens=output_token_budget(quantity),
                 betas=["code-execution-2025-08-25", "skills-2025-10-02"],
                 container={
                     "skills": [{"type": "custom", "skill_id": sid, "version": "latest"}],
@@ -165,7 +234,9 @@ Use this context to:
                 "timestamp": _utc_ts(),
                 "generatedContent": {"generated_content": []},
                 "generation_mode": generation_mode,
+                **transient_error_fields(e),
             }
+        record_usage(resp)
         raw = _get_text_from_message_content(resp.content)
         if not raw:
             stop_reason = getattr(resp, "stop_reason", None)
@@ -184,34 +255,16 @@ Use this context to:
                 "generation_mode": generation_mode,
             }
         
-        # Add curriculum context to system prompt for fallback mode
-        system_base = (
-            "You are executing a Claude Code Skill. Follow the instructions in the skill definition exactly.\n\n"
-            + skill_content
-        )
-        
-        if curriculum_info.get("found"):
-            boundaries = curriculum_info.get('assessment_boundaries', 'Not specified')
-            misconceptions = curriculum_info.get('common_misconceptions', [])
-            
-            curriculum_instruction = "\n\nCURRICULUM CONTEXT:\n"
-            if boundaries and boundaries != 'Not specified':
-                curriculum_instruction += f"Assessment Boundaries: {boundaries}\n"
-            if misconceptions:
-                curriculum_instruction += f"Common Misconceptions:\n{chr(10).join([f'  * {m}' for m in misconceptions])}\n"
-            curriculum_instruction += "\nUse the assessment boundaries to ensure your question stays within scope, and use the common misconceptions to create effective distractors."
-            
-            system_base += curriculum_instruction
-        
-        system = system_base + "\n\nGenerate your response following the skill's output schema. Respond with ONLY the JSON object, no markdown or extra text."
-        
+        # Curriculum context is already in user_content; keeping it out of the
+        # system prompt lets the skill prefix be served from the prompt cache.
+        tool = _emit_tool(request, output_mode)
+        request_kwargs = _fallback_params(model, quantity, skill_content, user_content, tool)
         try:
-            resp = await client.messages.create(
-                model=model,
-                max_tokens=4096,
-                system=system,
-                messages=[{"role": "user", "content": f"Execute the skill with this input:\n\n{base_user_content}"}],
-            )
+            if stream and tool is None:
+                streamed_json, raw, _ = await call_with_retry("curriculum", _stream_first_json, client, **request_kwargs)
+                resp = None
+            else:
+                resp = await call_with_retry("curriculum", client.messages.create, **request_kwargs)
         except Exception as e:
             logger.exception("Messages create failed")
             return {
@@ -220,40 +273,17 @@ Use this context to:
                 "timestamp": _utc_ts(),
                 "generatedContent": {"generated_content": []},
                 "generation_mode": generation_mode,
+                **transient_error_fields(e),
             }
-        raw = _get_text_from_message_content(resp.content) if hasattr(resp.content, "__iter__") else ""
-        if not raw and hasattr(resp, "content"):
-            for b in (resp.content or []):
-                if getattr(b, "type", None) == "text":
-                    raw = getattr(b, "text", "") or ""
-                    break
-    
-    if not raw:
-        return {
-            "error": "Empty model response",
-            "success": False,
-            "timestamp": _utc_ts(),
-            "generatedContent": {"generated_content": []},
-            "generation_mode": generation_mode,
-        }
-    
-    js = _extract_json(raw)
-    try:
-        parsed = json.loads(js)
-    except json.JSONDecodeError as e:
-        return {
-            "error": f"Invalid JSON: {e}",
-            "success": False,
-            "timestamp": _utc_ts(),
-            "generatedContent": {"generated_content": []},
-            "generation_mode": generation_mode,
-        }
+        if resp is not None:
+            record_usage(resp)
+            if tool is not None:
+                return store_generation(cache_key, _result_from_message(resp, request, generation_mode, tool))
+            raw = _get_text_from_message_content(resp.content) if hasattr(resp.content, "__iter__") else ""
+            if not raw and hasattr(resp, "content"):
+                for b in (resp.content or []):
+                    if getattr(b, "type", None) == "text":
+                        raw = getattr(b, "text", "") or ""
+                        break
     
-    item = parsed_to_item(parsed, request)
-    return {
-        "error": None,
-        "success": True,
-        "timestamp": _utc_ts(),
-        "generatedContent": {"generated_content": [item]},
-        "generation_mode": generation_mode,
-    }
+    return store_generation(cache_key, _result_from_text(raw, request, generation_mode, streamed_json))
@@ -4,12 +4,15 @@ Populate curriculum.md with Assessment Boundaries and Common Misconceptions.
 This module provides functions to:
 1. Generate Assessment Boundaries and Common Misconceptions for a standard
 2. Update curriculum.md with the generated data
+3. Do both for many standards at once, packing several standards from the
+   same grade/domain into one prompt (populate_curriculum_batch)
 
 Uses standard Anthropic API (not Agent SDK) for compatibility with parent folder.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import re
@@ -17,10 +20,56 @@ from pathlib import Path
 from typing import Any
 
 from . import config
-from .curriculum_lookup import lookup_curriculum
+from .anthropic_client import get_async_client
+from .curriculum_lookup import get_curriculum_index, lookup_curriculum
+from .curriculum_store import rewrite_blocks
+from .json_extract import extract_json
+from .resilience import call_with_retry
+from .singleflight import SingleFlight
+from .usage import cached_system, record_usage
 
 logger = logging.getLogger(__name__)
 
+# One in-flight population per (curriculum, standard); failures are remembered
+# briefly so a burst of requests for a broken standard doesn't re-call the LLM.
+_POPULATE_FLIGHT = SingleFlight(negative_ttl=config.CCAPI_POPULATE_NEGATIVE_TTL)
+
+
+def _load_populate_skill() -> str:
+    skill_path = config.POPULATE_CURRICULUM_SKILL_PATH
+    return skill_path.read_text(encoding="utf-8") if skill_path.exists() else ""
+
+
+_SINGLE_OUTPUT = (
+    "Generate your response following the skill's output schema. "
+    "Respond with ONLY the JSON object, no markdown or extra text."
+)
+_BATCH_OUTPUT = (
+    "You will be given SEVERAL standards. Apply the skill to each one independently. "
+    "Respond with ONLY a JSON array containing one object per standard, each with "
+    '"standard_id", "assessment_boundaries" and "common_misconceptions". No markdown or extra text.'
+)
+
+
+def populate_skill_system(output_instructions: str = _SINGLE_OUTPUT) -> str:
+    """The populate-curriculum skill as a system prompt (when the Skills API is not used)."""
+    return (
+        "You are executing a Claude Code Skill. Follow the instructions in the skill definition exactly.\n\n"
+        + _load_populate_skill()
+        + "\n\n"
+        + output_instructions
+    )
+
+
+def populate_skill_message(standard_id: str, standard_description: str) -> str:
+    """User message running the populate-curriculum skill on one standard."""
+    user_content = json.dumps({
+        "standard_id": standard_id,
+        "standard_description": standard_description,
+        "force_regenerate": False
+    }, indent=2)
+    return f"Execute the skill with this input:\n\n{user_content}"
+
 
 async def generate_curriculum_content(
     standard_id: str,
@@ -63,33 +112,32 @@ async def generate_curriculum_content(
         }
     
     model = model or config.CCAPI_LLM_MODEL
-    client = anthropic.AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY)
+    client = get_async_client(config.ANTHROPIC_API_KEY)
     
     # Try Skills API first, fallback to skill file
     skill_id = config.CCAPI_POPULATE_CURRICULUM_SKILL_ID
     use_skills_api = bool(skill_id and config.ANTHROPIC_API_KEY)
     
-    user_content = json.dumps({
-        "standard_id": standard_id,
-        "standard_description": standard_description,
-        "force_regenerate": False
-    }, indent=2)
+    message = populate_skill_message(standard_id, standard_description)
     
     result_text = ""
     
     if use_skills_api:
         # Skills API: container + code_execution tool
         try:
-            response = await client.beta.messages.create(
+            response = await call_with_retry(
+                "populate",
+                client.beta.messages.create,
                 model=model,
                 max_tokens=4096,
                 betas=["code-execution-2025-08-25", "skills-2025-10-02"],
                 container={
                     "skills": [{"type": "custom", "skill_id": skill_id, "version": "latest"}],
                 },
-                messages=[{"role": "user", "content": f"Execute the skill with this input:\n\n{user_content}"}],
+                messages=[{"role": "user", "content": message}],
                 tools=[{"type": "code_execution_20250825", "name": "code_execution"}],
             )
+            record_usage(response)
             # Extract text from response (handles code_execution tool results)
             from .pipeline import _get_text_from_message_content
             result_text = _get_text_from_message_content(response.content)
@@ -100,8 +148,7 @@ async def generate_curriculum_content(
     if not use_skills_api:
         # Fallback: skill as system prompt
         try:
-            skill_path = config.POPULATE_CURRICULUM_SKILL_PATH
-            skill_content = skill_path.read_text(encoding="utf-8") if skill_path.exists() else ""
+            system = populate_skill_system()
         except Exception as e:
             return {
                 "assessment_boundaries": None,
@@ -109,20 +156,17 @@ async def generate_curriculum_content(
                 "error": f"Failed to load skill: {e}",
             }
         
-        system = (
-            "You are executing a Claude Code Skill. Follow the instructions in the skill definition exactly.\n\n"
-            + skill_content
-            + "\n\nGenerate your response following the skill's output schema. Respond with ONLY the JSON object, no markdown or extra text."
-        )
-        
         try:
-            response = await client.messages.create(
+            response = await call_with_retry(
+                "populate",
+                client.messages.create,
                 model=model,
                 max_tokens=4096,
-                system=system,
-                messages=[{"role": "user", "content": f"Execute the skill with this input:\n\n{user_content}"}],
+                system=cached_system(system),
+                messages=[{"role": "user", "content": message}],
             )
             
+            record_usage(response)
             # Extract text from response
             if hasattr(response, "content"):
                 for block in response.content:
@@ -142,33 +186,18 @@ async def generate_curriculum_content(
             "error": "Empty response from API",
         }
     
-    # Try to find JSON object with better error handling
-    json_match = re.search(
-        r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*"assessment_boundaries"[\s\S]*?"common_misconceptions"[\s\S]*?\}',
-        result_text
-    )
-    if json_match:
-        try:
-            parsed = json.loads(json_match.group(0))
+    js = extract_json(result_text, require=("assessment_boundaries", "common_misconceptions"))
+    try:
+        parsed = json.loads(js)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Failed to parse JSON from response: {e}")
+        logger.debug(f"Response text (first 500 chars): {result_text[:500]}")
+    else:
+        if isinstance(parsed, dict):
             return {
                 "assessment_boundaries": parsed.get("assessment_boundaries", ""),
                 "common_misconceptions": parsed.get("common_misconceptions", []),
             }
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to parse JSON from regex match: {e}")
-            logger.debug(f"Matched text: {json_match.group(0)[:200]}...")
-    
-    # Fallback: try to parse entire response as JSON
-    try:
-        parsed = json.loads(result_text.strip())
-        return {
-            "assessment_boundaries": parsed.get("assessment_boundaries", ""),
-            "common_misconceptions": parsed.get("common_misconceptions", []),
-        }
-    except json.JSONDecodeError as e:
-        logger.warning(f"Failed to parse entire response as JSON: {e}")
-        logger.debug(f"Response text (first 500 chars): {result_text[:500]}")
-        pass
     
     # If JSON extraction failed, return error
     return {
@@ -178,6 +207,287 @@ async def generate_curriculum_content(
     }
 
 
+def _batch_group_key(standard_id: str) -> tuple[str, str]:
+    """(grade, domain) for CCSS.ELA-LITERACY.<domain>.<grade>...; used to pack related standards."""
+    parts = standard_id.split(".")
+    domain = parts[2] if len(parts) > 2 else ""
+    grade = parts[3] if len(parts) > 3 else ""
+    return grade, domain
+
+
+def _validate_generated(item: Any) -> dict[str, Any] | None:
+    """Normalize one generated entry, or None if it is unusable."""
+    if not isinstance(item, dict):
+        return None
+    boundaries = item.get("assessment_boundaries")
+    if isinstance(boundaries, list):
+        boundaries = "\n".join(str(b).strip() for b in boundaries if str(b).strip())
+    misconceptions = item.get("common_misconceptions")
+    if isinstance(misconceptions, str):
+        misconceptions = [misconceptions]
+    if not isinstance(boundaries, str) or not boundaries.strip():
+        return None
+    if not isinstance(misconceptions, list):
+        return None
+    misconceptions = [str(m).strip() for m in misconceptions if str(m).strip()]
+    if not misconceptions:
+        return None
+    return {
+        "assessment_boundaries": boundaries.strip(),
+        "common_misconceptions": misconceptions,
+    }
+
+
+def _parse_batch_response(text: str, expected: set[str]) -> dict[str, dict[str, Any]]:
+    """
+    Pull per-standard results out of a batch response.
+
+    Accepts a JSON array of objects carrying "standard_id", or an object
+    keyed by standard_id. Entries that are unknown or fail validation are
+    dropped (the caller falls back to single-standard calls for them).
+    """
+    decoder = json.JSONDecoder()
+    payload: Any = None
+    for m in re.finditer(r"[\[{]", text):
+        try:
+            payload, _ = decoder.raw_decode(text, m.start())
+        except json.JSONDecodeError:
+            continue
+        if isinstance(payload, dict) and not (expected & payload.keys()):
+            # Wrapper object such as {"results": [...]}
+            payload = next((v for v in payload.values() if isinstance(v, list)), payload)
+        break
+    
+    items: list[tuple[Any, Any]] = []
+    if isinstance(payload, list):
+        items = [(it.get("standard_id") if isinstance(it, dict) else None, it) for it in payload]
+    elif isinstance(payload, dict):
+        items = list(payload.items())
+    
+    out: dict[str, dict[str, Any]] = {}
+    for sid, item in items:
+        if sid not in expected or sid in out:
+            continue
+        valid = _validate_generated(item)
+        if valid is None:
+            logger.warning("Batch entry for %s failed validation", sid)
+            continue
+        out[sid] = valid
+    return out
+
+
+async def generate_curriculum_content_batch(
+    standards: list[tuple[str, str]],
+    *,
+    model: str | None = None,
+) -> dict[str, dict[str, Any]]:
+    """
+    Generate Assessment Boundaries and Common Misconceptions for several standards in one call.
+    
+    The populate-curriculum skill is sent once as the system prompt and the
+    model returns a JSON array keyed by standard_id. Entries missing from the
+    response or failing validation are regenerated one at a time with
+    generate_curriculum_content, so every requested standard gets a result.
+    
+    Args:
+        standards: (standard_id, standard_description) pairs, ideally from the
+            same grade/domain
+        model: Optional model override
+    
+    Returns:
+        standard_id -> same shape as generate_curriculum_content()
+    """
+    if not standards:
+        return {}
+    if len(standards) == 1 or not config.ANTHROPIC_API_KEY:
+        results = await asyncio.gather(
+            *(generate_curriculum_content(sid, desc, model=model) for sid, desc in standards)
+        )
+        return {sid: res for (sid, _), res in zip(standards, results)}
+    
+    expected = {sid for sid, _ in standards}
+    parsed: dict[str, dict[str, Any]] = {}
+    try:
+        system = populate_skill_system(_BATCH_OUTPUT)
+        user_content = json.dumps(
+            [{"standard_id": sid, "standard_description": desc} for sid, desc in standards],
+            indent=2,
+        )
+        client = get_async_client(config.ANTHROPIC_API_KEY)
+        response = await call_with_retry(
+            "populate",
+            client.messages.create,
+            model=model or config.CCAPI_LLM_MODEL,
+            max_tokens=min(16000, 1024 * len(standards) + 512),
+            system=cached_system(system),
+            messages=[{"role": "user", "content": f"Execute the skill for each of these standards:\n\n{user_content}"}],
+        )
+        record_usage(response)
+        result_text = "".join(getattr(b, "text", "") for b in response.content)
+        parsed = _parse_batch_response(result_text, expected)
+    except Exception as e:
+        logger.warning("Batch curriculum generation failed (%d standards): %s", len(standards), e)
+    
+    out: dict[str, dict[str, Any]] = dict(parsed)
+    retry = [(sid, desc) for sid, desc in standards if sid not in parsed]
+    if retry:
+        logger.info("Falling back to single-standard calls for %d of %d standards", len(retry), len(standards))
+        results = await asyncio.gather(
+            *(generate_curriculum_content(sid, desc, model=model) for sid, desc in retry)
+        )
+        out.update({sid: res for (sid, _), res in zip(retry, results)})
+    return out
+
+
+async def populate_curriculum_batch(
+    standard_ids: list[str],
+    curriculum_path: Path,
+    *,
+    batch_size: int = 8,
+    max_concurrency: int = 4,
+    force_regenerate: bool = False,
+    model: str | None = None,
+) -> dict[str, dict[str, Any]]:
+    """
+    Populate many curriculum entries, packing up to batch_size standards from
+    the same grade/domain into each LLM request.
+    
+    All generated entries are written to curriculum.md with a single
+    block-local rewrite. The batch's standards are claimed in the same
+    single-flight as populate_curriculum_entry: a concurrent entry call for
+    one of them waits for the batch's result, and a standard already being
+    populated elsewhere is joined instead of generated twice.
+    
+    Returns:
+        standard_id -> same shape as populate_curriculum_entry()
+    """
+    results: dict[str, dict[str, Any]] = {}
+    pending: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    claimed: dict[str, asyncio.Future] = {}
+    joined: dict[str, str] = {}
+    source = str(Path(curriculum_path).resolve())
+    
+    for standard_id in dict.fromkeys(standard_ids):
+        existing = lookup_curriculum(standard_id, curriculum_path)
+        if not existing.get("found"):
+            results[standard_id] = {
+                "success": False,
+                "assessment_boundaries": None,
+                "common_misconceptions": None,
+                "updated": False,
+                "error": f"Standard {standard_id} not found in curriculum",
+            }
+            continue
+        if (
+            existing.get("assessment_boundaries")
+            and existing.get("common_misconceptions")
+            and not force_regenerate
+        ):
+            results[standard_id] = {
+                "success": True,
+                "assessment_boundaries": existing.get("assessment_boundaries"),
+                "common_misconceptions": existing.get("common_misconceptions"),
+                "updated": False,
+            }
+            continue
+        description = existing.get("standard_description", "")
+        key = (source, standard_id)
+        if force_regenerate:
+            _POPULATE_FLIGHT.forget(key)
+        future = _POPULATE_FLIGHT.claim(key)
+        if future is None:
+            # Being populated elsewhere (or just failed): share that result
+            joined[standard_id] = description
+            continue
+        claimed[standard_id] = future
+        pending.setdefault(_batch_group_key(standard_id), []).append((standard_id, description))
+    
+    async def run_claimed() -> None:
+        try:
+            await _populate_claimed(pending, curriculum_path, results, batch_size, max_concurrency, model)
+        finally:
+            for sid, future in claimed.items():
+                if not future.done():
+                    future.set_result(results.get(sid) or {
+                        "success": False,
+                        "assessment_boundaries": None,
+                        "common_misconceptions": None,
+                        "updated": False,
+                        "error": "Batch population did not finish",
+                    })
+    
+    async def join(standard_id: str, description: str) -> None:
+        result, shared = await _POPULATE_FLIGHT.do(
+            (source, standard_id),
+            lambda: _generate_and_store(standard_id, curriculum_path, description),
+        )
+        results[standard_id] = {**result, "updated": False, "shared": True} if shared else result
+    
+    # Join right away, while the other population is still in flight
+    await asyncio.gather(run_claimed(), *(join(sid, desc) for sid, desc in joined.items()))
+    return results
+
+
+async def _populate_claimed(
+    pending: dict[tuple[str, str], list[tuple[str, str]]],
+    curriculum_path: Path,
+    results: dict[str, dict[str, Any]],
+    batch_size: int,
+    max_concurrency: int,
+    model: str | None,
+) -> None:
+    """Generate the grouped (standard_id, description) pairs in batches, write them once, fill results."""
+    chunks = [
+        group[i:i + max(1, batch_size)]
+        for _, group in sorted(pending.items())
+        for i in range(0, len(group), max(1, batch_size))
+    ]
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def run_chunk(chunk: list[tuple[str, str]]) -> dict[str, dict[str, Any]]:
+        async with sem:
+            return await generate_curriculum_content_batch(chunk, model=model)
+    
+    generated: dict[str, dict[str, Any]] = {}
+    for part in await asyncio.gather(*(run_chunk(c) for c in chunks)):
+        generated.update(part)
+    
+    ok = {sid: g for sid, g in generated.items() if not g.get("error")}
+    updated: set[str] = set()
+    if ok:
+        try:
+            updated = rewrite_blocks(
+                curriculum_path,
+                {
+                    sid: (lambda entry, g=g: _rewrite_entry(
+                        entry, g.get("assessment_boundaries"), g.get("common_misconceptions")
+                    ))
+                    for sid, g in ok.items()
+                },
+            )
+        except Exception as e:
+            logger.error("Error updating curriculum file: %s", e)
+        if updated:
+            get_curriculum_index(curriculum_path).invalidate()
+    
+    for sid, g in generated.items():
+        if g.get("error"):
+            results[sid] = {
+                "success": False,
+                "assessment_boundaries": None,
+                "common_misconceptions": None,
+                "updated": False,
+                "error": g.get("error"),
+            }
+        else:
+            results[sid] = {
+                "success": True,
+                "assessment_boundaries": g.get("assessment_boundaries"),
+                "common_misconceptions": g.get("common_misconceptions"),
+                "updated": sid in updated,
+            }
+
+
 async def populate_curriculum_entry(
     standard_id: str,
     curriculum_path: Path,
@@ -188,7 +498,10 @@ async def populate_curriculum_entry(
     Populate a curriculum entry with Assessment Boundaries and Common Misconceptions.
     
     If the entry already has this data and force_regenerate=False, returns existing data.
-    Otherwise, generates new content and updates curriculum.md.
+    Otherwise, generates new content and updates curriculum.md. Concurrent calls
+    for the same standard await a single in-flight population and share its
+    result; a failed population is returned from a short negative cache
+    (CCAPI_POPULATE_NEGATIVE_TTL seconds) instead of being retried immediately.
     
     Args:
         standard_id: The standard ID to populate
@@ -200,7 +513,8 @@ async def populate_curriculum_entry(
             "success": bool,
             "assessment_boundaries": str | None,
             "common_misconceptions": list[str] | None,
-            "updated": bool  # Whether curriculum.md was updated
+            "updated": bool,  # Whether this call updated curriculum.md
+            "shared": bool,   # Present when the result came from another caller
         }
     """
     # Check if data already exists
@@ -219,38 +533,23 @@ async def populate_curriculum_entry(
                 "updated": False,
             }
         
-        # Need to generate
-        standard_description = existing.get("standard_description", "")
-        
-        # Generate content (this will call Claude via standard API)
-        generated = await generate_curriculum_content(
-            standard_id,
-            standard_description,
+        # Need to generate. Concurrent callers for the same standard share one
+        # generation + write instead of racing to populate the same block.
+        key = (str(Path(curriculum_path).resolve()), standard_id)
+        if force_regenerate:
+            _POPULATE_FLIGHT.forget(key)
+        result, shared = await _POPULATE_FLIGHT.do(
+            key,
+            lambda: _generate_and_store(
+                standard_id,
+                curriculum_path,
+                existing.get("standard_description", ""),
+            ),
         )
-        
-        if generated.get("error"):
-            return {
-                "success": False,
-                "assessment_boundaries": None,
-                "common_misconceptions": None,
-                "updated": False,
-                "error": generated.get("error"),
-            }
-        
-        # Update curriculum.md
-        updated = update_curriculum_file(
-            curriculum_path,
-            standard_id,
-            generated.get("assessment_boundaries"),
-            generated.get("common_misconceptions"),
-        )
-        
-        return {
-            "success": True,
-            "assessment_boundaries": generated.get("assessment_boundaries"),
-            "common_misconceptions": generated.get("common_misconceptions"),
-            "updated": updated,
-        }
+        if shared:
+            # Only the caller that ran the population reports the write
+            return {**result, "updated": False, "shared": True}
+        return result
     
     return {
         "success": False,
@@ -261,6 +560,73 @@ async def populate_curriculum_entry(
     }
 
 
+async def _generate_and_store(
+    standard_id: str,
+    curriculum_path: Path,
+    standard_description: str,
+) -> dict[str, Any]:
+    """Generate boundaries/misconceptions for one standard and write them to curriculum.md."""
+    # Generate content (this will call Claude via standard API)
+    generated = await generate_curriculum_content(
+        standard_id,
+        standard_description,
+    )
+    
+    if generated.get("error"):
+        logger.warning("Populating %s failed: %s", standard_id, generated.get("error"))
+        return {
+            "success": False,
+            "assessment_boundaries": None,
+            "common_misconceptions": None,
+            "updated": False,
+            "error": generated.get("error"),
+        }
+    
+    # Update curriculum.md
+    updated = update_curriculum_file(
+        curriculum_path,
+        standard_id,
+        generated.get("assessment_boundaries"),
+        generated.get("common_misconceptions"),
+    )
+    
+    return {
+        "success": True,
+        "assessment_boundaries": generated.get("assessment_boundaries"),
+        "common_misconceptions": generated.get("common_misconceptions"),
+        "updated": updated,
+    }
+
+
+def _rewrite_entry(
+    entry: str,
+    assessment_boundaries: str | None,
+    common_misconceptions: list[str] | None,
+) -> str:
+    """Return one curriculum.md block with new boundaries/misconceptions filled in."""
+    # Update Assessment Boundaries
+    if assessment_boundaries:
+        # Pattern: Assessment Boundaries: followed by optional content, then Common Misconceptions
+        # Replace "*None specified*" or any existing content
+        ab_pattern = r"(Assessment Boundaries:\s*)(?:\*None specified\*|.*?)(?=\n\nCommon Misconceptions:)"
+        # Format boundaries - if it's a single string, use it; if it has newlines, preserve them
+        boundaries_text = assessment_boundaries.strip()
+        
+        replacement = f"\\1{boundaries_text}\n"
+        entry = re.sub(ab_pattern, replacement, entry, flags=re.DOTALL)
+    
+    # Update Common Misconceptions
+    if common_misconceptions:
+        # Format misconceptions as bullet points
+        misconceptions_text = "\n".join([f"* {m.strip()}" for m in common_misconceptions if m.strip()])
+        # Pattern: Common Misconceptions: followed by optional content, then Difficulty Definitions
+        cm_pattern = r"(Common Misconceptions:\s*)(?:\*None specified\*|.*?)(?=\n\nDifficulty Definitions:)"
+        replacement = f"\\1{misconceptions_text}\n"
+        entry = re.sub(cm_pattern, replacement, entry, flags=re.DOTALL)
+    
+    return entry
+
+
 def update_curriculum_file(
     curriculum_path: Path,
     standard_id: str,
@@ -270,6 +636,10 @@ def update_curriculum_file(
     """
     Update curriculum.md file with new Assessment Boundaries and Common Misconceptions.
     
+    Only the standard's own block is rewritten. The write holds an advisory
+    lock and is published via temp-file + rename, so concurrent populations
+    from other requests or worker processes are not lost.
+    
     Args:
         curriculum_path: Path to curriculum.md
         standard_id: The standard ID to update
@@ -282,54 +652,22 @@ def update_curriculum_file(
     if not curriculum_path.exists():
         return False
     
+    index = get_curriculum_index(curriculum_path)
     try:
-        content = curriculum_path.read_text(encoding="utf-8")
+        # Cheap membership probe before taking the write lock
+        if standard_id not in index:
+            return False
+        updated = rewrite_blocks(
+            curriculum_path,
+            {standard_id: lambda entry: _rewrite_entry(entry, assessment_boundaries, common_misconceptions)},
+        )
     except Exception as e:
-        print(f"Error reading curriculum file: {e}")
+        print(f"Error updating curriculum file: {e}")
         return False
     
-    # Split by "---" to get entries (keep the separator)
-    parts = content.split("---")
-    updated = False
-    
-    for i, entry in enumerate(parts):
-        # Check if this entry matches the standard_id
-        if f"Standard ID: {standard_id}" in entry:
-            original_entry = entry
-            
-            # Update Assessment Boundaries
-            if assessment_boundaries:
-                # Pattern: Assessment Boundaries: followed by optional content, then Common Misconceptions
-                # Replace "*None specified*" or any existing content
-                ab_pattern = r"(Assessment Boundaries:\s*)(?:\*None specified\*|.*?)(?=\n\nCommon Misconceptions:)"
-                # Format boundaries - if it's a single string, use it; if it has newlines, preserve them
-                boundaries_text = assessment_boundaries.strip()
-                
-                replacement = f"\\1{boundaries_text}\n"
-                entry = re.sub(ab_pattern, replacement, entry, flags=re.DOTALL)
-            
-            # Update Common Misconceptions
-            if common_misconceptions:
-                # Format misconceptions as bullet points
-                misconceptions_text = "\n".join([f"* {m.strip()}" for m in common_misconceptions if m.strip()])
-                # Pattern: Common Misconceptions: followed by optional content, then Difficulty Definitions
-                cm_pattern = r"(Common Misconceptions:\s*)(?:\*None specified\*|.*?)(?=\n\nDifficulty Definitions:)"
-                replacement = f"\\1{misconceptions_text}\n"
-                entry = re.sub(cm_pattern, replacement, entry, flags=re.DOTALL)
-            
-            if entry != original_entry:
-                parts[i] = entry
-                updated = True
-                break
-    
     if updated:
-        # Rejoin entries with "---" separator
-        new_content = "---".join(parts)
-        try:
-            curriculum_path.write_text(new_content, encoding="utf-8")
-            return True
-        except Exception as e:
-            print(f"Error writing curriculum file: {e}")
-            return False
+        # mtime granularity can hide back-to-back writes; don't rely on it
+        index.invalidate()
+        return True
     
     return False
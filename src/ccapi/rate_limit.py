@@ -0,0 +1,236 @@
+"""
+Process-wide rate limiter for Anthropic Messages calls (RPM, ITPM and OTPM).
+
+The API limits an organisation by requests, input tokens and output tokens
+per minute. Each limit is a token bucket here that refills continuously at
+limit/60 per second, up to one minute's worth. Before a call goes out it
+reserves 1 request, an input estimate (prompt characters / 4) and its
+max_tokens of output, which is how the API itself counts OTPM while a
+request is in flight. When the response arrives, settle() replaces the
+reservation with the real usage: input plus cache-write tokens (cache
+reads don't count towards ITPM) and output tokens. Unused max_tokens go
+straight back into the bucket, so the limiter converges on the sustainable
+rate instead of the worst case.
+
+Waiters are served in FIFO order. A 429 pauses the whole limiter for its
+Retry-After (pause()), so every caller backs off, not just the one that
+was rejected.
+
+resilience.call_with_retry acquires from this limiter for every Messages
+call (generation, curriculum population, agentic turns, self-assessment,
+regeneration), so they all share one budget. Limits come from
+CCAPI_RATE_RPM / CCAPI_RATE_ITPM / CCAPI_RATE_OTPM (0 = unlimited); with
+all three at 0 the limiter is off.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from . import config
+
+
+def estimate_input_tokens(params: dict[str, Any]) -> int:
+    """Rough input token count of a Messages call (about 4 characters per token)."""
+    blob = json.dumps(
+        [params.get("system"), params.get("messages"), params.get("tools")],
+        ensure_ascii=False,
+        default=str,
+    )
+    return len(blob) // 4 + 1
+
+
+def _usage_value(usage: Any, key: str) -> int:
+    value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+    return int(value or 0)
+
+
+def usage_of(result: Any) -> Any:
+    """The usage block of a Messages response (or of the first element of a tuple result that has one)."""
+    candidates = result if isinstance(result, tuple) else (result,)
+    for candidate in candidates:
+        usage = getattr(candidate, "usage", None)
+        if usage is not None:
+            return usage
+    return None
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most one minute's worth of a per-minute limit."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (a call larger than the bucket waits for a full one)."""
+        self._refill()
+        need = min(amount, self.capacity)
+        return 0.0 if self.level >= need else (need - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        # May go negative: an oversized call is paid back before the next one
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Reservation:
+    """What acquire() charged for one call, to be corrected by settle()."""
+
+    input_tokens: int
+    output_tokens: int
+
+
+class RateLimiter:
+    """
+    Request / input-token / output-token budgets shared by every caller in the process.
+
+    Args:
+        rpm: requests per minute (0 = unlimited).
+        input_tpm: input tokens per minute (0 = unlimited).
+        output_tpm: output tokens per minute (0 = unlimited).
+    """
+
+    def __init__(
+        self,
+        *,
+        rpm: float = 0,
+        input_tpm: float = 0,
+        output_tpm: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        limits = {"requests": rpm, "input_tokens": input_tpm, "output_tokens": output_tpm}
+        self._buckets = {name: TokenBucket(limit, clock) for name, limit in limits.items() if limit and limit > 0}
+        self._clock = clock
+        self._paused_until = 0.0
+        # asyncio primitives bind to the loop they are first used on; scripts may run several loops
+        self._lock: asyncio.Lock | None = None
+        self._refilled: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.calls = 0
+        self.waited = 0.0
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._refilled = asyncio.Event()
+            self._loop = loop
+        return self._lock
+
+    async def _sleep(self, seconds: float) -> None:
+        # Wake early when settle()/release() hands tokens back
+        assert self._refilled is not None
+        self._refilled.clear()
+        try:
+            await asyncio.wait_for(self._refilled.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def acquire(self, input_tokens: int, output_tokens: int) -> Reservation:
+        """Wait (FIFO) until the call fits every budget, then charge it."""
+        amounts = {"requests": 1, "input_tokens": input_tokens, "output_tokens": output_tokens}
+        async with self._get_lock():
+            while True:
+                wait = max(
+                    [self._paused_until - self._clock()]
+                    + [bucket.wait_time(amounts[name]) for name, bucket in self._buckets.items()]
+                )
+                if wait <= 0:
+                    break
+                started = self._clock()
+                await self._sleep(wait)
+                self.waited += self._clock() - started
+            for name, bucket in self._buckets.items():
+                bucket.take(amounts[name])
+            self.calls += 1
+        return Reservation(input_tokens, output_tokens)
+
+    def _adjust(self, name: str, refund: float) -> None:
+        bucket = self._buckets.get(name)
+        if bucket is None or not refund:
+            return
+        if refund > 0:
+            bucket.give(refund)
+            if self._refilled is not None:
+                self._refilled.set()
+        else:
+            bucket.take(-refund)
+
+    def settle(self, reservation: Reservation, usage: Any) -> None:
+        """Swap the reservation for the response's real usage (None keeps the reservation)."""
+        if usage is None:
+            return
+        actual_input = _usage_value(usage, "input_tokens") + _usage_value(usage, "cache_creation_input_tokens")
+        self._adjust("input_tokens", reservation.input_tokens - actual_input)
+        self._adjust("output_tokens", reservation.output_tokens - _usage_value(usage, "output_tokens"))
+
+    def release(self, reservation: Reservation) -> None:
+        """A call that failed produced no output: return its output reservation."""
+        self._adjust("output_tokens", reservation.output_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds` (e.g. the Retry-After of a 429)."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "waited_seconds": round(self.waited, 1),
+            "available": {name: int(bucket.level) for name, bucket in self._buckets.items()},
+        }
+
+
+_LIMITER: RateLimiter | None = None
+_CONFIGURED = False
+
+
+def configure_rate_limit(
+    rpm: float | None = None,
+    input_tpm: float | None = None,
+    output_tpm: float | None = None,
+) -> RateLimiter | None:
+    """Set the process-wide limiter (None arguments fall back to config; all 0 disables it)."""
+    global _LIMITER, _CONFIGURED
+    _CONFIGURED = True
+    rpm = config.CCAPI_RATE_RPM if rpm is None else rpm
+    input_tpm = config.CCAPI_RATE_ITPM if input_tpm is None else input_tpm
+    output_tpm = config.CCAPI_RATE_OTPM if output_tpm is None else output_tpm
+    if not (rpm or input_tpm or output_tpm):
+        _LIMITER = None
+        return None
+    _LIMITER = RateLimiter(rpm=rpm, input_tpm=input_tpm, output_tpm=output_tpm)
+    return _LIMITER
+
+
+def get_rate_limiter() -> RateLimiter | None:
+    """The process-wide limiter (configured from CCAPI_RATE_* on first use)."""
+    if not _CONFIGURED:
+        configure_rate_limit()
+    return _LIMITER
+
+
+# Rows a batch script runs at once by default when a CCAPI_RATE_* budget paces them
+PACED_CONCURRENCY = 4
+
+
+def default_concurrency() -> int:
+    """Default --concurrency for batch scripts: PACED_CONCURRENCY under a rate budget, else 1 (sequential)."""
+    return PACED_CONCURRENCY if get_rate_limiter() is not None else 1
@@ -0,0 +1,376 @@
+"""
+Retries with backoff and a circuit breaker for Anthropic API calls.
+
+The SDK's own retries are off (get_async_client passes max_retries=0), so
+this is the only retry layer and every pipeline shares it:
+
+- Errors are classified. rate_limit (429), overloaded (529 or an
+  overloaded_error event mid-stream), server (other 5xx, 408/409), timeout
+  and connection are transient; anything else (4xx, bad params) is raised
+  at once.
+- RetryPolicy gives each class its own attempt budget and waits with capped
+  exponential backoff and full jitter, or for the server's Retry-After
+  (retry-after-ms / retry-after headers) when it sends one.
+- CircuitBreaker counts consecutive transient failures (429s excluded: those
+  mean "slow down", not "degraded"). Once open it rejects calls with
+  CircuitOpenError until reset_timeout has passed, then lets one probe
+  through (half-open) to decide whether to close again. A 429 on the probe
+  closes it (the upstream answered); a probe that ends without a verdict
+  (cancelled) reopens it for the next caller, and a probe that has not
+  reported back within reset_timeout is replaced. A policy with
+  circuit_wait > 0 waits for the circuit instead of failing (batch scripts);
+  the default fails fast (HTTP services).
+
+Calls are wrapped as
+
+    resp = await call_with_retry("generate", client.messages.create, **kwargs)
+
+Each pipeline name gets its own breaker and, optionally, its own policy
+(configure_resilience); defaults come from CCAPI_RETRY_* / CCAPI_BREAKER_*
+in config.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Mapping, TypeVar
+
+from . import config
+from .rate_limit import estimate_input_tokens, get_rate_limiter, usage_of
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TRANSIENT_CLASSES = ("rate_limit", "overloaded", "server", "timeout", "connection")
+
+_BODY_ERROR_CLASSES = {"rate_limit_error": "rate_limit", "overloaded_error": "overloaded", "api_error": "server"}
+_CONNECTION_ERRORS = {"APIConnectionError", "ConnectError", "ConnectionError", "NetworkError", "RemoteProtocolError", "ReadError", "WriteError"}
+
+
+def _headers(exc: BaseException) -> Any:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    return headers if headers is not None else {}
+
+
+def error_class(exc: BaseException) -> str | None:
+    """Transient error class of exc (one of TRANSIENT_CLASSES), or None if it should not be retried."""
+    if isinstance(exc, CircuitOpenError):
+        return None
+    status = getattr(exc, "status_code", None)
+    body = getattr(exc, "body", None)
+    error = body.get("error") if isinstance(body, dict) else None
+    body_type = error.get("type") if isinstance(error, dict) else None
+    names = {cls.__name__ for cls in type(exc).__mro__}
+
+    if body_type in _BODY_ERROR_CLASSES:
+        cls = _BODY_ERROR_CLASSES[body_type]
+    elif status == 429:
+        cls = "rate_limit"
+    elif status == 529:
+        cls = "overloaded"
+    elif isinstance(status, int) and (status >= 500 or status in (408, 409)):
+        cls = "server"
+    elif any("Timeout" in name for name in names):
+        cls = "timeout"
+    elif names & _CONNECTION_ERRORS:
+        cls = "connection"
+    else:
+        cls = None
+
+    # The API can say explicitly whether a request is worth retrying
+    should_retry = str(_headers(exc).get("x-should-retry") or "").lower()
+    if should_retry == "false":
+        return None
+    if should_retry == "true" and cls is None:
+        return "server"
+    return cls
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds the server asked us to wait (retry-after-ms / retry-after), or None."""
+    headers = _headers(exc)
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms:
+            return max(0.0, float(ms) / 1000)
+    except (TypeError, ValueError):
+        pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _default_attempts() -> dict[str, int]:
+    return {
+        "rate_limit": config.CCAPI_RETRY_MAX_ATTEMPTS,
+        "overloaded": config.CCAPI_RETRY_MAX_ATTEMPTS,
+        "server": config.CCAPI_RETRY_SERVER_ATTEMPTS,
+        "timeout": config.CCAPI_RETRY_SERVER_ATTEMPTS,
+        "connection": config.CCAPI_RETRY_SERVER_ATTEMPTS,
+    }
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How a pipeline retries transient errors.
+
+    attempts: total attempts allowed per error class (1 = no retry).
+    base_delay / max_delay: backoff is uniform(0, min(max_delay, base_delay * 2**n)).
+    max_retry_after: a longer Retry-After is not waited out; the error is raised.
+    circuit_wait: seconds a call may wait for an open circuit before failing
+        with CircuitOpenError (0 = fail fast).
+    """
+
+    attempts: Mapping[str, int] = field(default_factory=_default_attempts)
+    base_delay: float = field(default_factory=lambda: config.CCAPI_RETRY_BASE_DELAY)
+    max_delay: float = field(default_factory=lambda: config.CCAPI_RETRY_MAX_DELAY)
+    max_retry_after: float = 300.0
+    circuit_wait: float = field(default_factory=lambda: config.CCAPI_BREAKER_WAIT)
+
+    def max_attempts(self, error_cls: str | None) -> int:
+        return max(1, int(self.attempts.get(error_cls, 1))) if error_cls else 1
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def delay(self, attempt: int, exc: BaseException) -> float | None:
+        """Seconds to wait before retrying after exc, or None to give up."""
+        server_wait = retry_after(exc)
+        if server_wait is None:
+            return self.backoff(attempt)
+        if server_wait > self.max_retry_after:
+            return None
+        # Small jitter so callers told the same Retry-After don't return in lockstep
+        return server_wait + random.uniform(0, min(self.base_delay, 1.0))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while a pipeline's circuit is open."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Circuit '{name}' is open (upstream degraded); retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker (closed -> open -> half-open -> closed).
+
+    Args:
+        failure_threshold: consecutive transient failures that open the
+            circuit (0 disables the breaker).
+        reset_timeout: seconds the circuit stays open before a probe call
+            is let through.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 10,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if the call must not go out now; True if it is the half-open probe."""
+        if self.state == "closed":
+            return False
+        now = self._clock()
+        if self.state == "open":
+            remaining = self._opened_at + self.reset_timeout - now
+            if remaining <= 0:
+                self.state = "half_open"
+                self._probe_at = now
+                logger.info("Circuit '%s' half-open: sending a probe call", self.name)
+                return True
+        elif now - self._probe_at >= self.reset_timeout:
+            # The probe never reported back: let another one through
+            self._probe_at = now
+            logger.info("Circuit '%s' probe timed out: sending another", self.name)
+            return True
+        else:
+            # half-open with a probe in flight: everyone else waits for its verdict
+            remaining = min(self.reset_timeout, 1.0)
+        self.rejected += 1
+        raise CircuitOpenError(self.name, remaining)
+
+    def release_probe(self) -> None:
+        """The probe ended without a verdict (e.g. cancelled): reopen so the next caller probes at once."""
+        if self.state == "half_open":
+            self.state = "open"
+
+    def record_rate_limited(self) -> None:
+        """A 429 is not a failure, but it shows the upstream is up: a half-open circuit closes."""
+        if self.state == "half_open":
+            self.record_success()
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("Circuit '%s' closed: upstream recovered", self.name)
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if not self.failure_threshold:
+            return
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            logger.warning(
+                "Circuit '%s' open after %d consecutive failures; failing fast for %.1fs",
+                self.name, self.failures, self.reset_timeout,
+            )
+            self.state = "open"
+            self.opened += 1
+            self._opened_at = self._clock()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "opened": self.opened, "rejected": self.rejected}
+
+
+_POLICIES: dict[str, RetryPolicy] = {}
+_BREAKERS: dict[str, CircuitBreaker] = {}
+_RETRIES: dict[str, int] = {}
+_DEFAULT = "*"
+
+
+def configure_resilience(
+    pipeline: str | None = None,
+    *,
+    policy: RetryPolicy | None = None,
+    breaker: CircuitBreaker | None = None,
+) -> None:
+    """Override the policy and/or breaker of one pipeline (None: the default policy for all)."""
+    if policy is not None:
+        _POLICIES[pipeline or _DEFAULT] = policy
+    if breaker is not None and pipeline:
+        _BREAKERS[pipeline] = breaker
+
+
+def get_policy(pipeline: str) -> RetryPolicy:
+    if pipeline in _POLICIES:
+        return _POLICIES[pipeline]
+    if _DEFAULT not in _POLICIES:
+        _POLICIES[_DEFAULT] = RetryPolicy()
+    return _POLICIES[_DEFAULT]
+
+
+def get_breaker(pipeline: str) -> CircuitBreaker:
+    if pipeline not in _BREAKERS:
+        _BREAKERS[pipeline] = CircuitBreaker(
+            pipeline,
+            failure_threshold=config.CCAPI_BREAKER_THRESHOLD,
+            reset_timeout=config.CCAPI_BREAKER_RESET,
+        )
+    return _BREAKERS[pipeline]
+
+
+def resilience_stats() -> dict[str, dict[str, Any]]:
+    """Per-pipeline breaker state and retry counts (for health endpoints and run summaries)."""
+    return {name: {**b.snapshot(), "retries": _RETRIES.get(name, 0)} for name, b in _BREAKERS.items()}
+
+
+async def call_with_retry(pipeline: str, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+    """
+    Await fn(*args, **kwargs), retrying transient errors under the pipeline's policy.
+
+    fn is called afresh on every attempt, so pass the coroutine function
+    (e.g. client.messages.create), not a coroutine. Non-transient errors,
+    exhausted budgets and an open circuit (past policy.circuit_wait) raise.
+    Messages calls (kwargs with "messages") also wait for the shared rate
+    limiter before each attempt and settle it with the response's usage.
+    """
+    policy = get_policy(pipeline)
+    breaker = get_breaker(pipeline)
+    limiter = get_rate_limiter() if "messages" in kwargs else None
+    attempt = 0
+    waited = 0.0
+    while True:
+        try:
+            probe = breaker.before_call()
+        except CircuitOpenError as e:
+            if waited + e.retry_after > policy.circuit_wait:
+                raise
+            pause = e.retry_after + random.uniform(0, min(policy.base_delay, 1.0))
+            waited += pause
+            await asyncio.sleep(pause)
+            continue
+        attempt += 1
+        reservation = None
+        verdict = False
+        try:
+            if limiter is not None:
+                reservation = await limiter.acquire(estimate_input_tokens(kwargs), int(kwargs.get("max_tokens") or 0))
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                verdict = True
+                if reservation is not None:
+                    limiter.release(reservation)
+                cls = error_class(e)
+                if cls is None:
+                    # The upstream answered; the request itself was the problem
+                    breaker.record_success()
+                    raise
+                if cls != "rate_limit":
+                    breaker.record_failure()
+                else:
+                    breaker.record_rate_limited()
+                    if limiter is not None and retry_after(e):
+                        # Everyone sharing the budget holds off, not just this caller
+                        limiter.pause(retry_after(e))
+                limit = policy.max_attempts(cls)
+                delay = policy.delay(attempt, e) if attempt < limit else None
+                if delay is None:
+                    logger.warning("%s: %s error on attempt %d/%d, giving up: %s", pipeline, cls, attempt, limit, e)
+                    raise
+                _RETRIES[pipeline] = _RETRIES.get(pipeline, 0) + 1
+                logger.info("%s: %s error on attempt %d/%d, retrying in %.1fs", pipeline, cls, attempt, limit, delay)
+                await asyncio.sleep(delay)
+                continue
+            verdict = True
+            breaker.record_success()
+            if reservation is not None:
+                limiter.settle(reservation, usage_of(result))
+            return result
+        finally:
+            if probe and not verdict:
+                # Cancelled (client disconnect, tool timeout) before the upstream answered
+                breaker.release_probe()
+
+
+def transient_error_fields(exc: BaseException) -> dict[str, Any]:
+    """{"retry_after": seconds} for result envelopes when exc was transient (retrying later may work)."""
+    if isinstance(exc, CircuitOpenError):
+        return {"retry_after": round(exc.retry_after, 1)}
+    if error_class(exc) is None:
+        return {}
+    wait = retry_after(exc)
+    return {"retry_after": round(wait if wait is not None else config.CCAPI_BREAKER_RESET, 1)}
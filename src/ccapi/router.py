@@ -0,0 +1,228 @@
+"""
+Model cascade: a fast, cheaper model first, the configured model when needed.
+
+With CCAPI_FAST_MODEL set, a generation first runs on that model (the
+"fast" tier) and is escalated to CCAPI_LLM_MODEL (the "full" tier) when
+the fast result fails: an API error, no items, or an item that fails the
+local structural checks in validation.py. agent_sdk also escalates items
+whose self-assessment is below threshold.
+
+Standards that have failed InceptBench before skip the fast tier. They are
+learned from an eval_results.csv (CCAPI_ROUTER_HISTORY, default
+outputs/eval_results.csv, as written by run_generate_evaluate_csv.py). A
+standard is hard once it has at least CCAPI_ROUTER_MIN_SAMPLES (3) evaluated
+rows and at least CCAPI_ROUTER_FAIL_RATE (0.5) of them scored 85 or less, the
+pass mark used there; one unlucky row does not pin a standard to the full
+model. Every evaluation run therefore refines the list.
+
+The router counts per tier: calls, results kept, fast results escalated and
+latency percentiles (stats()). The batch scripts write these to the
+payload / summary under "router". An explicit model= argument bypasses the
+router, and with CCAPI_FAST_MODEL unset (the default) every call goes
+straight to the full tier.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TIERS = ("fast", "full")
+# InceptBench pass mark on the 0-100 scale (run_generate_evaluate_csv.py counts score > 85 as a pass)
+PASS_SCORE_100 = 85.0
+# Latencies kept per tier for the percentiles
+_LATENCY_WINDOW = 1000
+
+
+def load_hard_standards(
+    path: Path | None,
+    pass_score: float = PASS_SCORE_100,
+    min_samples: int | None = None,
+    fail_rate: float | None = None,
+) -> frozenset[str]:
+    """
+    Standards whose evaluated rows in an eval_results.csv mostly fail (missing file = none).
+
+    A standard needs at least min_samples evaluated rows, and at least
+    fail_rate of them scoring <= pass_score (None = CCAPI_ROUTER_MIN_SAMPLES /
+    CCAPI_ROUTER_FAIL_RATE).
+    """
+    if path is None or not path.exists():
+        return frozenset()
+    min_samples = config.CCAPI_ROUTER_MIN_SAMPLES if min_samples is None else min_samples
+    fail_rate = config.CCAPI_ROUTER_FAIL_RATE if fail_rate is None else fail_rate
+    # substandard_id -> [evaluated rows, failed rows]
+    counts: dict[str, list[int]] = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                sid = (row.get("substandard_id") or "").strip()
+                try:
+                    score = float(row.get("overall_score_100") or "")
+                except ValueError:
+                    # Not evaluated (generation or evaluation error): says nothing about the standard
+                    continue
+                if not sid:
+                    continue
+                seen = counts.setdefault(sid, [0, 0])
+                seen[0] += 1
+                seen[1] += score <= pass_score
+    except (OSError, csv.Error) as e:
+        logger.warning("Could not read router history %s: %s", path, e)
+        return frozenset()
+    return frozenset(
+        sid for sid, (n, failed) in counts.items()
+        if n >= max(1, min_samples) and failed / n >= fail_rate
+    )
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+
+def pass_rates_by_tier(rows: Iterable[dict]) -> dict[str, dict[str, Any]]:
+    """InceptBench aggregate and pass rate per "model_tier" over eval_results.csv-shaped rows."""
+    scores: dict[str, list[float]] = {}
+    for row in rows:
+        try:
+            score = float(row.get("overall_score_100") or "")
+        except ValueError:
+            continue
+        scores.setdefault(row.get("model_tier") or "unrouted", []).append(score)
+    return {
+        tier: {
+            "n_evaluated": len(values),
+            "aggregate_score": round(sum(values) / len(values), 2),
+            "pass_rate_percent": round(100.0 * sum(1 for v in values if v > PASS_SCORE_100) / len(values), 1),
+        }
+        for tier, values in sorted(scores.items())
+    }
+
+
+class _TierStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.passed = 0
+        self.escalated = 0
+        self.latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def snapshot(self) -> dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "calls": self.calls,
+            "passed": self.passed,
+            "pass_rate": round(self.passed / self.calls, 3) if self.calls else None,
+            "escalated": self.escalated,
+            "p50_seconds": _percentile(latencies, 0.5),
+            "p95_seconds": _percentile(latencies, 0.95),
+        }
+
+
+class ModelRouter:
+    """
+    Picks the model tier for a request and keeps per-tier latency / pass counts.
+
+    Args:
+        full_model: the configured model (always used when fast_model is empty).
+        fast_model: cheaper model tried first ("" or the full model = cascade off).
+        hard_standards: substandard ids that go straight to the full model.
+    """
+
+    def __init__(self, full_model: str, fast_model: str = "", hard_standards: Iterable[str] = ()) -> None:
+        self.full_model = full_model
+        self.fast_model = fast_model if fast_model != full_model else ""
+        self.hard_standards = frozenset(hard_standards)
+        self._stats = {tier: _TierStats() for tier in TIERS}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.fast_model)
+
+    def model(self, tier: str) -> str:
+        return self.fast_model if tier == "fast" and self.fast_model else self.full_model
+
+    def first_tier(self, request: dict) -> str:
+        """Tier to try first: "full" when the cascade is off or the request's standard is hard."""
+        sid = (request.get("skills") or {}).get("substandard_id", "")
+        return "fast" if self.enabled and sid not in self.hard_standards else "full"
+
+    def record(self, tier: str, seconds: float, passed: bool, escalated: bool = False) -> None:
+        """Count one result of `tier`; escalated = it was not kept and the full tier took over."""
+        stats = self._stats[tier]
+        stats.calls += 1
+        stats.passed += int(passed)
+        stats.escalated += int(escalated)
+        stats.latencies.append(seconds)
+
+    async def cascade(
+        self,
+        request: dict,
+        attempt: Callable[[str], Awaitable[T]],
+        accept: Callable[[T], bool],
+    ) -> tuple[T, str]:
+        """
+        Run attempt(model) on the request's first tier; rerun on the full tier
+        if a fast result is not accepted. Returns (result, tier that produced it).
+        """
+        tier = self.first_tier(request)
+        while True:
+            started = time.perf_counter()
+            result = await attempt(self.model(tier))
+            passed = accept(result)
+            escalate = tier == "fast" and not passed
+            self.record(tier, time.perf_counter() - started, passed, escalated=escalate)
+            if not escalate:
+                return result, tier
+            logger.info(
+                "Escalating %s from %s to %s",
+                (request.get("skills") or {}).get("substandard_id", ""),
+                self.fast_model,
+                self.full_model,
+            )
+            tier = "full"
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "fast_model": self.fast_model or None,
+            "full_model": self.full_model,
+            "hard_standards": len(self.hard_standards),
+            **{tier: stats.snapshot() for tier, stats in self._stats.items()},
+        }
+
+
+_ROUTER: ModelRouter | None = None
+
+
+def configure_router(
+    fast_model: str | None = None,
+    full_model: str | None = None,
+    history: Path | None = None,
+) -> ModelRouter:
+    """Set the process-wide router (None arguments fall back to config)."""
+    global _ROUTER
+    fast_model = config.CCAPI_FAST_MODEL if fast_model is None else fast_model
+    full_model = full_model or config.CCAPI_LLM_MODEL
+    history = config.CCAPI_ROUTER_HISTORY if history is None else history
+    hard = load_hard_standards(history) if fast_model else frozenset()
+    _ROUTER = ModelRouter(full_model, fast_model, hard)
+    if _ROUTER.enabled:
+        logger.info("Model cascade: %s -> %s (%d hard standards)", _ROUTER.fast_model, full_model, len(hard))
+    return _ROUTER
+
+
+def get_router() -> ModelRouter:
+    """The process-wide router (configured from CCAPI_FAST_MODEL on first use)."""
+    return _ROUTER if _ROUTER is not None else configure_router()
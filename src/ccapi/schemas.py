@@ -0,0 +1,122 @@
+"""
+Item schemas as a forced tool (structured output mode).
+
+In "tool" output mode the model gets a single tool whose input_schema is
+the item schema for the request's question type, and tool_choice forces
+the call. The item then arrives as an already-parsed tool_use.input dict
+that goes straight to parsed_to_items: no text scraping, no "Invalid JSON"
+failures and no extraction cost on the hot path. "text" mode (the default)
+keeps the prompt-and-parse behaviour.
+
+Requests with quantity > 1 get emit_questions ({"items": [...]}) instead of
+emit_question.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+OUTPUT_MODES = ("text", "tool")
+EMIT_QUESTION = "emit_question"
+EMIT_QUESTIONS = "emit_questions"
+
+_OPTION_KEYS = ["A", "B", "C", "D"]
+
+_ANSWER_OPTIONS = {
+    "type": "array",
+    "minItems": 4,
+    "maxItems": 4,
+    "items": {
+        "type": "object",
+        "properties": {
+            "key": {"type": "string", "enum": _OPTION_KEYS},
+            "text": {"type": "string"},
+        },
+        "required": ["key", "text"],
+    },
+}
+
+
+def question_type(request: dict) -> str:
+    """Question type from request["type"]: "mcq" (default), "msq" or "fill-in"."""
+    q = str(request.get("type") or "mcq").strip().lower()
+    if q in {"fill-in", "fill_in", "fillin", "fill"}:
+        return "fill-in"
+    if q in {"msq", "multi-select", "multi_select", "multiselect"}:
+        return "msq"
+    return "mcq"
+
+
+def content_schema(qtype: str) -> dict[str, Any]:
+    """JSON schema of an item's "content" for a question type."""
+    properties: dict[str, Any] = {
+        "question": {"type": "string"},
+        "image_url": {"type": "array", "items": {"type": "string"}},
+        "additional_details": {"type": "string"},
+        "answer_explanation": {"type": "string"},
+    }
+    required = ["answer", "question", "answer_explanation"]
+    if qtype == "fill-in":
+        properties["answer"] = {"type": "string", "description": "The single correct fill-in answer"}
+    elif qtype == "msq":
+        properties["answer"] = {
+            "type": "array",
+            "items": {"type": "string", "enum": _OPTION_KEYS},
+            "minItems": 2,
+            "uniqueItems": True,
+            "description": "Keys of all correct options",
+        }
+        properties["answer_options"] = _ANSWER_OPTIONS
+        required.append("answer_options")
+    else:
+        properties["answer"] = {"type": "string", "enum": _OPTION_KEYS, "description": "Key of the correct option"}
+        properties["answer_options"] = _ANSWER_OPTIONS
+        required.append("answer_options")
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def item_schema(qtype: str) -> dict[str, Any]:
+    """JSON schema of one generated item ({"id", "content"})."""
+    return {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string", "description": "Item id derived from the standard id, difficulty and a 3-digit number"},
+            "content": content_schema(qtype),
+        },
+        "required": ["id", "content"],
+    }
+
+
+def emit_tool(qtype: str, quantity: int = 1) -> dict[str, Any]:
+    """Tool definition the model must call with the finished item(s)."""
+    if quantity <= 1:
+        return {
+            "name": EMIT_QUESTION,
+            "description": f"Submit the finished {qtype.upper()} item. Call this exactly once with the complete item.",
+            "input_schema": item_schema(qtype),
+        }
+    return {
+        "name": EMIT_QUESTIONS,
+        "description": f"Submit all {quantity} finished {qtype.upper()} items in one call; ids must be unique.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "items": {"type": "array", "items": item_schema(qtype), "minItems": quantity, "maxItems": quantity},
+            },
+            "required": ["items"],
+        },
+    }
+
+
+def forced_tool_choice(tool: dict[str, Any]) -> dict[str, str]:
+    return {"type": "tool", "name": tool["name"]}
+
+
+def tool_input(content: Any, name: str) -> dict | None:
+    """input of the first tool_use block called `name` in message content (SDK objects or dicts)."""
+    for block in content or []:
+        get = block.get if isinstance(block, dict) else lambda k, b=block: getattr(b, k, None)
+        if get("type") == "tool_use" and get("name") == name:
+            data = get("input")
+            return data if isinstance(data, dict) else None
+    return None
@@ -0,0 +1,94 @@
+"""
+Single-flight deduplication for async work keyed by a string.
+
+Concurrent callers asking for the same key await one in-flight execution and
+share its result, and failures can be remembered for a short TTL so a burst
+of requests for a broken key doesn't re-run it N times. Used to collapse
+concurrent curriculum populations of the same standard into one LLM call
+and one curriculum.md write.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Collapse concurrent async calls with the same key into one execution.
+
+    Args:
+        negative_ttl: Seconds to remember a failed result (0 disables).
+        is_failure: Decides whether a result counts as a failure for the
+            negative cache. Defaults to dicts with a falsy "success".
+    """
+
+    def __init__(
+        self,
+        *,
+        negative_ttl: float = 0.0,
+        is_failure: Callable[[Any], bool] | None = None,
+    ):
+        self.negative_ttl = negative_ttl
+        self._is_failure = is_failure or (lambda r: isinstance(r, dict) and not r.get("success"))
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._failed: dict[Hashable, tuple[float, Any]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Run fn() once per key among concurrent callers.
+
+        Returns (result, shared): shared is True when this caller did not run
+        fn itself (joined an in-flight call or hit the negative cache).
+        Cancelling one waiter does not cancel the shared execution.
+        """
+        failed = self._failed.get(key)
+        if failed is not None:
+            if failed[0] > time.monotonic():
+                return failed[1], True
+            self._failed.pop(key, None)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task), False
+
+    def claim(self, key: Hashable) -> asyncio.Future | None:
+        """
+        Mark key in flight with a future the caller resolves itself.
+
+        For work that settles many keys in one go (e.g. one batch request):
+        do(key, ...) callers join the future meanwhile instead of running
+        their own. Returns None when do() would not run fn either (key in
+        flight or in the negative cache); go through do() then.
+        """
+        failed = self._failed.get(key)
+        if failed is not None and failed[0] > time.monotonic():
+            return None
+        if key in self._inflight:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return future
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.negative_ttl > 0 and self._is_failure(task.result()):
+            self._failed[key] = (time.monotonic() + self.negative_ttl, task.result())
+
+    def forget(self, key: Hashable) -> None:
+        """Drop any negative-cache entry for key."""
+        self._failed.pop(key, None)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
@@ -0,0 +1,74 @@
+"""
+Process-wide token usage and prompt-cache counters.
+
+Every Messages API response carries a usage block; record_usage() folds it
+into USAGE so batch runs and the API server can report how many calls hit
+the prompt cache (cache_read_input_tokens > 0), how many wrote it
+(cache_creation_input_tokens > 0), and total input/output tokens.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+)
+
+
+class UsageStats:
+    """Thread-safe running totals of Messages API usage."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.tokens = dict.fromkeys(_FIELDS, 0)
+
+    def record(self, usage: Any) -> None:
+        """Add one response's usage (SDK object or dict); None is ignored."""
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+        values = {k: int(get(k) or 0) for k in _FIELDS}
+        with self._lock:
+            self.requests += 1
+            for k, v in values.items():
+                self.tokens[k] += v
+            if values["cache_read_input_tokens"]:
+                self.cache_hits += 1
+            elif values["cache_creation_input_tokens"]:
+                self.cache_misses += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            cached = self.cache_hits + self.cache_misses
+            return {
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_rate": round(self.cache_hits / cached, 3) if cached else None,
+                **self.tokens,
+            }
+
+
+USAGE = UsageStats()
+
+
+def record_usage(response: Any) -> None:
+    """Record response.usage into the process-wide USAGE counters."""
+    USAGE.record(getattr(response, "usage", None))
+
+
+def cached_system(text: str) -> list[dict[str, Any]]:
+    """System prompt as a single text block marked for ephemeral prompt caching."""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
@@ -0,0 +1,113 @@
+"""
+Local structural checks on generated items.
+
+These run in microseconds and need no model call, so they gate anything
+more expensive:
+- the model router (router.py) escalates a fast-model result to the full
+  model when one of its items fails here;
+- agent_sdk's generate_with_self_correction sends a failing item straight
+  to regeneration with these issues instead of asking the model to
+  self-assess it, and only samples self-assessment for items that pass;
+- agent_sdk's best-of-k ranking (agent_sdk/src/ranking.py) orders
+  candidates by their structural issues first.
+
+An item passes when structural_issues() returns []. The issues are short
+English sentences written for the regeneration prompt.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from .schemas import question_type
+
+OPTION_KEYS = ("A", "B", "C", "D")
+
+# "option E", "choice (F)", "answer G" in an explanation; I is left out ("the answer I chose")
+_CITED_OPTION = re.compile(r"\b(?:[Oo]ptions?|[Cc]hoices?|[Aa]nswers?)\s+\(?([A-HJ-Z])\)?(?![\w'])")
+
+
+def answer_keys(answer: Any) -> list[str]:
+    """Answer as a list of option keys ("B", ["A", "C"] and "A, C" all work)."""
+    parts = answer if isinstance(answer, list) else [answer]
+    return [t.strip().upper() for p in parts if p is not None for t in str(p).split(",") if t.strip()]
+
+
+def _option_issues(options: Any) -> tuple[list[str], list[str]]:
+    """(option keys, issues) for an answer_options list."""
+    if not isinstance(options, list):
+        return [], ["answer_options is missing"]
+    entries = [o for o in options if isinstance(o, dict)]
+    keys = [str(o.get("key", "")).strip().upper() for o in entries]
+    issues: list[str] = []
+    if len(keys) != len(OPTION_KEYS):
+        issues.append(f"expected {len(OPTION_KEYS)} answer options, got {len(keys)}")
+    duplicates = sorted({k for k in keys if keys.count(k) > 1})
+    if duplicates:
+        issues.append(f"duplicate option keys: {', '.join(duplicates)}")
+    unknown = [k for k in keys if k not in OPTION_KEYS]
+    if unknown:
+        issues.append(f"option keys must be {', '.join(OPTION_KEYS)} (got {', '.join(k or '<empty>' for k in unknown)})")
+    texts = [" ".join(str(o.get("text", "")).split()).lower() for o in entries]
+    empty = [k for k, t in zip(keys, texts) if not t]
+    if empty:
+        issues.append(f"empty option text: {', '.join(empty)}")
+    repeated = sorted({t for t in texts if t and texts.count(t) > 1})
+    if repeated:
+        issues.append(f"{len(repeated)} option text(s) appear more than once")
+    return keys, issues
+
+
+def structural_issues(content: Any, qtype: str) -> list[str]:
+    """Problems with one item's content for its question type ([] = well-formed)."""
+    if not isinstance(content, dict):
+        return ["content is not an object"]
+    issues: list[str] = []
+    if not str(content.get("question") or "").strip():
+        issues.append("question is empty")
+    if not str(content.get("answer_explanation") or "").strip():
+        issues.append("answer_explanation is empty")
+    answer = content.get("answer")
+
+    if qtype == "fill-in":
+        if content.get("answer_options"):
+            issues.append("fill-in item must not have answer_options")
+        if isinstance(answer, list) or not str(answer or "").strip():
+            issues.append("fill-in answer must be a single non-empty string")
+        return issues
+
+    keys, option_issues = _option_issues(content.get("answer_options"))
+    issues.extend(option_issues)
+    answers = answer_keys(answer)
+    if not answers:
+        issues.append("answer is empty")
+    elif qtype == "msq":
+        if not isinstance(answer, list):
+            issues.append('MSQ answer must be a list of option keys, e.g. ["A", "C"]')
+        elif len(set(answers)) < 2:
+            issues.append("MSQ answer must have at least 2 correct options")
+    elif len(answers) > 1:
+        issues.append("MCQ answer must be a single option key")
+    missing = [a for a in answers if a not in keys]
+    if missing:
+        issues.append(f"answer {', '.join(missing)} is not an option key")
+
+    cited = sorted(set(_CITED_OPTION.findall(str(content.get("answer_explanation") or ""))) - set(keys))
+    if cited and keys:
+        issues.append(f"answer_explanation refers to option(s) that do not exist: {', '.join(cited)}")
+    return issues
+
+
+def result_issues(result: dict) -> list[str]:
+    """Problems with a pipeline result envelope: its error, no items, or per-item structural issues."""
+    if not result.get("success"):
+        return [str(result.get("error") or "generation failed")]
+    items = (result.get("generatedContent") or {}).get("generated_content") or []
+    if not items:
+        return ["no items generated"]
+    issues: list[str] = []
+    for item in items:
+        qtype = question_type(item.get("request") or {})
+        issues.extend(f"{item.get('id', '')}: {issue}" for issue in structural_issues(item.get("content"), qtype))
+    return issues